@@ -0,0 +1,93 @@
+from collections import namedtuple
+
+
+# 엑셀 시트의 최대 행/열 (xlsx 형식 한계)
+MAX_ROW = 1048576
+MAX_COL = 16384
+
+# 입력 영역 열 수 (항목번호 ~ REF)
+INPUT_COLS = 7
+
+# 사전 검사를 마친 일괄 입력 한 구역
+#   lines        : [(줄 번호, 원본 줄, 분석 결과, 오류 메시지)] - 오류 줄은 분석 결과가 None
+#   errors       : 오류 줄 (줄 번호, 원본 줄, 오류 메시지) - BatchPlan.errors와 같은 형식
+#   rows         : 오류 줄을 뺀 줄들이 차지할 전체 행 수
+#   cache_hits   : 줄 분석 캐시에서 찾은 줄 수
+#   cache_misses : 새로 분석한 줄 수
+CheckedLines = namedtuple('CheckedLines', ['lines', 'errors', 'rows', 'cache_hits', 'cache_misses'])
+
+
+class BatchCheckError(ValueError):
+    """사전 검사에서 오류 줄이 나와 일괄 입력을 중단한 경우 - errors에 오류 줄 전체"""
+
+    def __init__(self, errors, hint=""):
+        # errors: [(시트 이름, 줄 번호, 원본 줄, 오류 메시지)]
+        self.errors = errors
+        names = [str(line_no) for _, line_no, _, _ in errors[:10]]
+        if len({sheet for sheet, _, _, _ in errors}) > 1:
+            names = [f"{line_no}({sheet})" for sheet, line_no, _, _ in errors[:10]]
+        text = ', '.join(names)
+        if len(errors) > 10:
+            text += f" 외 {len(errors) - 10}줄"
+        super().__init__(f"형식 오류가 있는 줄 {len(errors)}개가 있어 아무것도 입력하지 않았습니다: "
+                         f"{text}번째 줄{hint}")
+
+
+def rows_needed(rec):
+    """분석한 줄 하나가 차지하는 행 수 (MMC는 세트마다 3행)"""
+    return rec.count * 3 if rec.kind == 'mmc' else rec.count
+
+
+def check_lines(lines, cache, first_line_no=1, start_row=None, col_num=None):
+    """일괄 입력 줄들을 시트에 쓰기 전에 모두 분석하고 오류 줄을 모음 - CheckedLines
+
+    유형 감지, 숫자 변환, 행 개수는 cache(ParseCache)로 분석하고, start_row를 주면
+    그 행부터 차례로 쌓았을 때 시트의 마지막 행(MAX_ROW)을 넘는 줄도 오류로 본다.
+    오류 줄은 행을 차지하지 않으므로 건너뛰고 처리해도 다음 줄들의 위치는 같다.
+    항목 교체 모드처럼 기존 행 사이에 끼워 넣는 경우는 start_row 없이 호출한다.
+    입력 영역이 시트의 마지막 열을 넘으면 (col_num) 줄을 보기 전에 ValueError.
+    """
+    if col_num is not None and col_num + INPUT_COLS - 1 > MAX_COL:
+        raise ValueError(f"입력 영역({INPUT_COLS}개 열)이 시트의 마지막 열을 넘습니다. 시작 열을 바꿔 주세요.")
+
+    hits, misses = cache.hits, cache.misses
+    checked = []
+    errors = []
+    rows = 0
+    for line_no, line in enumerate(lines, first_line_no):
+        kind = None
+        if not isinstance(line, str):
+            line, kind = line  # 표 가져오기에서 유형 열을 지정한 줄 (줄, 유형)
+        rec = msg = None
+        if ',' not in line:
+            msg = f"⚠ 형식 오류 (최소 2개 항목 필요): {line}"
+        else:
+            try:
+                rec = cache.parse(line, kind)
+            except ValueError as e:
+                msg = f"⚠ 오류: {line} - {e}"
+            else:
+                if rec is None:
+                    msg = f"⚠ 유형을 감지할 수 없음: {line}"
+                elif start_row is not None and start_row + rows + rows_needed(rec) - 1 > MAX_ROW:
+                    msg = (f"⚠ 시트 범위를 넘음: {line} - "
+                           f"{start_row + rows + rows_needed(rec) - 1:,}행까지 필요 (최대 {MAX_ROW:,}행)")
+                    rec = None
+
+        if rec is None:
+            errors.append((line_no, line, msg))
+        else:
+            rows += rows_needed(rec)
+        checked.append((line_no, line, rec, msg))
+    return CheckedLines(checked, errors, rows, cache.hits - hits, cache.misses - misses)
+
+
+def split_checked(checked, chunk_size):
+    """검사 결과를 chunk_size줄씩 나눈 CheckedLines들 (묶음 단위 계획용, 캐시 건수는 첫 묶음에)"""
+    hits, misses = checked.cache_hits, checked.cache_misses
+    for start in range(0, len(checked.lines), chunk_size):
+        lines = checked.lines[start:start + chunk_size]
+        errors = [(line_no, line, msg) for line_no, line, rec, msg in lines if rec is None]
+        rows = sum(rows_needed(rec) for _, _, rec, _ in lines if rec is not None)
+        yield CheckedLines(lines, errors, rows, hits, misses)
+        hits = misses = 0
@@ -0,0 +1,392 @@
+from array import array
+from bisect import bisect_right
+
+from openpyxl.cell.cell import MergedCell
+
+from instrumentation import NULL_PROFILER
+from style_registry import StyleRegistry
+
+
+def shifted_row(row, from_row, delta):
+    """행 이동 후의 행 번호 - 당길 때(delta < 0) 지워지는 행은 None
+
+    from_row부터 아래 전체가 delta만큼 이동하고, 당길 때는 from_row 바로 위
+    -delta개 행이 지워진다.
+    """
+    if row >= from_row:
+        return row + delta
+    if row >= from_row + delta:
+        return None
+    return row
+
+
+def shifted_span(first, last, from_row, delta):
+    """행 구간(first~last)의 이동 후 구간 - 모두 지워지면 None
+
+    걸쳐 있는 구간은 엑셀의 행 삽입/삭제처럼 늘어나거나 줄어든다.
+    """
+    if delta < 0:
+        del_start = from_row + delta
+        if del_start <= first < from_row:
+            first = from_row
+        if del_start <= last < from_row:
+            last = del_start - 1
+        if first > last:
+            return None
+    if first >= from_row:
+        first += delta
+    if last >= from_row:
+        last += delta
+    return first, last
+
+
+class BatchPlan:
+    """일괄 입력 쓰기 계획 (열 단위 저장)
+
+    _batch_* 규칙은 워크시트 대신 이 객체에 쓰기/병합을 기록하고,
+    apply_plan()이 전체 계획을 워크시트에 한 번에 적용한다.
+    """
+
+    def __init__(self, min_col, max_col):
+        # 입력 영역 열 구간 (기존 병합 해제 판단 기준)
+        self.min_col = min_col
+        self.max_col = max_col
+        # 셀 쓰기 (행, 열, 값) - 같은 인덱스끼리 한 건
+        self.rows = array('l')
+        self.cols = array('l')
+        self.values = []
+        # 항목번호 셀 병합 (시작 행, 행 수, 열)
+        self.merges = []
+        # 셀 스타일 (행, 열, 스타일 이름)
+        self.styles = []
+        # 기존 병합을 해제할 행 구간 (시작 행, 행 수)
+        self.spans = []
+        # 행 이동 (기준 행, 이동 행 수) - 다른 기록보다 먼저 순서대로 적용
+        self.shifts = []
+        # 처리된 줄 (줄 번호, 유형, 시작 행, 행 수)
+        self.entries = []
+        # 실패한 줄 (줄 번호, 원본 줄, 오류 메시지)
+        self.errors = []
+        # 기존 데이터와 겹쳐서 건너뛴 줄 (줄 번호, 시작 행, 행 수)
+        self.skipped = []
+        # 줄 분석 캐시에서 찾은 줄 / 새로 분석한 줄 수
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def reserve(self, start_row, num_rows):
+        """기존 병합을 해제할 행 구간 등록"""
+        self.spans.append((start_row, num_rows))
+
+    def write(self, row, col, value):
+        self.rows.append(row)
+        self.cols.append(col)
+        self.values.append(value)
+
+    def merge(self, start_row, num_rows, col, style='center'):
+        if num_rows < 1:
+            raise ValueError(f"병합할 행 수가 올바르지 않습니다: {num_rows}")
+        self.merges.append((start_row, num_rows, col))
+        if style:
+            self.styles.append((start_row, col, style))
+
+    def mark(self):
+        """현재 기록 위치 (줄 단위 되돌리기용)"""
+        return (len(self.values), len(self.merges), len(self.styles), len(self.spans))
+
+    def rollback(self, mark):
+        """mark() 이후 기록 취소 - 중간에 실패한 줄의 일부 기록 제거"""
+        n_values, n_merges, n_styles, n_spans = mark
+        del self.rows[n_values:]
+        del self.cols[n_values:]
+        del self.values[n_values:]
+        del self.merges[n_merges:]
+        del self.styles[n_styles:]
+        del self.spans[n_spans:]
+
+    def shift(self, from_row, delta, upto=None):
+        """from_row부터 아래 행 전체를 delta만큼 밀기(양수)/당기기(음수) 기록
+
+        다른 기록은 모두 이동을 마친 뒤의 행 번호로 저장되므로, upto(mark() 값)
+        이전에 기록한 쓰기/병합/스타일/구간과 처리된 줄 위치도 함께 옮긴다.
+        upto 이후의 기록은 이미 이동 후 위치로 쓴 것으로 본다.
+        """
+        if not delta:
+            return
+        self.shifts.append((from_row, delta))
+        n_values, n_merges, n_styles, n_spans = upto or self.mark()
+
+        rows = array('l')
+        cols = array('l')
+        values = []
+        for i in range(n_values):
+            row = shifted_row(self.rows[i], from_row, delta)
+            if row is not None:
+                rows.append(row)
+                cols.append(self.cols[i])
+                values.append(self.values[i])
+        rows.extend(self.rows[n_values:])
+        cols.extend(self.cols[n_values:])
+        self.rows, self.cols = rows, cols
+        self.values = values + self.values[n_values:]
+
+        merges = []
+        for start_row, num_rows, col in self.merges[:n_merges]:
+            span = shifted_span(start_row, start_row + num_rows - 1, from_row, delta)
+            if span is not None and span[1] > span[0]:
+                merges.append((span[0], span[1] - span[0] + 1, col))
+        self.merges[:n_merges] = merges
+
+        styles = []
+        for row, col, name in self.styles[:n_styles]:
+            row = shifted_row(row, from_row, delta)
+            if row is not None:
+                styles.append((row, col, name))
+        self.styles[:n_styles] = styles
+
+        spans = []
+        for start_row, num_rows in self.spans[:n_spans]:
+            span = shifted_span(start_row, start_row + num_rows - 1, from_row, delta)
+            if span is not None:
+                spans.append((span[0], span[1] - span[0] + 1))
+        self.spans[:n_spans] = spans
+
+        entries = []
+        for line_no, kind, start_row, num_rows in self.entries:
+            span = shifted_span(start_row, start_row + num_rows - 1, from_row, delta)
+            if span is not None:
+                entries.append((line_no, kind, span[0], span[1] - span[0] + 1))
+        self.entries = entries
+
+    def clear_unwritten(self, start_row, num_rows, since):
+        """since(mark() 값) 이후 기록하지 않은 입력 영역 칸을 빈 값으로 기록
+
+        기존 항목을 같은 자리에 다시 쓸 때 이전 내용이 남지 않도록 한다.
+        """
+        written = {(self.rows[i], self.cols[i]) for i in range(since[0], len(self.values))}
+        for row in range(start_row, start_row + num_rows):
+            for col in range(self.min_col, self.max_col + 1):
+                if (row, col) not in written:
+                    self.write(row, col, None)
+
+    def drop_lines(self, line_nos):
+        """지정한 줄의 기록을 모두 빼고 skipped로 옮김 (겹치는 줄 건너뛰기용)
+
+        줄마다 쓰는 행이 겹치지 않는 계획(행 이동 없음)에서만 사용한다.
+        건너뛴 줄의 행은 기존 내용 그대로 남는다.
+        """
+        rows = set()
+        entries = []
+        for entry in self.entries:
+            line_no, _, start_row, num_rows = entry
+            if line_no in line_nos:
+                rows.update(range(start_row, start_row + num_rows))
+                self.skipped.append((line_no, start_row, num_rows))
+            else:
+                entries.append(entry)
+        self.entries = entries
+
+        keep = [i for i, row in enumerate(self.rows) if row not in rows]
+        self.rows = array('l', (self.rows[i] for i in keep))
+        self.cols = array('l', (self.cols[i] for i in keep))
+        self.values = [self.values[i] for i in keep]
+        self.merges = [merge for merge in self.merges if merge[0] not in rows]
+        self.styles = [style for style in self.styles if style[0] not in rows]
+        self.spans = [span for span in self.spans if span[0] not in rows]
+
+    def total_rows(self):
+        return sum(num_rows for _, num_rows in self.spans)
+
+    def to_dict(self):
+        """JSON으로 저장할 수 있는 형태 (저널 기록용) - 줄 결과(entries/errors)는 제외"""
+        return {
+            'min_col': self.min_col,
+            'max_col': self.max_col,
+            'rows': self.rows.tolist(),
+            'cols': self.cols.tolist(),
+            'values': self.values,
+            'merges': self.merges,
+            'styles': self.styles,
+            'spans': self.spans,
+            'shifts': self.shifts,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        plan = cls(data['min_col'], data['max_col'])
+        plan.rows.extend(data['rows'])
+        plan.cols.extend(data['cols'])
+        plan.values = data['values']
+        plan.merges = [tuple(merge) for merge in data['merges']]
+        plan.styles = [tuple(style) for style in data['styles']]
+        plan.spans = [tuple(span) for span in data['spans']]
+        plan.shifts = [tuple(shift) for shift in data['shifts']]
+        return plan
+
+    def cells(self):
+        """(행, 열) 순으로 정렬된 최종 쓰기 목록 - 같은 셀은 마지막 값만 남김"""
+        latest = {}
+        rows, cols = self.rows, self.cols
+        for i in range(len(self.values)):
+            latest[(rows[i], cols[i])] = i
+        values = self.values
+        return [(row, col, values[i]) for (row, col), i in sorted(latest.items())]
+
+
+def shift_rows(ws, from_row, delta):
+    """워크시트의 from_row부터 아래 행 전체를 delta만큼 이동 (음수면 바로 위 행을 지우고 당김)
+
+    ws.insert_rows()/delete_rows()는 셀을 하나씩 옮기고 병합 범위는 그대로 두므로,
+    셀 사전을 한 번에 다시 만들고 병합 범위와 행 높이도 함께 옮긴다.
+    수식 참조, 조건부 서식, 데이터 유효성 검사 범위는 바꾸지 않는다. 그래서 계획 단계에서
+    shift_guard.ShiftGuard로 그런 참조보다 아래에서만 옮기게 한다.
+    """
+    cells = {}
+    for (row, col), cell in ws._cells.items():
+        new_row = shifted_row(row, from_row, delta)
+        if new_row is None:
+            continue
+        if new_row != row:
+            cell.row = new_row
+        cells[(new_row, col)] = cell
+    ws._cells = cells
+
+    ranges = set()
+    for merged in ws.merged_cells.ranges:
+        span = shifted_span(merged.min_row, merged.max_row, from_row, delta)
+        if span is None or (span[0] == span[1] and merged.min_col == merged.max_col):
+            continue
+        if span != (merged.min_row, merged.max_row):
+            grown = span[1] - span[0] > merged.max_row - merged.min_row
+            merged.min_row, merged.max_row = span
+            # 첫 셀이 지워진 행에 있었다면 남은 첫 행의 셀을 일반 셀로 바꿈
+            if isinstance(ws._cells.get((merged.min_row, merged.min_col)), MergedCell):
+                del ws._cells[(merged.min_row, merged.min_col)]
+            merged.start_cell = ws.cell(merged.min_row, merged.min_col)
+            if grown:
+                ws._clean_merge_range(merged)
+        ranges.add(merged)
+    ws.merged_cells.ranges = ranges
+
+    dimensions = list(ws.row_dimensions.items())
+    ws.row_dimensions.clear()
+    for row, dimension in dimensions:
+        new_row = shifted_row(row, from_row, delta)
+        if new_row is not None:
+            dimension.index = new_row
+            ws.row_dimensions[new_row] = dimension
+
+
+def target_rows(*plans):
+    """계획이 쓰는 행 구간 [(시작 행, 끝 행)] - 이어지거나 겹치는 구간은 하나로 합침
+
+    계획을 여러 개 주면 모두 합친 구간 (묶음 계획들의 기존 값을 시트에서 한 번에 찾을 때).
+    """
+    intervals = []
+    for start_row, num_rows in sorted(span for plan in plans for span in plan.spans):
+        end_row = start_row + num_rows - 1
+        if intervals and start_row <= intervals[-1][1] + 1:
+            intervals[-1][1] = max(intervals[-1][1], end_row)
+        else:
+            intervals.append([start_row, end_row])
+    return [tuple(interval) for interval in intervals]
+
+
+def occupied_cells(ws, intervals, min_col, max_col):
+    """행 구간 안에서 값이 있는 셀 [(행, 열)]과 구간에 걸친 병합 범위 목록
+
+    셀 사전에서 바로 찾으므로 (ws.iter_rows()와 달리) 빈 셀을 새로 만들지 않는다.
+    """
+    cells = []
+    get = ws._cells.get
+    for start_row, end_row in intervals:
+        for row in range(start_row, end_row + 1):
+            for col in range(min_col, max_col + 1):
+                cell = get((row, col))
+                if cell is not None and cell.value is not None and cell.value != '':
+                    cells.append((row, col))
+
+    merges = [merged for merged in ws.merged_cells.ranges
+              if merged.min_col <= max_col and merged.max_col >= min_col
+              and _overlaps(intervals, merged.min_row, merged.max_row)]
+    return cells, merges
+
+
+def _overlaps(intervals, start_row, end_row):
+    i = bisect_right(intervals, (end_row, float('inf'))) - 1
+    return i >= 0 and intervals[i][1] >= start_row
+
+
+def find_conflicts(plan, cells, merges):
+    """기존 값/병합과 겹치는 줄 [(줄 번호, 시작 행, 행 수, 값 있는 셀 수, 병합 범위 목록)]
+
+    cells, merges는 occupied_cells() (또는 xlsx_patch.scan_occupied())의 결과이고,
+    줄별 행 구간은 plan.entries를 시작 행 순으로 정렬해 이분 탐색으로 찾는다.
+    """
+    entries = sorted(plan.entries, key=lambda entry: entry[2])
+    starts = [entry[2] for entry in entries]
+    found = {}
+
+    def owner(row):
+        i = bisect_right(starts, row) - 1
+        if i >= 0 and row < starts[i] + entries[i][3]:
+            return i
+        return None
+
+    for row, _ in cells:
+        i = owner(row)
+        if i is not None:
+            found.setdefault(i, [0, []])[0] += 1
+
+    for merged in merges:
+        i = max(bisect_right(starts, merged.min_row) - 1, 0)
+        while i < len(entries) and starts[i] <= merged.max_row:
+            if starts[i] + entries[i][3] > merged.min_row:
+                found.setdefault(i, [0, []])[1].append(merged.coord)
+            i += 1
+
+    conflicts = []
+    for i in sorted(found):
+        line_no, _, start_row, num_rows = entries[i]
+        n_cells, merged = found[i]
+        conflicts.append((line_no, start_row, num_rows, n_cells, sorted(merged)))
+    return conflicts
+
+
+def unmerge_spans(plan, merge_index):
+    """1. 대상 행 구간의 기존 병합 해제"""
+    for start_row, num_rows in plan.spans:
+        merge_index.unmerge_rows(start_row, start_row + num_rows - 1)
+
+
+def write_cells(plan, ws):
+    """2. 셀 값 쓰기 (행/열 순 정렬, 중복 제거)"""
+    for row, col, value in plan.cells():
+        # ws.cell(row, col, value)는 None을 무시하므로 비우는 기록도 반영되도록 직접 대입
+        ws.cell(row, col).value = value
+
+
+def merge_items(plan, ws, merge_index):
+    """3. 항목번호 셀 병합 및 정렬 스타일 적용"""
+    for start_row, num_rows, col in plan.merges:
+        merge_index.merge(start_row, col, start_row + num_rows - 1, col)
+
+    # 스타일은 이름별로 한 번만 등록하고 번호로 일괄 적용
+    StyleRegistry(ws.parent).apply(ws, plan.styles)
+
+
+def apply_plan(plan, ws, merge_index, profiler=NULL_PROFILER):
+    """쓰기 계획을 워크시트에 한 번에 적용"""
+    if plan.shifts:
+        with profiler.stage('shift'):
+            for from_row, delta in plan.shifts:
+                shift_rows(merge_index.ws, from_row, delta)
+            merge_index.reload()
+    with profiler.stage('unmerge'):
+        unmerge_spans(plan, merge_index)
+    with profiler.stage('write'):
+        write_cells(plan, ws)
+    with profiler.stage('merge'):
+        merge_items(plan, ws, merge_index)
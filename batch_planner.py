@@ -0,0 +1,300 @@
+from openpyxl.utils import column_index_from_string
+
+from batch_check import check_lines
+from batch_plan import BatchPlan
+from instrumentation import NULL_PROFILER
+from item_index import ItemIndex
+from line_parser import ParseCache
+from merge_index import MergedRangeIndex
+from report_writer import iter_chunks
+from shift_guard import ShiftGuard
+
+
+class BatchPlanner:
+    """일괄 입력 줄 → 쓰기 계획 (CLI와 Streamlit이 같이 쓰는 부분)
+
+    줄 검사, 유형별 규칙(_batch_*), 항목 교체 모드의 자리 찾기를 모두 계획(BatchPlan)에만
+    기록하고 워크시트는 건드리지 않는다. 줄마다의 처리 메시지는 report()로 넘기므로,
+    화면에 보여 주는 방법(출력/메시지 목록)은 각 화면의 클래스가 report()를 바꿔서 정한다.
+    """
+
+    def __init__(self, ws=None, sheet_name=None, start_col='F', start_row=5):
+        self.ws = ws
+        self.sheet_name = sheet_name
+        self.current_row = start_row
+        self.start_col = start_col
+        self.col_num = column_index_from_string(start_col)
+        self._merge_index = None
+        self._plan = None
+        self.profiler = NULL_PROFILER
+        # 줄 분석 결과 캐시 (같은 규격 줄이 반복될 때 다시 분석하지 않음, 세션/인스턴스끼리 공유 가능)
+        self.parse_cache = ParseCache()
+        # 항목 교체 모드 - 시트에 있는 항목번호는 그 자리에 다시 입력
+        self.upsert = False
+        self._item_index = None
+        self._shift_guard = None
+        # 줄 유형별 일괄 입력 규칙
+        self._rules = {
+            'simple': self._batch_simple,
+            'position': self._batch_position,
+            'reference': self._batch_reference,
+            'mmc': self._batch_mmc,
+        }
+
+    def report(self, msg):
+        """줄 하나의 처리 메시지 ('✓ ...' 또는 '⚠ ...') - 화면마다 바꿔서 사용"""
+
+    def check_batch(self, lines, first_line_no=1, start_row=None):
+        """일괄 입력 줄들의 사전 검사 (유형 감지, 숫자 변환, 행 개수, 시트 범위) - CheckedLines
+
+        시트에 쓰기 전에 줄 분석만으로 오류 줄을 모두 찾는다. start_row는 범위 확인의 시작 행.
+        """
+        with self.profiler.stage('detect'):
+            return check_lines(lines, self.parse_cache, first_line_no, start_row, self.col_num)
+
+    def plan_batch(self, lines, first_line_no=1):
+        """일괄 입력 줄들을 쓰기 계획으로 변환 (워크시트는 건드리지 않음)"""
+        return self.plan_checked(self.check_batch(lines, first_line_no, None if self.upsert else self.current_row))
+
+    def plan_checked(self, checked):
+        """check_batch()로 검사한 줄들을 쓰기 계획으로 변환 - 오류 줄은 errors에 기록하고 건너뜀"""
+        self._plan = BatchPlan(self.col_num, self.col_num + 6)
+        if self.upsert:
+            with self.profiler.stage('items'):
+                self._get_item_index()
+
+        for line_no, line, rec, msg in checked.lines:
+            if rec is None:
+                self._plan.errors.append((line_no, line, msg))
+                self.report(msg)
+                continue
+
+            start_row = self.current_row
+            mark = self._plan.mark()
+            try:
+                with self.profiler.stage('rules'):
+                    if self.upsert:
+                        placed_row, rows, msg = self._place_item(rec)
+                    else:
+                        msg = self._rules[rec.kind](rec)
+                        placed_row, rows = start_row, self.current_row - start_row
+
+                self._plan.entries.append((line_no, rec.kind, placed_row, rows))
+                self.report(f"✓ {msg}")
+
+            except Exception as e:
+                # 실패한 줄의 기록은 버리고 위치도 되돌림
+                self._plan.rollback(mark)
+                self.current_row = start_row
+                msg = f"⚠ 오류: {line} - {e}"
+                self._plan.errors.append((line_no, line, msg))
+                self.report(msg)
+
+        self._plan.cache_hits = checked.cache_hits
+        self._plan.cache_misses = checked.cache_misses
+        self.profiler.count('lines', len(self._plan.entries))
+        self.profiler.count('cells', len(self._plan))
+        self.profiler.count('cache_hits', self._plan.cache_hits)
+        return self._plan
+
+    def iter_plans(self, lines):
+        """일괄 입력 줄들을 묶음 단위 쓰기 계획으로 차례로 변환 (스트리밍 저장용)"""
+        for first_line_no, chunk in iter_chunks(lines):
+            yield self.plan_batch(chunk, first_line_no)
+
+    def _get_merge_index(self):
+        """입력 영역(7개 열)의 병합 범위 인덱스 (배치마다 한 번 생성)"""
+        if self._merge_index is None or self._merge_index.ws is not self.ws:
+            self._merge_index = MergedRangeIndex(self.ws, self.col_num, self.col_num + 6)
+        return self._merge_index
+
+    def _get_item_index(self):
+        """현재 시트의 항목번호 인덱스 (시트마다 한 번 읽고, 일괄 입력 중에는 계획과 함께 갱신)"""
+        if (self._item_index is None or self._item_index.ws is not self.ws
+                or self._item_index.col != self.col_num):
+            self._item_index = ItemIndex(self.ws, self.col_num)
+        return self._item_index
+
+    def _get_shift_guard(self):
+        """현재 시트에서 행 이동을 따라가지 않는 참조의 위치 (시트마다 한 번 훑음)"""
+        if self._shift_guard is None or self._shift_guard.ws is not self.ws:
+            self._shift_guard = ShiftGuard(self.ws)
+        return self._shift_guard
+
+    def _place_item(self, rec):
+        """항목 교체 모드의 줄 처리 - (시작 행, 행 수, 처리 메시지)
+
+        시트에 이미 있는 항목번호는 그 블록을 새 내용으로 바꾸고, 없는 항목은
+        번호 순서에 맞는 자리에 끼워 넣는다. 행 수가 달라지면 아래 행 전체를 밀거나 당긴다.
+        뒤에 올 항목이 없으면 마지막 항목 다음에 추가한다.
+        옮길 행 위/아래에 수식, 조건부 서식 등 행 이동을 따라가지 않는 참조가 걸려 있으면
+        ValueError로 그 줄을 처리하지 않는다 (ShiftGuard 참고).
+        """
+        index = self._get_item_index()
+        found = index.find(rec.item_no)
+        if found is not None:
+            start_row, old_rows = found
+        else:
+            start_row, old_rows = index.insert_row(rec.item_no), 0
+            if start_row is None:
+                # 기존 항목을 덮지 않도록 마지막 항목 다음(현재 위치가 더 아래면 현재 위치)에 추가
+                self.current_row = start_row = max(self.current_row, index.end_row() + 1)
+                msg = self._rules[rec.kind](rec)
+                rows = self.current_row - start_row
+                index.put(rec.item_no, start_row, rows)
+                return start_row, rows, msg
+
+        append_row = self.current_row
+        mark = self._plan.mark()
+        self.current_row = start_row
+        msg = self._rules[rec.kind](rec)
+        rows = self.current_row - start_row
+        from_row = start_row + old_rows
+        if rows != old_rows:
+            self._get_shift_guard().check(from_row, rows - old_rows)
+
+        # 기존 블록에서 새 내용이 덮지 않는 칸은 비우고, 늘어나거나 줄어든 만큼 아래 행 이동
+        self._plan.clear_unwritten(start_row, min(rows, old_rows), mark)
+        self._plan.shift(from_row, rows - old_rows, mark)
+        index.shift(from_row, rows - old_rows)
+        index.put(rec.item_no, start_row, rows)
+        self.current_row = append_row + rows - old_rows if append_row >= from_row else append_row
+
+        if found is not None:
+            return start_row, rows, f"{msg} → {start_row}행의 기존 항목 교체 ({old_rows}개 → {rows}개 행)"
+        return start_row, rows, f"{msg} → {start_row}행에 끼워 넣음 (아래 행 {rows}개씩 밀림)"
+
+    def _batch_simple(self, rec):
+        """단순 측정값 일괄 입력"""
+        rows = rec.count
+
+        start_row = self.current_row
+
+        # 기존 병합 해제 구간 등록
+        self._plan.reserve(start_row, rows)
+
+        for i in range(rows):
+            row = self.current_row + i
+            # 항목번호는 첫 행에만 입력 (병합할 것이므로)
+            if i == 0:
+                self._plan.write(row, self.col_num, rec.item_no)
+            self._plan.write(row, self.col_num + 1, rec.label)
+            self._plan.write(row, self.col_num + 2, rec.upper_tol)
+            self._plan.write(row, self.col_num + 3, rec.lower_tol)
+            self._plan.write(row, self.col_num + 4, rec.lower_calc)  # 하한계산값 (기준 + 하한공차)
+            self._plan.write(row, self.col_num + 5, rec.upper_calc)  # 상한계산값 (기준 + 상한공차)
+            self._plan.write(row, self.col_num + 6, rec.ref)
+
+        # 여러 행이면 항목번호 셀 병합
+        if rows > 1:
+            self._plan.merge(start_row, rows, self.col_num)
+
+        self.current_row += rows
+        return f"[단순] 항목 {rec.item_no}: {rows}개 행"
+
+    def _batch_position(self, rec):
+        """위치도 값 일괄 입력"""
+        rows = rec.count
+
+        start_row = self.current_row
+
+        # 기존 병합 해제 구간 등록
+        self._plan.reserve(start_row, rows)
+
+        for i in range(rows):
+            row = self.current_row + i
+            # 항목번호는 첫 행에만 입력 (병합할 것이므로)
+            if i == 0:
+                self._plan.write(row, self.col_num, rec.item_no)
+            self._plan.write(row, self.col_num + 1, rec.label)  # Ø 포함된 문자열
+            self._plan.write(row, self.col_num + 2, rec.upper_tol)
+            self._plan.write(row, self.col_num + 3, rec.lower_tol)
+            self._plan.write(row, self.col_num + 4, rec.lower_calc)  # 하한계산값 (기준 + 하한공차)
+            self._plan.write(row, self.col_num + 5, rec.upper_calc)  # 상한계산값 (기준 + 상한공차)
+            self._plan.write(row, self.col_num + 6, rec.ref)
+
+        # 여러 행이면 항목번호 셀 병합
+        if rows > 1:
+            self._plan.merge(start_row, rows, self.col_num)
+
+        self.current_row += rows
+        return f"[위치도] 항목 {rec.item_no}: {rows}개 행"
+
+    def _batch_reference(self, rec):
+        """참고 값 일괄 입력 - 괄호로 감지, 상한/하한 선택적"""
+        rows = rec.count
+
+        # 공차가 없거나 숫자로 바꿀 수 없으면 공차/계산값 열은 '-'로 표시
+        if rec.upper_tol is not None:
+            tolerance_values = (rec.upper_tol, rec.lower_tol, rec.lower_calc, rec.upper_calc)
+        else:
+            tolerance_values = ('-', '-', '-', '-')
+
+        start_row = self.current_row
+
+        # 기존 병합 해제 구간 등록
+        self._plan.reserve(start_row, rows)
+
+        for i in range(rows):
+            row = self.current_row + i
+
+            # 항목번호는 첫 행에만
+            if i == 0:
+                self._plan.write(row, self.col_num, rec.item_no)
+
+            self._plan.write(row, self.col_num + 1, rec.label)  # 괄호 포함
+            for j, value in enumerate(tolerance_values, 2):
+                self._plan.write(row, self.col_num + j, value)
+            self._plan.write(row, self.col_num + 6, rec.ref)
+
+        # 여러 행이면 항목번호 셀 병합
+        if rows > 1:
+            self._plan.merge(start_row, rows, self.col_num)
+
+        self.current_row += rows
+        return f"[참고] 항목 {rec.item_no}: {rows}개 행"
+
+    def _batch_mmc(self, rec):
+        """MMC 공차 일괄 입력 - 형식: 항목번호, 세트개수, MMC공차, [MAX값]"""
+        num_sets = rec.count
+        mmc_tol = rec.base
+
+        # 총 행 수 = 세트 개수 * 3
+        total_rows = num_sets * 3
+        start_row = self.current_row
+
+        # 기존 병합 해제 구간 등록
+        self._plan.reserve(start_row, total_rows)
+
+        # 각 세트마다 3개 행 생성
+        for set_idx in range(num_sets):
+            base_row = self.current_row + (set_idx * 3)
+
+            # 1행: MMC 기준값 행
+            if set_idx == 0:
+                self._plan.write(base_row, self.col_num, rec.item_no)  # 첫 세트만 항목번호
+            self._plan.write(base_row, self.col_num + 1, rec.label)  # 기준값: 0.2ⓜ
+            self._plan.write(base_row, self.col_num + 2, 0)  # 상한공차 0
+            self._plan.write(base_row, self.col_num + 3, mmc_tol)  # 하한공차 (양수)
+            self._plan.write(base_row, self.col_num + 4, 0)  # 하한계산값
+            self._plan.write(base_row, self.col_num + 5, mmc_tol)  # 상한계산값
+            self._plan.write(base_row, self.col_num + 6, rec.ref)
+
+            # 2행: MAX값 행, REF열에 "MMC 공차"
+            if rec.max_val is not None:
+                self._plan.write(base_row + 1, self.col_num + 1, rec.max_val)
+            for i in range(2, 6):
+                self._plan.write(base_row + 1, self.col_num + i, '-')
+            self._plan.write(base_row + 1, self.col_num + 6, "MMC 공차")
+
+            # 3행: 측정값 입력 빈 칸
+            # 기준값 열만 비우고 나머지는 '-'
+            for i in range(2, 6):
+                self._plan.write(base_row + 2, self.col_num + i, '-')
+            self._plan.write(base_row + 2, self.col_num + 6, rec.ref)
+
+        # 항목번호 셀 병합 (전체 행)
+        self._plan.merge(start_row, total_rows, self.col_num)
+
+        self.current_row += total_rows
+        return f"[MMC] 항목 {rec.item_no}: {num_sets}세트 ({total_rows}개 행)"
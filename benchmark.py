@@ -0,0 +1,256 @@
+"""일괄 입력 파이프라인 벤치마크
+
+가상의 워크북(시트 수, 행 수, 기존 병합 수)과 일괄 입력(줄 수, 유형 구성)을
+만들어 단계별 시간과 최대 메모리를 측정한다.
+
+    python benchmark.py                         # 기본 시나리오 실행
+    python benchmark.py --quick                 # 작은 시나리오로 빠르게 확인
+    python benchmark.py --save-baseline base.json
+    python benchmark.py --baseline base.json    # 기준 대비 느려진 단계가 있으면 종료 코드 1
+
+저장은 zip 압축 수준별(save_store/save_fast/save)로 따로 재고 결과 파일 크기도 표시한다.
+"""
+import argparse
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from openpyxl import Workbook, load_workbook
+
+from batch_plan import merge_items, unmerge_spans, write_cells
+from excel_automation import EasyExcelInput
+from merge_index import MergedRangeIndex
+from save_pipeline import save_workbook
+from xlsx_patch import patch_xlsx
+
+
+STAGES = ['load', 'plan', 'index', 'unmerge', 'write', 'merge', 'save', 'save_fast', 'save_store', 'patch_save']
+
+# 압축 수준별 저장 단계 (save는 기본 압축 - 이전 기준 결과와 비교할 수 있도록 이름 유지)
+SAVE_STAGES = {'save': 'default', 'save_fast': 'fast', 'save_store': 'store'}
+
+# (이름, 시트 수, 기존 행 수, 기존 병합 수, 일괄 입력 줄 수, 유형 구성)
+SCENARIOS = [
+    ('basic',        1,  2000,   500,   500, 'all'),
+    ('many_merges',  1,  5000,  5000,  2000, 'all'),
+    ('multi_sheet',  6,  5000,   500,   500, 'all'),
+    ('long_simple',  1,  1000,   200, 10000, 'simple'),
+    ('long_mmc',     1,  1000,   200,  3000, 'mmc'),
+    ('position_ref', 1,  2000,  1000,  3000, 'position,reference'),
+]
+
+QUICK_SCENARIOS = [
+    ('basic',        1,   300,   100,   100, 'all'),
+    ('many_merges',  1,   800,   800,   300, 'all'),
+    ('multi_sheet',  3,   500,   100,   100, 'all'),
+    ('long_simple',  1,   200,    50,  1000, 'simple'),
+]
+
+LINE_TYPES = ['simple', 'position', 'reference', 'mmc']
+
+
+def make_workbook(sheets, rows, merges, seed=0):
+    """기존 데이터와 병합이 있는 가상 워크북 (xlsx 바이트)"""
+    rng = random.Random(seed)
+    wb = Workbook()
+    for sheet_idx in range(sheets):
+        ws = wb.active if sheet_idx == 0 else wb.create_sheet()
+        ws.title = f"검사{sheet_idx + 1}"
+        for row in range(1, rows + 1):
+            ws.append([row, f"품목{row}", rng.random(), None, None,
+                       row, round(rng.uniform(1, 20), 2), 0.1, -0.1, None, None, "REF"])
+        # 병합 위치: 2행짜리 항목번호 병합과 A:B 머리글 병합을 번갈아 배치
+        for idx in range(merges):
+            row = 5 + (idx // 2) * 2
+            if row + 1 > rows:
+                break
+            if idx % 2 == 0:
+                ws.merge_cells(start_row=row, start_column=6, end_row=row + 1, end_column=6)
+            else:
+                ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=2)
+
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def make_batch(lines, mix, seed=0):
+    """유형 구성에 맞춘 가상 일괄 입력 줄 목록"""
+    rng = random.Random(seed)
+    types = LINE_TYPES if mix == 'all' else mix.split(',')
+    result = []
+    for idx in range(lines):
+        item = idx + 1
+        kind = types[idx % len(types)]
+        base = round(rng.uniform(1, 50), 2)
+        rows = rng.choice([1, 1, 2, 3, 4])
+        if kind == 'simple':
+            result.append(f"{item}, {rows}, {base}, 0.15, 0.1")
+        elif kind == 'position':
+            result.append(f"{item}, {rows}, Ø{base}, 0.15, 0.15")
+        elif kind == 'reference':
+            if idx % 2:
+                result.append(f"{item}, {rows}, ({base})")
+            else:
+                result.append(f"{item}, {rows}, ({base}), 0.15, 0.15, 참고")
+        else:
+            result.append(f"{item}, {rng.choice([1, 2, 3])}, 0.2m, 0.5")
+    return result
+
+
+def run_stages(data, sheet_name, lines, measure, sizes=None):
+    """한 번의 전체 파이프라인 실행 - measure(단계 이름, 함수) 로 각 단계를 감쌈
+
+    sizes를 주면 압축 수준별 결과 파일 크기를 기록한다.
+    """
+    wb = measure('load', lambda: load_workbook(io.BytesIO(data)))
+    ws = wb[sheet_name]
+
+    app = EasyExcelInput()
+    app.wb, app.ws = wb, ws
+    with redirect_stdout(io.StringIO()):
+        plan = measure('plan', lambda: app.plan_batch(lines))
+
+    index = measure('index', lambda: MergedRangeIndex(ws, app.col_num, app.col_num + 6))
+    measure('unmerge', lambda: unmerge_spans(plan, index))
+    measure('write', lambda: write_cells(plan, ws))
+    measure('merge', lambda: merge_items(plan, ws, index))
+    for stage, compression in SAVE_STAGES.items():
+        output = io.BytesIO()
+        measure(stage, lambda: save_workbook(wb, output, compression))
+        if sizes is not None:
+            sizes[compression] = output.getbuffer().nbytes
+    measure('patch_save', lambda: patch_xlsx(io.BytesIO(data), io.BytesIO(), sheet_name, [plan]))
+    return plan
+
+
+def bench_scenario(scenario, repeat):
+    name, sheets, rows, merges, lines, mix = scenario
+    data = make_workbook(sheets, rows, merges)
+    batch = make_batch(lines, mix)
+    sheet_name = "검사1"
+
+    # 시간: 여러 번 실행해서 단계별 최솟값
+    timings = {stage: float('inf') for stage in STAGES}
+
+    def timed(stage, func):
+        start = time.perf_counter()
+        value = func()
+        timings[stage] = min(timings[stage], time.perf_counter() - start)
+        return value
+
+    sizes = {}
+    for _ in range(repeat):
+        plan = run_stages(data, sheet_name, batch, timed, sizes)
+
+    # 메모리: tracemalloc은 실행을 느리게 하므로 따로 한 번만 측정
+    peaks = {}
+
+    def traced(stage, func):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        value = func()
+        peaks[stage] = tracemalloc.get_traced_memory()[1] - before
+        return value
+
+    tracemalloc.start()
+    try:
+        run_stages(data, sheet_name, batch, traced)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'params': {'sheets': sheets, 'rows': rows, 'merges': merges,
+                   'lines': lines, 'mix': mix, 'file_bytes': len(data)},
+        'cells': len(plan),
+        'timings': timings,
+        'peak_bytes': peaks,
+        'save_bytes': sizes,
+    }
+
+
+def print_report(results, baseline=None):
+    header = f"{'시나리오':<14}" + ''.join(f"{stage:>11}" for stage in STAGES)
+    print(header)
+    print('-' * len(header))
+    for name, result in results.items():
+        print(f"{name:<14}" + ''.join(f"{result['timings'][stage] * 1000:>9.1f}ms"
+                                      for stage in STAGES))
+        print(f"{'  peak':<14}" + ''.join(f"{result['peak_bytes'][stage] / 1048576:>9.1f}MB"
+                                        for stage in STAGES))
+        sizes = result.get('save_bytes', {})
+        print(f"{'  file':<14}" + ''.join(
+            f"{sizes[SAVE_STAGES[stage]] / 1048576:>9.2f}MB" if stage in SAVE_STAGES else f"{'':>11}"
+            for stage in STAGES))
+        if baseline and name in baseline:
+            base = baseline[name]['timings']
+            print(f"{'  vs base':<14}" + ''.join(
+                f"{(result['timings'][stage] / base[stage] - 1) * 100:>+10.0f}%"
+                if base.get(stage) else f"{'-':>11}" for stage in STAGES))
+
+
+def find_regressions(results, baseline, tolerance, min_delta=0.005):
+    """기준보다 tolerance 비율 이상(그리고 min_delta초 이상) 느려진 단계 목록"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for stage in STAGES:
+            base = baseline[name]['timings'].get(stage)
+            now = result['timings'][stage]
+            if base and now > base * (1 + tolerance) and now - base > min_delta:
+                regressions.append((name, stage, base, now))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="일괄 입력 파이프라인 벤치마크")
+    parser.add_argument('--quick', action='store_true', help="작은 시나리오로 빠르게 실행")
+    parser.add_argument('--only', help="실행할 시나리오 이름 (쉼표로 구분)")
+    parser.add_argument('--repeat', type=int, default=3, help="시나리오별 반복 횟수 (기본: 3)")
+    parser.add_argument('--json', help="결과를 JSON으로 저장할 경로")
+    parser.add_argument('--baseline', help="비교할 기준 결과 JSON")
+    parser.add_argument('--save-baseline', help="이번 결과를 기준으로 저장할 경로")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="허용 오차 비율 (기본: 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    scenarios = QUICK_SCENARIOS if args.quick else SCENARIOS
+    if args.only:
+        names = set(args.only.split(','))
+        scenarios = [s for s in scenarios if s[0] in names]
+
+    results = {}
+    for scenario in scenarios:
+        print(f"▶ {scenario[0]} ...", file=sys.stderr)
+        results[scenario[0]] = bench_scenario(scenario, args.repeat)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_report(results, baseline)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("\n❌ 성능 저하 감지:")
+            for name, stage, base, now in regressions:
+                print(f"  {name}/{stage}: {base * 1000:.1f}ms → {now * 1000:.1f}ms")
+            return 1
+        print("\n✓ 기준 대비 성능 저하 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
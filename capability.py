@@ -0,0 +1,264 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import column_index_from_string
+
+from instrumentation import NULL_PROFILER
+from item_index import ItemIndex
+from measurements import JUDGE_LABELS, SAMPLE_OFFSET, judge, spec_rows, to_float
+
+
+# 요약 시트 이름과 열 (머리글, 숫자 서식)
+CAPABILITY_SHEET = "공정능력"
+SUMMARY_COLUMNS = [
+    ("항목번호", None),
+    ("순번", None),
+    ("기준값", None),
+    ("하한 (LSL)", '0.000'),
+    ("상한 (USL)", '0.000'),
+    ("측정 수", '0'),
+    ("평균", '0.0000'),
+    ("표준편차", '0.0000'),
+    ("Cp", '0.00'),
+    ("Cpk", '0.00'),
+    ("규격 밖", '0'),
+    ("로트 수", '0'),
+]
+
+# 이 값보다 Cpk가 낮은 특성은 요약에서 따로 표시
+CPK_TARGET = 1.33
+
+_JUDGE_VALUES = set(JUDGE_LABELS.values())
+
+
+def row_samples(ws, row, sample_col, judge_col=None):
+    """측정 행의 측정값 목록 (judge_col 전까지, 없으면 판정 값(OK/NG)이나 행 끝까지)"""
+    get = ws._cells.get
+    end_col = judge_col or ws.max_column + 1
+    values = []
+    for col in range(sample_col, end_col):
+        cell = get((row, col))
+        if cell is None or cell.value is None:
+            continue
+        if judge_col is None and cell.value in _JUDGE_VALUES:
+            break
+        value = to_float(cell.value)
+        if value == value:  # nan 제외
+            values.append(value)
+    return values
+
+
+def lot_statistics(ws, col, sample_col=None, judge_col=None):
+    """시트 하나의 특성별 규격과 표본 통계 (로트 사이에 합칠 수 있는 형태)
+
+    특성은 (항목번호, 항목 안의 측정 행 순번)이고, 측정값이 없는 특성은 뺀다.
+    반환 dict: keys, labels, lower, upper, n, mean, m2(편차 제곱합), out(규격 밖 개수)
+    """
+    sample_col = sample_col or col + SAMPLE_OFFSET
+    index = ItemIndex(ws, col)
+
+    keys = []
+    labels = []
+    lower = []
+    upper = []
+    samples = []
+    get = ws._cells.get
+    for start_row, num_rows, item_no in index.blocks():
+        for point, (row, row_lower, row_upper) in enumerate(spec_rows(ws, col, start_row, num_rows), 1):
+            values = row_samples(ws, row, sample_col, judge_col)
+            if not values:
+                continue
+            label = get((row, col + 1))
+            if label is None or label.value is None:
+                label = get((row - 2, col + 1))  # MMC 측정값 행의 기준값은 세트 첫 행에 있음
+            keys.append((item_no, point))
+            labels.append(label.value if label is not None else None)
+            lower.append(row_lower)
+            upper.append(row_upper)
+            samples.append(values)
+
+    width = max((len(values) for values in samples), default=0)
+    matrix = np.full((len(samples), width), np.nan)
+    for i, values in enumerate(samples):
+        matrix[i, :len(values)] = values
+
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    measured = ~np.isnan(matrix)
+    n = measured.sum(axis=1)
+    mean = np.nansum(matrix, axis=1) / np.maximum(n, 1)
+    m2 = np.nansum((matrix - mean[:, None]) ** 2, axis=1)
+    _, out = judge(matrix, lower, upper)
+    return {
+        'keys': keys,
+        'labels': labels,
+        'lower': lower,
+        'upper': upper,
+        'n': n,
+        'mean': mean,
+        'm2': m2,
+        'out': out.sum(axis=1),
+    }
+
+
+def combine(lots):
+    """여러 로트의 특성별 통계를 합침 (합동 분산: 편차 제곱합 + 로트 평균 차이)
+
+    규격과 기준값은 그 특성이 처음 나온 로트의 값을 쓴다.
+    """
+    positions = {}
+    keys = []
+    labels = []
+    lower = []
+    upper = []
+    groups = []
+    for lot in lots:
+        for key, label, row_lower, row_upper in zip(lot['keys'], lot['labels'], lot['lower'], lot['upper']):
+            position = positions.get(key)
+            if position is None:
+                position = positions[key] = len(keys)
+                keys.append(key)
+                labels.append(label)
+                lower.append(row_lower)
+                upper.append(row_upper)
+            groups.append(position)
+
+    groups = np.asarray(groups, dtype=np.intp)
+    size = len(keys)
+
+    def column(name):
+        return np.concatenate([lot[name] for lot in lots]).astype(float) if lots else np.zeros(0)
+
+    def total(values):
+        return np.bincount(groups, weights=values, minlength=size)
+
+    lot_n = column('n')
+    lot_mean = column('mean')
+    n = total(lot_n)
+    mean = total(lot_n * lot_mean) / np.maximum(n, 1)
+    m2 = total(column('m2')) + total(lot_n * (lot_mean - mean[groups]) ** 2)
+    return {
+        'keys': keys,
+        'labels': labels,
+        'lower': np.asarray(lower, dtype=float),
+        'upper': np.asarray(upper, dtype=float),
+        'n': n,
+        'mean': mean,
+        'm2': m2,
+        'out': total(column('out')),
+        'lots': np.bincount(groups, minlength=size),
+    }
+
+
+def capability(stats):
+    """합친 통계에서 표준편차(표본), Cp, Cpk 계산 - 특성별 배열 dict
+
+    한쪽 규격만 있으면 Cp는 nan이고 Cpk는 있는 쪽으로만 계산한다.
+    측정 수가 2 미만이거나 표준편차가 0이면 Cp/Cpk는 nan.
+    """
+    n = stats['n']
+    lower = stats['lower']
+    upper = stats['upper']
+    mean = stats['mean']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.where(n > 1, np.sqrt(stats['m2'] / (n - 1)), np.nan)
+        valid = sigma > 0
+        cp = np.where(valid, (upper - lower) / (6 * sigma), np.nan)
+        cpu = np.where(valid, (upper - mean) / (3 * sigma), np.nan)
+        cpl = np.where(valid, (mean - lower) / (3 * sigma), np.nan)
+    return {
+        'sigma': sigma,
+        'cp': cp,
+        'cpk': np.fmin(cpu, cpl),
+    }
+
+
+def summary_rows(stats):
+    """요약 시트에 쓸 행 목록 (SUMMARY_COLUMNS 순서, nan은 None)"""
+    result = capability(stats)
+
+    def number(value):
+        return None if value != value else float(value)
+
+    rows = []
+    for i, (item_no, point) in enumerate(stats['keys']):
+        rows.append([
+            item_no, point, stats['labels'][i],
+            number(stats['lower'][i]), number(stats['upper'][i]),
+            int(stats['n'][i]), number(stats['mean'][i]), number(result['sigma'][i]),
+            number(result['cp'][i]), number(result['cpk'][i]),
+            int(stats['out'][i]), int(stats['lots'][i]),
+        ])
+    return rows
+
+
+def write_summary(dest, rows, sheet_name=CAPABILITY_SHEET):
+    """요약 행을 새 워크북(쓰기 전용)에 저장"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append([header for header, _ in SUMMARY_COLUMNS])
+    for row in rows:
+        cells = []
+        for value, (_, number_format) in zip(row, SUMMARY_COLUMNS):
+            cell = WriteOnlyCell(ws, value)
+            if number_format and value is not None:
+                cell.number_format = number_format
+            cells.append(cell)
+        ws.append(cells)
+    wb.save(dest)
+
+
+def read_lot(task):
+    """워크북 한 개의 특성별 통계 (프로세스 풀 작업 단위) - 실패해도 예외 대신 오류 반환
+
+    task['workbook']에 이미 불러온 워크북을 주면 파일을 읽지 않는다 (같은 프로세스에서 읽을 때만).
+    """
+    source = task.get('file')
+    try:
+        wb = task.get('workbook') or load_workbook(source, data_only=True)
+        sheet_name = task.get('sheet') or wb.active.title
+        if sheet_name not in wb.sheetnames:
+            if not task.get('fallback_active'):
+                raise ValueError(f"'{sheet_name}' 시트를 찾을 수 없습니다.")
+            sheet_name = wb.active.title
+        col = column_index_from_string(task.get('start_col') or 'F')
+        sample_col = column_index_from_string(task['sample_col']) if task.get('sample_col') else None
+        judge_col = column_index_from_string(task['judge_col']) if task.get('judge_col') else None
+        stats = lot_statistics(wb[sheet_name], col, sample_col, judge_col)
+        return {'file': task.get('name', source), 'sheet': sheet_name,
+                'characteristics': len(stats['keys']), 'stats': stats}
+    except Exception as e:
+        return {'file': task.get('name', source), 'error': str(e)}
+
+
+def run_capability(tasks, jobs=None, profiler=NULL_PROFILER):
+    """여러 로트(워크북)의 측정값을 프로세스 풀에서 읽어 합친 공정능력 - (요약 행, 로트별 결과)
+
+    tasks는 read_lot() 작업 dict 목록 (file 또는 workbook, [name], sheet, [fallback_active], start_col,
+    sample_col, judge_col).
+    fallback_active가 참이면 sheet가 없는 파일은 활성 시트를 읽는다.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(tasks)))
+
+    with profiler.stage('load'):
+        if jobs == 1:
+            lots = [read_lot(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                lots = list(pool.map(read_lot, tasks))
+
+    with profiler.stage('judge'):
+        rows = summary_rows(combine([lot['stats'] for lot in lots if 'stats' in lot]))
+    for lot in lots:
+        lot.pop('stats', None)
+    return rows, lots
+
+
+def low_capability(rows, target=CPK_TARGET):
+    """Cpk가 목표보다 낮은 특성 [(항목번호, 순번, Cpk)]"""
+    return [(row[0], row[1], round(row[9], 3)) for row in rows
+            if row[9] is not None and row[9] < target]
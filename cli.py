@@ -0,0 +1,310 @@
+"""엑셀 측정 데이터 일괄 입력 - 비대화형(명령줄) 모드
+
+    python cli.py 성적서.xlsx --batch 입력.txt [--sheet 검사성적서] [--start F5]
+
+대화형 입력은 excel_automation.py에 있고, 여기서는 EasyExcelInput을 불러서
+파일 여러 개를 처리하고 종료 코드/요약만 돌려줌.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+from openpyxl.utils.cell import coordinate_from_string
+
+from batch_check import BatchCheckError
+from capability import low_capability, run_capability, write_summary
+from excel_automation import EasyExcelInput
+from instrumentation import StageProfiler
+from measurements import MAX_SAMPLES
+from save_pipeline import COMPRESSION_LEVELS, DEFAULT_COMPRESSION
+from table_import import iter_table_lines, parse_mapping, read_table_lines
+
+
+def read_batch_lines(source):
+    """일괄 입력 파일(또는 '-'이면 표준 입력)에서 빈 줄을 뺀 줄 목록"""
+    if source == '-':
+        text = sys.stdin.read()
+    else:
+        with open(source, encoding='utf-8-sig') as f:
+            text = f.read()
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def find_workbooks(patterns):
+    """파일 경로/폴더/와일드카드 목록을 엑셀 파일 목록으로 펼침"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = sorted(glob.glob(os.path.join(pattern, '*')))
+        else:
+            candidates = sorted(glob.glob(pattern)) or [pattern]
+        for path in candidates:
+            name = os.path.basename(path)
+            # Excel 임시 파일(~$...) 제외
+            if name.startswith('~$'):
+                continue
+            if os.path.isdir(pattern) and not name.lower().endswith(('.xlsx', '.xlsm')):
+                continue
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def process_workbook(task):
+    """워크북 한 개 처리 (프로세스 풀 작업 단위) - 실패해도 예외 대신 요약 반환"""
+    file_path = task['file']
+    output = io.StringIO()
+    try:
+        if task.get('new') and not file_path.lower().endswith('.xlsx'):
+            raise ValueError("새 성적서는 .xlsx 파일로만 만들 수 있습니다.")
+        if not file_path.lower().endswith(('.xlsx', '.xlsm')):
+            raise ValueError("Excel 파일(.xlsx, .xlsm)만 사용 가능합니다.")
+        app = EasyExcelInput()
+        app.upsert = bool(task.get('upsert'))
+        app.on_conflict = task.get('on_conflict', 'abort')
+        app.on_error = task.get('on_error', 'abort')
+        app.compression = task.get('compression') or DEFAULT_COMPRESSION
+        app.low_memory = bool(task.get('low_memory'))
+        if task.get('profile'):
+            app.profiler = StageProfiler().start()
+        # 표 파일은 작업 프로세스에서 열어 한 행씩 읽음 (제너레이터는 프로세스 사이로 넘길 수 없음)
+        lines = read_table_lines(task['table'], task.get('columns')) if task.get('table') else task['lines']
+        with redirect_stdout(output):
+            if task.get('measure'):
+                summary = app.run_measurements(file_path, lines, sheet_name=task['sheet'],
+                                               start_col=task['start_col'], sample_col=task.get('sample_col'),
+                                               judge_col=task.get('judge_col'), output_path=task['output'])
+            elif task.get('new'):
+                summary = app.run_new_report(file_path, lines, sheet_name=task['sheet'],
+                                             start_col=task['start_col'], start_row=task['start_row'])
+            else:
+                summary = app.run_batch(file_path, lines, sheet_name=task['sheet'],
+                                        start_col=task['start_col'], start_row=task['start_row'],
+                                        output_path=task['output'])
+        summary['status'] = 0 if summary['failed'] == 0 and not summary.get('skipped') else 1
+        if app.profiler.enabled:
+            app.profiler.stop()
+            summary['profile'] = app.profiler.report()
+            summary['profile_text'] = app.profiler.format_lines()
+    except BatchCheckError as e:
+        # 사전 검사에서 중단한 경우는 오류 줄 전체를 요약에 넣음 (파일은 바뀌지 않음)
+        summary = {'file': file_path, 'error': str(e), 'status': 2,
+                   'errors': [{'sheet': sheet, 'line': line_no, 'text': line, 'message': msg}
+                              for sheet, line_no, line, msg in e.errors]}
+    except Exception as e:
+        summary = {'file': file_path, 'error': str(e), 'status': 2}
+    summary['log'] = output.getvalue().splitlines()
+    return summary
+
+
+def run_workbooks(tasks, jobs=None):
+    """여러 워크북을 프로세스 풀에서 나눠 처리하고 결과를 하나의 보고서로 모음"""
+    jobs = jobs or os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(tasks)))
+
+    if jobs == 1:
+        results = [process_workbook(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(process_workbook, tasks))
+
+    statuses = [result['status'] for result in results]
+    if 2 in statuses:
+        status = 2
+    elif 1 in statuses:
+        status = 1
+    else:
+        status = 0
+
+    return {
+        'total': len(results),
+        'succeeded': statuses.count(0),
+        'partial': statuses.count(1),
+        'failed': statuses.count(2),
+        'jobs': jobs,
+        'files': results,
+        'status': status,
+    }
+
+
+def capability_report(files, output_path, sheet_name=None, start_col='F',
+                      sample_col=None, judge_col=None, jobs=None):
+    """여러 로트(워크북)의 측정값으로 공정능력 요약 워크북 저장 - 요약 dict 반환
+
+    로트는 프로세스 풀에서 나눠 읽고, 특성별 통계를 합쳐서 Cp/Cpk를 계산한다.
+    """
+    tasks = [{'file': path, 'sheet': sheet_name, 'start_col': start_col,
+              'sample_col': sample_col, 'judge_col': judge_col} for path in files]
+    rows, lots = run_capability(tasks, jobs)
+    write_summary(output_path, rows)
+
+    failed = sum(1 for lot in lots if 'error' in lot)
+    if failed == len(lots):
+        status = 2
+    elif failed:
+        status = 1
+    else:
+        status = 0
+    return {
+        'output': output_path,
+        'total': len(lots),
+        'failed': failed,
+        'characteristics': len(rows),
+        'low_cpk': [{'item': item_no, 'point': point, 'cpk': cpk}
+                    for item_no, point, cpk in low_capability(rows)],
+        'files': lots,
+        'status': status,
+    }
+
+
+def main(argv=None):
+    """비대화형 일괄 입력 (종료 코드: 0 성공, 1 일부 줄 실패, 2 실행 실패)"""
+    parser = argparse.ArgumentParser(
+        description="엑셀 측정 데이터 일괄 입력 (비대화형 모드)")
+    parser.add_argument('files', nargs='+', metavar='file',
+                        help="엑셀 파일 경로 (.xlsx, .xlsm), 폴더 또는 와일드카드 (예: lots/*.xlsx)")
+    parser.add_argument('--sheet', help="대상 시트 이름 (기본: 활성 시트, 새 성적서는 '검사성적서')")
+    parser.add_argument('--new', action='store_true',
+                        help="템플릿 없이 새 성적서 생성 (file은 만들 파일 경로, 행 단위 스트리밍 저장)")
+    parser.add_argument('--start', default='F',
+                        help="시작 셀 (예: F5) - 열만 주면 그 열 입력 영역의 첫 빈 행부터 (기본: F)")
+    parser.add_argument('--batch', default='-',
+                        help="일괄 입력 파일 경로, '-'이면 표준 입력 (기본: -) - "
+                             "[시트이름] 또는 [시트이름!F12] 줄로 여러 시트에 나눠 입력 가능")
+    parser.add_argument('--table',
+                        help="일괄 입력 대신 CSV/TSV 표 파일 (CAD 풍선 목록 등, 한 행씩 읽어서 처리)")
+    parser.add_argument('--columns',
+                        help="--table 열 지정 (예: item=Balloon,count=Qty,base=Nominal,upper=+Tol,lower=-Tol,"
+                             "ref=Remark,type=Type - 기본: 머리글 이름으로 자동 인식)")
+    parser.add_argument('--spec-dir',
+                        help="파일별 일괄 입력 폴더 (<파일이름>.txt 또는 표 <파일이름>.csv/.tsv가 있으면 --batch 대신 사용)")
+    parser.add_argument('--output', help="저장할 경로 (파일 1개일 때, 기본: 원본 파일에 저장)")
+    parser.add_argument('--output-dir', help="여러 파일 처리 시 결과를 저장할 폴더 (기본: 원본에 저장)")
+    parser.add_argument('--jobs', type=int, help="동시에 처리할 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument('--summary', help="처리 결과 요약(JSON)을 저장할 경로 (기본: 표준 출력)")
+    parser.add_argument('--upsert', action='store_true',
+                        help="시트에 있는 항목번호는 그 자리에 다시 입력하고, 없는 항목은 번호 순서 자리에 삽입 "
+                             "(행을 옮겨야 하는데 그 아래에 수식/조건부 서식 등 참조가 있으면 그 줄은 오류)")
+    parser.add_argument('--on-conflict', choices=['abort', 'skip', 'force'], default='abort',
+                        help="입력할 행에 기존 값/병합이 있을 때: abort 중단(기본), skip 그 줄만 건너뛰기, force 덮어쓰기")
+    parser.add_argument('--on-error', choices=['abort', 'skip'], default='abort',
+                        help="형식 오류 줄(유형/숫자/행 개수/시트 범위)이 있을 때: abort 아무것도 입력하지 않고 중단(기본), "
+                             "skip 오류 줄만 건너뛰기")
+    parser.add_argument('--measure', action='store_true',
+                        help="일괄 입력 대신 측정값(항목번호, 측정값1, 측정값2, ...)을 규격 행 옆에 쓰고 OK/NG 판정")
+    parser.add_argument('--capability', metavar='OUTPUT',
+                        help="파일들의 측정값으로 특성별 평균/표준편차/Cp/Cpk를 계산해 요약 워크북으로 저장")
+    parser.add_argument('--sample-col', help="--measure/--capability 측정값 시작 열 (기본: 입력 영역 다음 열, 예: M)")
+    parser.add_argument('--judge-col', help=f"--measure/--capability 판정(OK/NG) 열 "
+                             f"(기본: 측정값 시작 열에서 {MAX_SAMPLES}열 뒤 - 측정값 개수와 관계없이 같은 열)")
+    parser.add_argument('--compression', choices=list(COMPRESSION_LEVELS), default=DEFAULT_COMPRESSION,
+                        help="저장 zip 압축 수준: store 압축 안 함(가장 빠름), fast 빠른 압축, default 기본 (기본값) "
+                             "- 요약의 save_seconds로 비교")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="저메모리 모드: 워크북을 불러오지 않고 대상 시트 XML만 조각씩 고쳐 저장 "
+                             "(빠른 저장이 안 되는 입력은 전체 저장 대신 오류, --upsert/--measure/--capability 사용 불가)")
+    parser.add_argument('--profile', action='store_true',
+                        help="단계별 시간/메모리를 측정해서 요약에 포함 (표준 오류에도 출력)")
+    args = parser.parse_args(argv)
+
+    try:
+        start = args.start.upper()
+        if start.isalpha():
+            start_col, start_row = start, None
+        else:
+            start_col, start_row = coordinate_from_string(start)
+        if args.new:
+            if args.output or args.output_dir:
+                raise ValueError("--new에서는 file이 곧 저장 경로입니다. (--output/--output-dir 사용 불가)")
+            if args.upsert:
+                raise ValueError("--new에는 교체할 기존 항목이 없으므로 --upsert를 쓸 수 없습니다.")
+            if args.measure or args.capability:
+                raise ValueError("--new에는 측정값이 없으므로 --measure/--capability를 쓸 수 없습니다.")
+            files = args.files
+        else:
+            files = find_workbooks(args.files)
+        if not files:
+            raise ValueError("처리할 엑셀 파일이 없습니다.")
+        if args.output and len(files) > 1:
+            raise ValueError("여러 파일을 처리할 때는 --output 대신 --output-dir을 사용하세요.")
+
+        if args.low_memory and (args.upsert or args.measure or args.capability):
+            raise ValueError("--low-memory에서는 --upsert/--measure/--capability를 쓸 수 없습니다. "
+                             "(시트 전체를 불러와야 하는 기능)")
+        if args.table and args.measure:
+            raise ValueError("--measure의 측정값 파일은 --batch로 지정하세요. (CSV도 읽을 수 있음)")
+        mapping = parse_mapping(args.columns)
+
+        if args.capability:
+            summary = capability_report(files, args.capability, args.sheet, start_col,
+                                        args.sample_col, args.judge_col, args.jobs)
+        else:
+            default_lines = None
+            tasks = []
+            for path in files:
+                stem = os.path.splitext(os.path.basename(path))[0]
+                lines = table = None
+                spec_paths = [os.path.join(args.spec_dir, stem + ext) for ext in ('.txt', '.csv', '.tsv')
+                              if args.spec_dir and os.path.exists(os.path.join(args.spec_dir, stem + ext))]
+                if spec_paths and spec_paths[0].endswith('.txt'):
+                    lines = read_batch_lines(spec_paths[0])
+                elif spec_paths:
+                    table = spec_paths[0]
+                elif args.table and args.table != '-':
+                    table = args.table
+                else:
+                    # 표준 입력은 한 번만 읽어서 모든 파일에 공유
+                    if default_lines is None:
+                        if args.table:
+                            default_lines = list(iter_table_lines(sys.stdin, mapping))
+                        else:
+                            default_lines = read_batch_lines(args.batch)
+                    lines = default_lines
+
+                if args.output_dir:
+                    output = os.path.join(args.output_dir, os.path.basename(path))
+                else:
+                    output = args.output
+                tasks.append({'file': path, 'lines': lines, 'table': table, 'columns': mapping, 'sheet': args.sheet,
+                              'start_col': start_col, 'start_row': start_row, 'output': output,
+                              'profile': args.profile, 'new': args.new, 'upsert': args.upsert,
+                              'on_conflict': args.on_conflict, 'on_error': args.on_error,
+                              'measure': args.measure,
+                              'compression': args.compression, 'low_memory': args.low_memory,
+                              'sample_col': args.sample_col, 'judge_col': args.judge_col})
+
+            if args.output_dir:
+                os.makedirs(args.output_dir, exist_ok=True)
+
+            if len(tasks) == 1:
+                summary = process_workbook(tasks[0])
+                # 줄별 처리 메시지는 표준 오류로 보내고 표준 출력은 요약 전용으로 사용
+                for line in summary.pop('log'):
+                    print(line, file=sys.stderr)
+                for line in summary.pop('profile_text', []):
+                    print(f"  ⏱ {line}", file=sys.stderr)
+            else:
+                summary = run_workbooks(tasks, args.jobs)
+                for result in summary['files']:
+                    result.pop('profile_text', None)
+        status = summary['status']
+    except Exception as e:
+        summary = {'files': args.files, 'error': str(e), 'status': 2}
+        status = 2
+
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,66 @@
 from openpyxl import load_workbook
-from openpyxl.utils import column_index_from_string
-from openpyxl.styles import Alignment
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
 import os
 import re
-
-class EasyExcelInput:
+import sys
+import tempfile
+import threading
+import time
+
+from batch_check import BatchCheckError
+from batch_plan import BatchPlan, apply_plan, find_conflicts, occupied_cells, target_rows, write_cells
+from batch_planner import BatchPlanner
+from capability import combine, lot_statistics, low_capability, summary_rows, write_summary
+from instrumentation import NULL_PROFILER, StageProfiler
+from item_index import next_free_row
+from journal import AutoSaver, EditJournal
+from line_parser import cache_stats, format_cache_stats
+from measurements import MAX_SAMPLES, SAMPLE_OFFSET, plan_measurements
+from merge_index import MergedRangeIndex
+from report_writer import write_report
+from save_pipeline import (COMPRESSION_LABELS, COMPRESSION_LEVELS, DEFAULT_COMPRESSION, BackgroundSave,
+                           format_save, save_workbook)
+from sheet_sections import check_sheets, is_single, split_sections
+from table_import import iter_table_lines, parse_mapping, read_table_lines
+from xlsx_patch import XlsxPatchError, list_sheets, patch_sheets, scan_free_row, scan_occupied
+
+# 이보다 큰 파일은 대화형 실행에서 저메모리 모드로 열지 물어봄
+LOW_MEMORY_SIZE = 50 * 1048576
+
+class EasyExcelInput(BatchPlanner):
     def __init__(self):
+        super().__init__()
         self.wb = None
-        self.ws = None
-        self.current_row = 5
-        self.start_col = 'F'
-        self.col_num = 6
+        self.sheet_names = []
+        self.active_sheet = None
+        # 저메모리 모드 - 워크북을 불러오지 않고 입력 계획만 모았다가 저장할 때 시트 XML을 조각씩 고침
+        self.low_memory = False
         self.file_path = None
+        # 마지막 저장 이후 적용한 일괄 입력 계획 (시트 이름, 계획) - 빠른 저장용
+        self._pending_plans = []
+        # 일괄 입력 외의 방법으로 시트를 직접 수정했는지 여부
+        self._direct_edits = False
+        # (시트 이름, 시작 열) -> 입력 영역의 첫 빈 행 (입력할 때마다 비움)
+        self._free_rows = {}
+        # 일괄 입력이 기존 값/병합과 겹칠 때: None(물어봄) | 'abort' | 'skip' | 'force'
+        self.on_conflict = None
+        # 사전 검사에서 형식 오류 줄이 나왔을 때: None(물어봄) | 'abort' | 'skip'
+        self.on_error = None
+        # 저장 전 입력 기록 (대화형 실행에서만 사용) 과 기록 후 아직 저장하지 않은 입력 수
+        self.journal = None
+        self._journaled = 0
+        # 입력/저장과 자동 저장 스레드가 워크북을 동시에 건드리지 않도록 잠금
+        self._lock = threading.RLock()
+        # 저장끼리 겹치지 않도록 잠금 (빠른 저장은 _lock 밖에서 파일을 쓰므로 따로 둠)
+        self._save_lock = threading.Lock()
+        self._autosaver = None
+        # 저장 zip 압축 수준 (메뉴 z 또는 --compression) 과 백그라운드 저장 (메뉴 7)
+        self.compression = DEFAULT_COMPRESSION
+        self._saving = None
+        self.last_save = None
+        self.save_seconds = None
+        self.last_autosave = None
     
     def run(self):
         print("=" * 60)
@@ -21,11 +70,14 @@ class EasyExcelInput:
         # 1. 파일 선택
         self.select_file()
         
-        # 2. 시트 선택 추가
-        self.select_sheet()
+        # 2. 지난번에 저장하지 못한 입력이 있으면 복구, 없으면 시트 선택/초기 설정
+        self.journal = EditJournal(self.file_path)
+        if not self.recover_journal():
+            self.select_sheet()
+            self.initialize()
         
-        # 3. 초기 설정
-        self.initialize()
+        # 3. 자동 저장 시작
+        self._autosaver = AutoSaver(self.autosave).start()
         
         # 4. 메인 루프
         while True:
@@ -42,18 +94,37 @@ class EasyExcelInput:
                 self.input_mmc()
             elif choice == '5':
                 self.input_batch()
+            elif choice == 't':
+                self.input_table()
+            elif choice in ('m', 'c', 'u') and self.low_memory:
+                print("\n❌ 저메모리 모드에서는 사용할 수 없습니다. (시트 전체를 불러와야 하는 기능)")
+            elif choice == 'm':
+                self.input_measurements()
+            elif choice == 'c':
+                self.show_capability()
             elif choice == '6':
+                self._autosaver.stop()
                 self.save_and_exit()
                 break
             elif choice == '7':
-                self.save_file()
+                self.save_file(background=True)
             elif choice == '8':
                 self.show_position()
             elif choice == '9':
                 self.change_position()
             elif choice == 's':
                 self.change_sheet()
+            elif choice == 'p':
+                self.toggle_profiler()
+            elif choice == 'u':
+                self.toggle_upsert()
+            elif choice == 'z':
+                self.change_compression()
             elif choice == '0':
+                self._autosaver.stop()
+                self.wait_save()
+                with self._lock:
+                    self.journal.discard()
                 print("\n종료합니다.")
                 break
             else:
@@ -85,8 +156,7 @@ class EasyExcelInput:
                     
                     # 파일 열기 (시트 목록 확인용)
                     try:
-                        self.wb = load_workbook(cleaned_path)
-                        print(f"✓ 파일 로드 완료 (시트 {len(self.wb.sheetnames)}개 발견)")
+                        self._open_workbook(cleaned_path)
                     except Exception as e:
                         print(f"❌ 파일 열기 실패: {e}")
                         print("   파일이 손상되었거나 다른 프로그램에서 사용 중일 수 있습니다.\n")
@@ -102,8 +172,7 @@ class EasyExcelInput:
                     print(f"✓ 파일 선택 완료: {os.path.basename(alt_path)}\n")
                     
                     try:
-                        self.wb = load_workbook(alt_path)
-                        print(f"✓ 파일 로드 완료 (시트 {len(self.wb.sheetnames)}개 발견)")
+                        self._open_workbook(alt_path)
                     except Exception as e:
                         print(f"❌ 파일 열기 실패: {e}\n")
                         continue
@@ -122,16 +191,38 @@ class EasyExcelInput:
                     print("프로그램을 종료합니다.")
                     exit(0)
     
+    def _open_workbook(self, path):
+        """워크북 열기 - 큰 파일은 저메모리 모드(시트 목록만 읽고 입력은 저장할 때 시트 XML에 바로 씀)를 권함"""
+        size = os.path.getsize(path)
+        if size >= LOW_MEMORY_SIZE:
+            print(f"⚠ 큰 파일입니다 ({size / 1048576:.0f} MB). 전체를 불러오면 메모리를 많이 씁니다.")
+            print("  저메모리 모드: 시트 목록만 읽고, 입력은 모아 두었다가 저장할 때 대상 시트만 조각씩 고쳐 씀")
+            print("  (측정값 판정, 공정능력 계산, 항목 교체는 사용할 수 없음)")
+            self.low_memory = input("저메모리 모드로 열까요? (y/n, 기본값: y): ").strip().lower() != 'n'
+        if self.low_memory:
+            self.wb = None
+            self.sheet_names, self.active_sheet = list_sheets(path)
+            print(f"✓ 시트 목록 확인 완료 (시트 {len(self.sheet_names)}개 발견, 저메모리 모드)")
+        else:
+            self.wb = load_workbook(path)
+            self.sheet_names, self.active_sheet = self.wb.sheetnames, self.wb.active.title
+            print(f"✓ 파일 로드 완료 (시트 {len(self.wb.sheetnames)}개 발견)")
+
+    def _use_sheet(self, sheet_name):
+        """작업 시트 변경 (저메모리 모드에서는 워크북 없이 시트 이름만 바꿈)"""
+        self.sheet_name = sheet_name
+        self.ws = self.wb[sheet_name] if self.wb is not None else None
+
     def select_sheet(self):
         """시트 선택"""
         print("\n" + "=" * 60)
         print("📊 시트 선택")
         print("=" * 60)
         
-        sheet_names = self.wb.sheetnames
+        sheet_names = self.sheet_names
         
         if len(sheet_names) == 1:
-            self.ws = self.wb[sheet_names[0]]
+            self._use_sheet(sheet_names[0])
             print(f"✓ 시트가 1개만 있어 자동 선택: '{sheet_names[0]}'")
             return
         
@@ -140,7 +231,7 @@ class EasyExcelInput:
         print("-" * 60)
         for i, name in enumerate(sheet_names, 1):
             # 활성 시트 표시
-            is_active = "⭐ (현재 활성)" if self.wb.active == self.wb[name] else ""
+            is_active = "⭐ (현재 활성)" if name == self.active_sheet else ""
             print(f"{i}. {name} {is_active}")
         print("-" * 60)
         
@@ -150,24 +241,24 @@ class EasyExcelInput:
             
             # Enter만 누르면 활성 시트 사용
             if not choice:
-                self.ws = self.wb.active
-                print(f"✓ 활성 시트 선택: '{self.ws.title}'")
+                self._use_sheet(self.active_sheet)
+                print(f"✓ 활성 시트 선택: '{self.sheet_name}'")
                 break
             
             # 숫자로 선택
             try:
                 idx = int(choice) - 1
                 if 0 <= idx < len(sheet_names):
-                    self.ws = self.wb[sheet_names[idx]]
-                    print(f"✓ 시트 선택 완료: '{self.ws.title}'")
+                    self._use_sheet(sheet_names[idx])
+                    print(f"✓ 시트 선택 완료: '{self.sheet_name}'")
                     break
                 else:
                     print(f"❌ 1에서 {len(sheet_names)} 사이의 숫자를 입력해주세요.")
             except ValueError:
                 # 시트 이름으로 직접 선택
                 if choice in sheet_names:
-                    self.ws = self.wb[choice]
-                    print(f"✓ 시트 선택 완료: '{self.ws.title}'")
+                    self._use_sheet(choice)
+                    print(f"✓ 시트 선택 완료: '{self.sheet_name}'")
                     break
                 else:
                     print(f"❌ '{choice}' 시트를 찾을 수 없습니다. 숫자나 정확한 시트 이름을 입력해주세요.")
@@ -178,12 +269,12 @@ class EasyExcelInput:
         print("📊 시트 변경")
         print("=" * 60)
         
-        sheet_names = self.wb.sheetnames
+        sheet_names = self.sheet_names
         
         print("\n사용 가능한 시트 목록:")
         print("-" * 60)
         for i, name in enumerate(sheet_names, 1):
-            current = "✓ (현재 작업 중)" if self.ws.title == name else ""
+            current = "✓ (현재 작업 중)" if self.sheet_name == name else ""
             print(f"{i}. {name} {current}")
         print("-" * 60)
         
@@ -197,29 +288,33 @@ class EasyExcelInput:
             try:
                 idx = int(choice) - 1
                 if 0 <= idx < len(sheet_names):
-                    old_sheet = self.ws.title
-                    self.ws = self.wb[sheet_names[idx]]
-                    print(f"✓ 시트 변경: '{old_sheet}' → '{self.ws.title}'")
+                    old_sheet = self.sheet_name
+                    self._use_sheet(sheet_names[idx])
+                    print(f"✓ 시트 변경: '{old_sheet}' → '{self.sheet_name}'")
                     
                     # 위치 초기화 여부 확인
                     reset = input(f"\n현재 위치({self.start_col}{self.current_row})를 초기화하시겠습니까? (y/n): ").strip().lower()
                     if reset == 'y':
-                        self.current_row = 5
-                        print(f"✓ 위치 초기화: {self.start_col}{self.current_row}")
+                        self.current_row = self._free_row()
+                        print(f"✓ 위치 초기화 (첫 빈 행): {self.start_col}{self.current_row}")
+                    else:
+                        self._warn_overwrite()
                     
                     break
                 else:
                     print(f"❌ 1에서 {len(sheet_names)} 사이의 숫자를 입력해주세요.")
             except ValueError:
                 if choice in sheet_names:
-                    old_sheet = self.ws.title
-                    self.ws = self.wb[choice]
-                    print(f"✓ 시트 변경: '{old_sheet}' → '{self.ws.title}'")
+                    old_sheet = self.sheet_name
+                    self._use_sheet(choice)
+                    print(f"✓ 시트 변경: '{old_sheet}' → '{self.sheet_name}'")
                     
                     reset = input(f"\n현재 위치({self.start_col}{self.current_row})를 초기화하시겠습니까? (y/n): ").strip().lower()
                     if reset == 'y':
-                        self.current_row = 5
-                        print(f"✓ 위치 초기화: {self.start_col}{self.current_row}")
+                        self.current_row = self._free_row()
+                        print(f"✓ 위치 초기화 (첫 빈 행): {self.start_col}{self.current_row}")
+                    else:
+                        self._warn_overwrite()
                     
                     break
                 else:
@@ -233,18 +328,22 @@ class EasyExcelInput:
         if col:
             self.start_col = col
         
-        # 시작 행
-        row = input(f"시작 행 (기본값: 5, Enter로 건너뛰기): ").strip()
-        if row:
-            self.current_row = max(int(row), 5)
-        
         # 컬럼 번호 계산
         try:
             self.col_num = column_index_from_string(self.start_col)
             
+            # 시작 행 (기본값은 입력 영역의 첫 빈 행)
+            free_row = self._free_row()
+            row = input(f"시작 행 (기본값: {free_row} - 첫 빈 행, Enter로 건너뛰기): ").strip()
+            if row:
+                self.current_row = max(int(row), 5)
+                self._warn_overwrite()
+            else:
+                self.current_row = free_row
+            
             print(f"\n✓ 초기화 완료!")
             print(f"  - 파일: {os.path.basename(self.file_path)}")
-            print(f"  - 시트: {self.ws.title}")
+            print(f"  - 시트: {self.sheet_name}")
             print(f"  - 시작 위치: {self.start_col}{self.current_row}")
             
         except Exception as e:
@@ -254,21 +353,38 @@ class EasyExcelInput:
     def show_menu(self):
         print("\n" + "=" * 60)
         print(f"  파일: {os.path.basename(self.file_path)}")
-        print(f"  시트: {self.ws.title}")
+        print(f"  시트: {self.sheet_name}{' (저메모리 모드)' if self.low_memory else ''}")
         print(f"  현재 위치: {self.start_col}{self.current_row}")
+        if self._saving is not None:
+            if self._saving.done():
+                self.wait_save()
+            else:
+                print("  저장: 백그라운드에서 저장 중...")
+        if self.last_save:
+            print(f"  저장: {self.last_save}")
+        if self.last_autosave:
+            print(f"  자동 저장: {self.last_autosave} (이후 입력 {self._journaled}건)")
         print("=" * 60)
         print("1. 단순 측정값 입력")
         print("2. 위치도 값 입력")
         print("3. 참고 값 입력")
         print("4. MMC 공차 입력")
         print("5. 일괄 입력 (자동 감지)")
+        print("t. 표 파일 가져오기 (CSV/TSV)")
+        if not self.low_memory:
+            print("m. 측정값 입력 / OK·NG 판정")
+            print("c. 공정능력 (Cp/Cpk) 계산")
         print("-" * 60)
         print("6. 저장 후 종료")
-        print("7. 저장 (계속)")
+        print("7. 저장 (계속 - 빠른 저장이면 저장하는 동안 입력 가능)")
         print("8. 현재 위치 확인")
         print("9. 위치 변경")
         print("s. 시트 변경")
-        print("0. 종료 (저장 안함)")
+        print(f"p. 성능 측정 {'끄기' if self.profiler.enabled else '켜기'}")
+        if not self.low_memory:
+            print(f"u. 항목 교체 모드 {'끄기' if self.upsert else '켜기'}")
+        print(f"z. 저장 압축 수준 변경 (현재: {COMPRESSION_LABELS[self.compression]})")
+        print("0. 종료 (마지막 자동 저장 이후 입력은 저장 안함)")
         print("=" * 60)
     
     def get_input(self, prompt, default="", required=True):
@@ -287,6 +403,7 @@ class EasyExcelInput:
         print("=" * 40)
         
         try:
+            plan = BatchPlan(self.col_num, self.col_num + 6)
             item = self.get_input("항목 번호", required=True)
             base = float(self.get_input("기준값", required=True))
             plus = float(self.get_input("+공차", required=True))
@@ -296,15 +413,16 @@ class EasyExcelInput:
             upper = base + plus
             lower = base - minus
             
-            self.ws.cell(self.current_row, self.col_num, item)
-            self.ws.cell(self.current_row, self.col_num + 1, base)
-            self.ws.cell(self.current_row, self.col_num + 2, upper)
-            self.ws.cell(self.current_row, self.col_num + 3, lower)
-            self.ws.cell(self.current_row, self.col_num + 4, upper)
-            self.ws.cell(self.current_row, self.col_num + 5, lower)
-            self.ws.cell(self.current_row, self.col_num + 6, ref)
+            plan.write(self.current_row, self.col_num, item)
+            plan.write(self.current_row, self.col_num + 1, base)
+            plan.write(self.current_row, self.col_num + 2, upper)
+            plan.write(self.current_row, self.col_num + 3, lower)
+            plan.write(self.current_row, self.col_num + 4, upper)
+            plan.write(self.current_row, self.col_num + 5, lower)
+            plan.write(self.current_row, self.col_num + 6, ref)
             
-            print(f"✓ {self.ws.title} 시트의 {self.current_row}행에 추가되었습니다!")
+            self._commit_plan(plan, direct=True, next_row=self.current_row + 1)
+            print(f"✓ {self.sheet_name} 시트의 {self.current_row}행에 추가되었습니다!")
             self.current_row += 1
             
         except ValueError:
@@ -317,6 +435,7 @@ class EasyExcelInput:
         print("=" * 40)
         
         try:
+            plan = BatchPlan(self.col_num, self.col_num + 6)
             item = self.get_input("항목 번호", required=True)
             base = self.get_input("기준값 (예: Ø4.25)", required=True)
             upper = float(self.get_input("상한값", required=True))
@@ -326,15 +445,16 @@ class EasyExcelInput:
             
             for i in range(rows):
                 row = self.current_row + i
-                self.ws.cell(row, self.col_num, f"{item}-{i+1}")
-                self.ws.cell(row, self.col_num + 1, base)
-                self.ws.cell(row, self.col_num + 2, upper)
-                self.ws.cell(row, self.col_num + 3, lower)
-                self.ws.cell(row, self.col_num + 4, upper)
-                self.ws.cell(row, self.col_num + 5, lower)
-                self.ws.cell(row, self.col_num + 6, ref)
+                plan.write(row, self.col_num, f"{item}-{i+1}")
+                plan.write(row, self.col_num + 1, base)
+                plan.write(row, self.col_num + 2, upper)
+                plan.write(row, self.col_num + 3, lower)
+                plan.write(row, self.col_num + 4, upper)
+                plan.write(row, self.col_num + 5, lower)
+                plan.write(row, self.col_num + 6, ref)
             
-            print(f"✓ {self.ws.title} 시트의 {self.current_row}행부터 {rows}개 행 추가되었습니다!")
+            self._commit_plan(plan, direct=True, next_row=self.current_row + rows)
+            print(f"✓ {self.sheet_name} 시트의 {self.current_row}행부터 {rows}개 행 추가되었습니다!")
             self.current_row += rows
             
         except ValueError:
@@ -347,17 +467,19 @@ class EasyExcelInput:
         print("=" * 40)
         
         try:
+            plan = BatchPlan(self.col_num, self.col_num + 6)
             item = self.get_input("항목 번호", required=True)
             base = self.get_input("기준값", required=True)
             ref = self.get_input("REF", default="참고")
             
-            self.ws.cell(self.current_row, self.col_num, item)
-            self.ws.cell(self.current_row, self.col_num + 1, base)
+            plan.write(self.current_row, self.col_num, item)
+            plan.write(self.current_row, self.col_num + 1, base)
             for i in range(2, 7):
-                self.ws.cell(self.current_row, self.col_num + i, '-')
-            self.ws.cell(self.current_row, self.col_num + 6, ref)
+                plan.write(self.current_row, self.col_num + i, '-')
+            plan.write(self.current_row, self.col_num + 6, ref)
             
-            print(f"✓ {self.ws.title} 시트의 {self.current_row}행에 추가되었습니다!")
+            self._commit_plan(plan, direct=True, next_row=self.current_row + 1)
+            print(f"✓ {self.sheet_name} 시트의 {self.current_row}행에 추가되었습니다!")
             self.current_row += 1
             
         except Exception as e:
@@ -368,6 +490,7 @@ class EasyExcelInput:
         print("=" * 40)
         
         try:
+            plan = BatchPlan(self.col_num, self.col_num + 6)
             item = self.get_input("항목 번호", required=True)
             base = float(self.get_input("기준값", required=True))
             mmc = float(self.get_input("MMC 허용공차", required=True))
@@ -376,28 +499,29 @@ class EasyExcelInput:
             ref = self.get_input("REF (선택, Enter로 건너뛰기)", required=False)
             
             # 1행
-            self.ws.cell(self.current_row, self.col_num, f"{item}-1")
-            self.ws.cell(self.current_row, self.col_num + 1, base)
-            self.ws.cell(self.current_row, self.col_num + 2, upper)
-            self.ws.cell(self.current_row, self.col_num + 3, lower)
-            self.ws.cell(self.current_row, self.col_num + 4, upper)
-            self.ws.cell(self.current_row, self.col_num + 5, lower)
-            self.ws.cell(self.current_row, self.col_num + 6, ref)
+            plan.write(self.current_row, self.col_num, f"{item}-1")
+            plan.write(self.current_row, self.col_num + 1, base)
+            plan.write(self.current_row, self.col_num + 2, upper)
+            plan.write(self.current_row, self.col_num + 3, lower)
+            plan.write(self.current_row, self.col_num + 4, upper)
+            plan.write(self.current_row, self.col_num + 5, lower)
+            plan.write(self.current_row, self.col_num + 6, ref)
             
             # 2행
-            self.ws.cell(self.current_row + 1, self.col_num, f"{item}-2")
-            self.ws.cell(self.current_row + 1, self.col_num + 1, f"MMC: {mmc}")
+            plan.write(self.current_row + 1, self.col_num, f"{item}-2")
+            plan.write(self.current_row + 1, self.col_num + 1, f"MMC: {mmc}")
             for i in range(2, 7):
-                self.ws.cell(self.current_row + 1, self.col_num + i, '-')
-            self.ws.cell(self.current_row + 1, self.col_num + 6, ref)
+                plan.write(self.current_row + 1, self.col_num + i, '-')
+            plan.write(self.current_row + 1, self.col_num + 6, ref)
             
             # 3-4행
             for offset in [2, 3]:
-                self.ws.cell(self.current_row + offset, self.col_num, f"{item}-{offset+1}")
-                self.ws.cell(self.current_row + offset, self.col_num + 1, f"계산{offset-1}")
-                self.ws.cell(self.current_row + offset, self.col_num + 6, ref)
+                plan.write(self.current_row + offset, self.col_num, f"{item}-{offset+1}")
+                plan.write(self.current_row + offset, self.col_num + 1, f"계산{offset-1}")
+                plan.write(self.current_row + offset, self.col_num + 6, ref)
             
-            print(f"✓ {self.ws.title} 시트의 {self.current_row}행부터 4개 행 추가되었습니다!")
+            self._commit_plan(plan, direct=True, next_row=self.current_row + 4)
+            print(f"✓ {self.sheet_name} 시트의 {self.current_row}행부터 4개 행 추가되었습니다!")
             self.current_row += 4
             
         except ValueError:
@@ -429,7 +553,14 @@ class EasyExcelInput:
         print("   예: 70, 10, 0.2m 또는 70, 10, 0.2m, 0.5")
         print("   → 각 세트: 기준값행, MAX값행(MMC공차), 측정값행(빈칸)")
         print()
+        print("엑셀에서 복사한 표(탭 구분)를 붙여 넣어도 됩니다. (첫 행이 머리글이면 열 이름으로 인식)")
+        print()
+        print("여러 시트에 한 번에 입력 (지시문 다음 줄부터 그 시트에 입력):")
+        print("   [시트이름] - 첫 빈 행부터 / [시트이름!F12] - F12부터 / [!F30] - 현재 시트 F30부터")
+        print()
         print(f"현재 위치 {self.start_col}{self.current_row}부터 입력됩니다.")
+        if self.upsert:
+            print("항목 교체 모드: 시트에 있는 항목번호는 그 자리에 다시 입력됩니다.")
         print("\n여러 줄 입력 후 빈 줄로 완료:")
 
         lines = []
@@ -443,368 +574,924 @@ class EasyExcelInput:
             print("❌ 입력된 데이터가 없습니다.")
             return
 
-        count = 0
-        start_row = self.current_row
+        if any('\t' in line for line in lines):
+            print("  (탭으로 구분된 표로 인식)")
+            lines = iter_table_lines(lines)
+        try:
+            self._apply_batch(lines)
+        except ValueError as e:
+            print(f"❌ {e}")
 
-        for line in lines:
-            parts = [p.strip() for p in line.split(',')]
-            if len(parts) < 2:
-                print(f"⚠ 형식 오류 (최소 2개 항목 필요): {line}")
-                continue
+    def input_table(self):
+        """CAD 풍선 목록 등 CSV/TSV 표 파일을 읽어서 일괄 입력 (한 행씩 읽어 바로 계획으로)"""
+        print("\n📑 표 파일 가져오기 (CSV/TSV)")
+        print("=" * 60)
+        path = self.clean_path(input("표 파일 경로: "))
+        if not path or not os.path.exists(path):
+            print("❌ 파일을 찾을 수 없습니다.")
+            return
+        print("열 지정 (예: item=Balloon, count=Qty, base=Nominal, upper=+Tol, lower=-Tol, ref=Remark, type=Type)")
+        print("  필드: item, count, base, upper, lower, ref, type, max / 열은 머리글 이름 또는 열 번호(1부터)")
+        text = input("열 지정 (Enter: 머리글 이름으로 자동 인식): ").strip()
+        try:
+            self._apply_batch(read_table_lines(path, parse_mapping(text)))
+        except Exception as e:
+            print(f"❌ 표를 읽을 수 없습니다: {e}")
 
-            try:
-                # 자동 유형 감지
-                data_type = self._detect_data_type(parts, line)
-
-                if data_type == 'simple':
-                    self._batch_simple(parts, line)
-                elif data_type == 'position':
-                    self._batch_position(parts, line)
-                elif data_type == 'reference':
-                    self._batch_reference(parts, line)
-                elif data_type == 'mmc':
-                    self._batch_mmc(parts, line)
-                else:
-                    print(f"⚠ 유형을 감지할 수 없음: {line}")
-                    continue
+    def _apply_batch(self, lines):
+        """일괄 입력 줄(또는 표 가져오기 줄)을 계획 → 덮어쓰기 확인 → 적용
 
-                count += 1
+        [시트!셀] 지시문이 있으면 구역마다 그 시트의 인스턴스(sheet_input)로 계획을 만들고,
+        모든 구역을 확인한 뒤에 한꺼번에 적용한다. 하나라도 취소하면 아무것도 바꾸지 않는다.
+        """
+        start_row = self.current_row
 
-            except Exception as e:
-                print(f"  ⚠ 오류: {line} - {e}")
+        # 1단계: 시트에 쓰기 전에 모든 구역의 줄을 검사하고, 오류 줄이 있으면 전부 보여 줌
+        # 2단계: 전체 줄을 쓰기 계획으로 변환 (표를 읽다 실패하면 위치/인덱스 되돌림)
+        targets = []  # (인스턴스, 계획, 시작 행)
+        try:
+            sections = split_sections(lines)
+            check_sheets(sections, self.sheet_names)
+            single = is_single(sections)
+            workers = {}
+            checked = []  # (인스턴스, 구역, 검사 결과, 시작 행)
+            for section in sections:
+                target = self._section_input(section, self.sheet_name, workers)
+                first_row = target.current_row
+                result = target.check_batch(section.lines, section.first_line_no,
+                                            None if self.upsert else first_row)
+                if not self.upsert:
+                    # 오류 줄은 행을 차지하지 않으므로 다음 구역의 시작 행은 검사 결과로 정해짐
+                    target.current_row = first_row + result.rows
+                checked.append((target, section, result, first_row))
+
+            if not self._resolve_errors([(target.sheet_name, error) for target, _, result, _ in checked
+                                         for error in result.errors], single):
+                self.current_row = start_row
+                self._item_index = None
+                print("❌ 입력을 취소했습니다. (시트는 바뀌지 않았습니다)")
+                return
 
-        print(f"\n✓ 총 {count}개 항목이 {start_row}행부터 입력되었습니다!")
+            for target, section, result, first_row in checked:
+                if not self.upsert:
+                    target.current_row = first_row
+                elif section.start_row is not None:
+                    target.current_row = first_row = section.start_row
+                else:
+                    first_row = target.current_row  # 항목 교체는 앞 구역을 계획한 뒤의 위치부터
+                if not single:
+                    print(f"\n📄 [{target.sheet_name}] {target.start_col}{first_row}부터")
+                targets.append((target, target.plan_checked(result), first_row))
+        except Exception:
+            self.current_row = start_row
+            self._item_index = None
+            raise
+
+        # 3단계: 기존 데이터를 덮어쓰는지 확인
+        if not self.upsert:
+            for target, plan, _ in targets:
+                with self.profiler.stage('conflicts'):
+                    conflicts = find_conflicts(plan, *target._occupied(plan))
+                if not single and conflicts:
+                    print(f"\n[{target.sheet_name}]", end='')
+                if not self._resolve_conflicts(plan, conflicts):
+                    self.current_row = start_row
+                    print("❌ 입력을 취소했습니다. (시트는 바뀌지 않았습니다)")
+                    return
+
+        # 4단계: 계획을 시트에 한 번에 적용 (자동 저장이 중간에 끼어들지 않도록 잠금)
+        with self._lock:
+            for target, plan, _ in targets:
+                target._commit_plan(plan)
+                if target is not self:
+                    self._journaled += target._journaled
+                    target._journaled = 0
+
+        if single:
+            print(f"\n✓ 총 {len(targets[0][1].entries)}개 항목이 {start_row}행부터 입력되었습니다!")
+        else:
+            print(f"\n✓ 시트 {len({target.sheet_name for target, _, _ in targets})}개에 "
+                  f"총 {sum(len(plan.entries) for _, plan, _ in targets)}개 항목이 입력되었습니다!")
+            for target, plan, first_row in targets:
+                print(f"  - [{target.sheet_name}] {len(plan.entries)}개 항목, "
+                      f"{target.start_col}{first_row} → 다음 {target.start_col}{target.current_row}")
         print(f"  다음 입력 위치: {self.start_col}{self.current_row}")
+        print("  " + format_cache_stats(sum(plan.cache_hits for _, plan, _ in targets),
+                                        sum(plan.cache_misses for _, plan, _ in targets)))
+        self.print_profile()
+
+    def sheet_input(self, sheet_name, start_col, start_row=None):
+        """같은 워크북의 다른 시트(또는 다른 시작 열)에 입력하는 인스턴스
+
+        워크북, 파일, 설정, 저널, 빠른 저장 목록은 이 인스턴스와 공유하고 위치/인덱스만 따로 둔다.
+        start_row가 None이면 그 시트 입력 영역의 첫 빈 행부터 입력한다.
+        """
+        worker = EasyExcelInput()
+        worker.wb = self.wb
+        worker.sheet_names = self.sheet_names
+        worker.low_memory = self.low_memory
+        worker._use_sheet(sheet_name)
+        worker.file_path = self.file_path
+        worker.start_col = start_col
+        worker.col_num = column_index_from_string(start_col)
+        worker.profiler = self.profiler
+        worker.parse_cache = self.parse_cache
+        worker.upsert = self.upsert
+        worker.on_conflict = self.on_conflict
+        worker.journal = self.journal
+        worker._lock = self._lock
+        worker._pending_plans = self._pending_plans
+        worker._free_rows = self._free_rows
+        if start_row is None:
+            start_row = worker._free_row()
+        worker.current_row = max(start_row, 5)
+        return worker
+
+    def _section_input(self, section, sheet_name, workers):
+        """구역을 입력할 인스턴스 - 선택한 시트/시작 열이면 자신, 아니면 (시트, 열)마다 하나씩 만든 인스턴스
+
+        시작 행이 없는 [시트이름] 구역은 선택한 시트라도 입력 영역의 첫 빈 행부터 쓰고,
+        이 일괄 입력의 앞 구역이 이미 쓴 (시트, 열)이면 그 다음 행부터 이어서 쓴다.
+        """
+        target_sheet = section.sheet or sheet_name
+        start_col = section.start_col or self.start_col
+        if target_sheet == sheet_name and start_col == self.start_col:
+            if section.start_row is not None:
+                self.current_row = section.start_row
+            elif section.sheet is not None and (target_sheet, start_col) not in workers:
+                self.current_row = max(self._free_row(), 5)
+            workers[(target_sheet, start_col)] = self
+            return self
+        worker = workers.get((target_sheet, start_col))
+        if worker is None:
+            worker = workers[(target_sheet, start_col)] = self.sheet_input(
+                target_sheet, start_col, section.start_row)
+        elif section.start_row is not None:
+            worker.current_row = section.start_row
+        return worker
+
+    def input_measurements(self):
+        """측정값 가져오기 - 항목번호로 규격 행을 찾아 측정값을 쓰고 OK/NG 판정"""
+        print("\n📏 측정값 입력 / 판정")
+        print("=" * 60)
+        print("입력 형식: 항목번호, 측정값1, 측정값2, ... (탭/쉼표 구분, CSV나 엑셀 복사 가능)")
+        print("  예: 51, 7.02, 6.98, 7.05")
+        print("  여러 행 항목은 같은 항목번호를 줄마다 반복 (위 행부터 차례로 입력)")
+        print("  MMC 항목은 세트마다 측정값 행(세 번째 행)에 입력")
 
-    def _detect_data_type(self, parts, line):
-        """데이터 유형 자동 감지"""
-        line_lower = line.lower()
-
-        # 1. 참고 값 감지 - 기준값이 괄호로 싸여있거나 REF/참고 키워드 포함
-        if len(parts) >= 3:
-            # 괄호로 싸여있는 경우: 50, 1, (1.2) 또는 50, 3, (1.2), 0.15, 0.15
-            if '(' in parts[2] and ')' in parts[2]:
-                return 'reference'
-            # REF/참고 키워드가 있는 경우
-            if 'ref' in line_lower or '참고' in line_lower:
-                return 'reference'
-
-        # 2. MMC 공차 감지 ('mmc' 또는 'm' 문자 포함)
-        # parts[2]에 'm'이 있으면 MMC (예: 70, 10, 0.2m)
-        if 'mmc' in line_lower or (len(parts) >= 3 and 'm' in parts[2].lower() and not 'mm' in parts[2].lower()):
-            return 'mmc'
-
-        # 3. 위치도 값 감지 (기준값에 Ø 포함 또는 6개 항목)
-        if len(parts) >= 5:
-            # 3번째 항목(기준값)에 Ø가 있으면 위치도
-            if 'ø' in parts[2].lower() or 'Ø' in parts[2]:
-                return 'position'
-            # 6개 항목이면 위치도로 판단
-            if len(parts) == 6:
-                try:
-                    # 4, 5번째가 숫자면 위치도 (상한, 하한)
-                    float(parts[3])
-                    float(parts[4])
-                    return 'position'
-                except:
-                    pass
-
-        # 4. 단순 측정값 (5개 항목, 기본값)
-        if len(parts) >= 5:
-            return 'simple'
-
-        return None
-
-    def _unmerge_range(self, start_row, num_rows):
-        """지정된 범위의 모든 병합 해제"""
-        # 해당 범위의 모든 병합된 셀 찾기
-        merged_ranges_to_unmerge = []
-        for merged_range in list(self.ws.merged_cells.ranges):
-            # 병합 범위가 우리가 쓰려는 영역과 겹치는지 확인
-            if (merged_range.min_row <= start_row + num_rows - 1 and
-                merged_range.max_row >= start_row and
-                merged_range.min_col <= self.col_num + 6 and
-                merged_range.max_col >= self.col_num):
-                merged_ranges_to_unmerge.append(merged_range)
-
-        # 찾은 병합 해제
-        for merged_range in merged_ranges_to_unmerge:
-            self.ws.unmerge_cells(str(merged_range))
-
-    def _batch_simple(self, parts, line):
-        """단순 측정값 일괄 입력"""
-        if len(parts) < 5:
-            raise ValueError("형식: 항목번호, 행개수, 기준값, 상한공차, 하한공차")
-
-        item_no = parts[0]
-        rows = int(parts[1])
-        base = float(parts[2].replace('Ø', '').replace('ø', ''))
-        upper_tol = float(parts[3])  # 상한공차 (양수)
-        lower_tol = float(parts[4])  # 하한공차
-        ref = parts[5] if len(parts) > 5 else ""
-
-        # 하한공차가 양수로 입력되면 자동으로 마이너스 붙이기
-        if lower_tol > 0:
-            lower_tol = -lower_tol
-
-        # 계산값
-        lower_calc = base + lower_tol  # 하한계산값 (기준 + 하한공차)
-        upper_calc = base + upper_tol  # 상한계산값 (기준 + 상한공차)
+        default_col = get_column_letter(self.col_num + SAMPLE_OFFSET)
+        try:
+            sample_col = column_index_from_string(
+                self.get_input(f"측정값 시작 열 (Enter: {default_col})", default_col, required=False).upper())
+            default_judge = get_column_letter(sample_col + MAX_SAMPLES)
+            judge_text = self.get_input(f"판정 열 (Enter: {default_judge})", required=False)
+            judge_col = column_index_from_string(judge_text.upper()) if judge_text else None
+        except ValueError:
+            print("❌ 올바른 열 이름을 입력해주세요. (예: M)")
+            return
 
-        start_row = self.current_row
+        print("\n여러 줄 입력 후 빈 줄로 완료:")
+        lines = []
+        while True:
+            line = input().strip()
+            if not line:
+                break
+            lines.append(line)
 
-        # 기존 병합 해제
-        self._unmerge_range(start_row, rows)
-
-        for i in range(rows):
-            row = self.current_row + i
-            # 항목번호는 첫 행에만 입력 (병합할 것이므로)
-            if i == 0:
-                self.ws.cell(row, self.col_num, item_no)
-            self.ws.cell(row, self.col_num + 1, base)
-            self.ws.cell(row, self.col_num + 2, upper_tol)
-            self.ws.cell(row, self.col_num + 3, lower_tol)
-            self.ws.cell(row, self.col_num + 4, lower_calc)
-            self.ws.cell(row, self.col_num + 5, upper_calc)
-            self.ws.cell(row, self.col_num + 6, ref)
-
-        # 여러 행이면 항목번호 셀 병합
-        if rows > 1:
-            # 새로 병합
-            self.ws.merge_cells(start_row=start_row, start_column=self.col_num,
-                              end_row=start_row + rows - 1, end_column=self.col_num)
-            # 병합된 셀 중앙 정렬
-            self.ws.cell(start_row, self.col_num).alignment = Alignment(horizontal='center', vertical='center')
-
-        self.current_row += rows
-        print(f"  ✓ [단순] 항목 {item_no}: {rows}개 행")
-
-    def _batch_position(self, parts, line):
-        """위치도 값 일괄 입력"""
-        if len(parts) < 5:
-            raise ValueError("형식: 항목번호, 행개수, 기준값, 상한공차, 하한공차")
-
-        item_no = parts[0]
-        rows = int(parts[1])
-        base_str = parts[2]  # 문자열 그대로 (Ø4.25)
-        # Ø 제거하고 숫자 추출
-        base = float(base_str.replace('Ø', '').replace('ø', ''))
-        upper_tol = float(parts[3])  # 상한공차
-        lower_tol = float(parts[4])  # 하한공차
-        ref = parts[5] if len(parts) > 5 else ""
-
-        # 하한공차가 양수로 입력되면 자동으로 마이너스 붙이기
-        if lower_tol > 0:
-            lower_tol = -lower_tol
-
-        # 계산값
-        lower_calc = base + lower_tol  # 하한계산값
-        upper_calc = base + upper_tol  # 상한계산값
+        if not lines:
+            print("❌ 입력된 데이터가 없습니다.")
+            return
 
-        start_row = self.current_row
+        try:
+            plan, summary = plan_measurements(self.ws, self.col_num, lines, sample_col, judge_col, self.profiler)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        for _, _, msg in plan.errors:
+            print(f"  {msg}")
 
-        # 기존 병합 해제
-        self._unmerge_range(start_row, rows)
-
-        for i in range(rows):
-            row = self.current_row + i
-            # 항목번호는 첫 행에만 입력 (병합할 것이므로)
-            if i == 0:
-                self.ws.cell(row, self.col_num, item_no)
-            self.ws.cell(row, self.col_num + 1, base_str)  # Ø 포함된 문자열
-            self.ws.cell(row, self.col_num + 2, upper_tol)
-            self.ws.cell(row, self.col_num + 3, lower_tol)
-            self.ws.cell(row, self.col_num + 4, lower_calc)
-            self.ws.cell(row, self.col_num + 5, upper_calc)
-            self.ws.cell(row, self.col_num + 6, ref)
-
-        # 여러 행이면 항목번호 셀 병합
-        if rows > 1:
-            # 새로 병합
-            self.ws.merge_cells(start_row=start_row, start_column=self.col_num,
-                              end_row=start_row + rows - 1, end_column=self.col_num)
-            # 병합된 셀 중앙 정렬
-            self.ws.cell(start_row, self.col_num).alignment = Alignment(horizontal='center', vertical='center')
-
-        self.current_row += rows
-        print(f"  ✓ [위치도] 항목 {item_no}: {rows}개 행")
-
-    def _batch_reference(self, parts, line):
-        """참고 값 일괄 입력 - 괄호로 감지, 상한/하한 선택적"""
-        if len(parts) < 3:
-            raise ValueError("형식: 항목번호, 행개수, (기준값), [상한공차], [하한공차], [REF]")
-
-        item_no = parts[0]
-        rows = int(parts[1])
-
-        # 괄호는 유지, 공백만 제거
-        base_str_with_paren = parts[2].strip()
-        # 계산용으로만 괄호 제거
-        base_str_calc = parts[2].replace('(', '').replace(')', '').strip()
-
-        # 상한/하한이 있는지 확인
-        has_tolerances = len(parts) >= 5 and parts[3] and parts[4]
+        self._commit_plan(plan)
 
-        start_row = self.current_row
+        print(f"\n✓ 측정값 {summary['points']}개 ({summary['rows']}개 행) 입력 - "
+              f"{summary['sample_col']}열부터, 판정 {summary['judge_col']}열")
+        print(f"  OK {summary['ok']}행, NG {summary['ng']}행, 판정 안 함 {summary['unjudged']}행")
+        if summary['ng_items']:
+            print(f"  NG 항목: {', '.join(summary['ng_items'])}")
+        self.print_profile()
 
-        # 기존 병합 해제
-        self._unmerge_range(start_row, rows)
+    def show_capability(self):
+        """현재 시트의 측정값으로 특성별 공정능력(Cp/Cpk) 계산 - 화면 출력 후 원하면 요약 파일로 저장"""
+        print("\n📈 공정능력 (Cp/Cpk)")
+        print("=" * 60)
+        default_col = get_column_letter(self.col_num + SAMPLE_OFFSET)
+        try:
+            sample_col = column_index_from_string(
+                self.get_input(f"측정값 시작 열 (Enter: {default_col})", default_col, required=False).upper())
+        except ValueError:
+            print("❌ 올바른 열 이름을 입력해주세요. (예: M)")
+            return
 
-        for i in range(rows):
-            row = self.current_row + i
+        with self._lock:
+            with self.profiler.stage('judge'):
+                rows = summary_rows(combine([lot_statistics(self.ws, self.col_num, sample_col)]))
+        if not rows:
+            print("❌ 측정값이 입력된 항목이 없습니다.")
+            return
 
-            # 항목번호는 첫 행에만
-            if i == 0:
-                self.ws.cell(row, self.col_num, item_no)
+        def number(value, digits):
+            return f"{value:.{digits}f}" if value is not None else "-"
 
-            self.ws.cell(row, self.col_num + 1, base_str_with_paren)  # 괄호 포함
+        print(f"{'항목':>6} {'순번':>4} {'측정 수':>6} {'평균':>10} {'표준편차':>10} {'Cp':>6} {'Cpk':>6} {'규격 밖':>6}")
+        for item_no, point, _, _, _, n, mean, sigma, cp, cpk, out, _ in rows:
+            print(f"{item_no:>6} {point:>4} {n:>6} {number(mean, 4):>10} {number(sigma, 4):>10} "
+                  f"{number(cp, 2):>6} {number(cpk, 2):>6} {out:>6}")
 
-            if has_tolerances:
-                try:
-                    base = float(base_str_calc)  # 괄호 제거한 값으로 계산
-                    upper_tol = float(parts[3])
-                    lower_tol = float(parts[4])
-
-                    # 하한공차가 양수로 입력되면 자동으로 마이너스 붙이기
-                    if lower_tol > 0:
-                        lower_tol = -lower_tol
-
-                    # 계산값
-                    lower_calc = base + lower_tol
-                    upper_calc = base + upper_tol
-
-                    self.ws.cell(row, self.col_num + 2, upper_tol)
-                    self.ws.cell(row, self.col_num + 3, lower_tol)
-                    self.ws.cell(row, self.col_num + 4, lower_calc)
-                    self.ws.cell(row, self.col_num + 5, upper_calc)
-                except ValueError:
-                    # 숫자 변환 실패하면 '-'로 표시
-                    for j in range(2, 6):
-                        self.ws.cell(row, self.col_num + j, '-')
+        low = low_capability(rows)
+        if low:
+            print(f"\n⚠ Cpk 1.33 미만 {len(low)}개: "
+                  + ", ".join(f"{item_no}-{point} ({cpk})" for item_no, point, cpk in low[:10])
+                  + (" ..." if len(low) > 10 else ""))
+        self.print_profile()
+
+        path = self.clean_path(input("\n요약 파일로 저장할 경로 (.xlsx, Enter: 저장 안 함): "))
+        if path:
+            try:
+                write_summary(path, rows)
+                print(f"✓ 저장 완료: {path}")
+            except Exception as e:
+                print(f"❌ 저장 실패: {e}")
+
+    def report(self, msg):
+        """일괄 입력 줄의 처리 메시지는 바로 출력"""
+        print(f"  {msg}")
+
+    def _resolve_errors(self, errors, single=True):
+        """사전 검사의 오류 줄을 모두 보여주고 처리 방법(on_error 또는 선택)을 정함 (계속하면 True)
+
+        errors: [(시트 이름, (줄 번호, 원본 줄, 오류 메시지))]
+        """
+        if not errors:
+            return True
+
+        print(f"\n⚠ 형식 오류가 있는 줄 {len(errors)}개 (아직 아무것도 입력하지 않았습니다):")
+        for sheet_name, (line_no, _, msg) in errors:
+            where = f"{line_no}번째 줄" if single else f"[{sheet_name}] {line_no}번째 줄"
+            print(f"  {where}: {msg}")
+
+        action = self.on_error
+        if action is None:
+            choice = input("a=취소, s=오류 줄만 건너뛰고 입력 (기본값: a): ").strip().lower()
+            action = 'skip' if choice == 's' else 'abort'
+        if action == 'skip':
+            print(f"  → 오류 {len(errors)}줄은 건너뛰고 나머지 줄을 입력합니다.")
+        return action == 'skip'
+
+    def _resolve_conflicts(self, plan, conflicts):
+        """겹치는 줄을 보여주고 처리 방법(on_conflict 또는 선택)에 따라 계획 조정 (계속하면 True)"""
+        if not conflicts:
+            return True
+
+        print(f"\n⚠ 기존 데이터와 겹치는 줄 {len(conflicts)}개:")
+        for line_no, start_row, num_rows, n_cells, merged in conflicts[:10]:
+            text = f"  {line_no}번째 줄 ({start_row}~{start_row + num_rows - 1}행): 값 있는 칸 {n_cells}개"
+            if merged:
+                text += f", 병합 {', '.join(merged)}"
+            print(text)
+        if len(conflicts) > 10:
+            print(f"  ... 외 {len(conflicts) - 10}줄")
+
+        action = self.on_conflict
+        if action is None:
+            choice = input("a=취소, s=겹치는 줄만 건너뛰기, f=덮어쓰기 (기본값: a): ").strip().lower()
+            action = {'s': 'skip', 'f': 'force'}.get(choice, 'abort')
+
+        if action == 'skip':
+            plan.drop_lines({conflict[0] for conflict in conflicts})
+            print(f"  → 겹치는 {len(conflicts)}줄은 건너뛰고 기존 내용을 유지합니다.")
+        return action != 'abort'
+
+    def _commit_plan(self, plan, direct=False, next_row=None):
+        """쓰기 계획을 현재 시트에 적용하고 저널에 기록
+
+        direct=True는 개별 입력(메뉴 1~4)으로, 병합 없이 셀 값만 쓰고 빠른 저장 대상에서 뺀다.
+        next_row는 적용 후의 다음 입력 행 (복구할 때 위치를 되살리는 데 사용).
+        저메모리 모드에서는 시트에 적용하지 않고 계획만 모아 두었다가 저장할 때 시트 XML에 쓴다.
+        """
+        with self._lock:
+            self._free_rows.clear()
+            self._shift_guard = None
+            if direct or not self.upsert:
+                # 항목 교체 모드의 일괄 입력 외에는 인덱스를 갱신하지 않으므로 다음에 다시 읽음
+                self._item_index = None
+            if self.ws is None:
+                self._pending_plans.append((self.sheet_name, plan))
+            elif direct:
+                write_cells(plan, self.ws)
+                self._direct_edits = True
             else:
-                # 상한/하한 없으면 '-'로 표시
-                for j in range(2, 6):
-                    self.ws.cell(row, self.col_num + j, '-')
-
-            # REF 설정
-            if has_tolerances and len(parts) > 5:
-                ref = parts[5]
-            elif not has_tolerances and len(parts) > 3:
-                ref = parts[3]
+                self._merge_index = None  # 배치 시작 시 병합 인덱스 새로 구성
+                with self.profiler.stage('index'):
+                    merge_index = self._get_merge_index()
+                apply_plan(plan, self.ws, merge_index, self.profiler)
+                self._pending_plans.append((self.sheet_name, plan))
+
+            if self.journal is not None:
+                self.journal.append(self.sheet_name, plan, self.start_col,
+                                    next_row or self.current_row, direct)
+                self._journaled += 1
+
+    def save_file(self, background=False):
+        """저장 - background면 작업 스레드에서 저장하고 바로 메뉴로 돌아감 (결과는 메뉴에 표시)
+
+        빠른 저장은 저장하는 동안에도 입력할 수 있고 (그 입력은 다음 저장에 반영),
+        전체 저장은 워크북을 기록하는 동안 입력이 잠금(_lock)에서 저장이 끝나기를 기다린다.
+        """
+        self.wait_save()
+        if background:
+            with self._lock:
+                patchable = self._can_patch()
+            self._saving = BackgroundSave(self._compact, verbose=False).start()
+            if patchable:
+                print("\n💾 백그라운드에서 저장을 시작했습니다. 저장하는 동안 계속 입력할 수 있습니다.")
             else:
-                ref = "참고"
-
-            self.ws.cell(row, self.col_num + 6, ref)
-
-        # 여러 행이면 항목번호 셀 병합
-        if rows > 1:
-            self.ws.merge_cells(start_row=start_row, start_column=self.col_num,
-                              end_row=start_row + rows - 1, end_column=self.col_num)
-            self.ws.cell(start_row, self.col_num).alignment = Alignment(horizontal='center', vertical='center')
-
-        self.current_row += rows
-        print(f"  ✓ [참고] 항목 {item_no}: {rows}개 행")
-
-    def _batch_mmc(self, parts, line):
-        """MMC 공차 일괄 입력 - 새로운 형식"""
-        # 형식: 항목번호, 세트개수, MMC공차, [MAX값]
-        if len(parts) < 3:
-            raise ValueError("형식: 항목번호, 세트개수, MMC공차, [MAX값]")
-
-        item_no = parts[0]
-
-        # 세트 개수
-        num_sets = int(parts[1])
-
-        # MMC 공차 추출 (0.35m 형식)
-        mmc_str = parts[2].lower().replace('mmc', '').replace('(', '').replace(')', '').replace('m', '').strip()
-        mmc_tol = float(mmc_str)
-
-        # MAX값 (선택적)
-        max_val = parts[3] if len(parts) > 3 and parts[3] else ""
-
-        # REF (선택적)
-        ref = parts[4] if len(parts) > 4 else ""
-
-        # 총 행 수 = 세트 개수 * 3
-        total_rows = num_sets * 3
-        start_row = self.current_row
-
-        # 기존 병합 해제
-        self._unmerge_range(start_row, total_rows)
-
-        # 각 세트마다 3개 행 생성
-        for set_idx in range(num_sets):
-            base_row = self.current_row + (set_idx * 3)
-
-            # 1행: MMC 기준값 행
-            if set_idx == 0:
-                self.ws.cell(base_row, self.col_num, item_no)  # 첫 세트만 항목번호
-            self.ws.cell(base_row, self.col_num + 1, f"{mmc_tol}ⓜ")  # 기준값: 0.2ⓜ
-            self.ws.cell(base_row, self.col_num + 2, 0)  # 상한공차 0
-            self.ws.cell(base_row, self.col_num + 3, mmc_tol)  # 하한공차 (양수)
-            self.ws.cell(base_row, self.col_num + 4, 0)  # 하한계산값
-            self.ws.cell(base_row, self.col_num + 5, mmc_tol)  # 상한계산값
-            self.ws.cell(base_row, self.col_num + 6, ref)
-
-            # 2행: MAX값 행, REF열에 "MMC 공차"
-            if max_val:
-                try:
-                    self.ws.cell(base_row + 1, self.col_num + 1, float(max_val))
-                except:
-                    self.ws.cell(base_row + 1, self.col_num + 1, max_val)
-            for i in range(2, 6):
-                self.ws.cell(base_row + 1, self.col_num + i, '-')
-            self.ws.cell(base_row + 1, self.col_num + 6, "MMC 공차")
-
-            # 3행: 측정값 입력 빈 칸
-            # 기준값 열만 비우고 나머지는 '-'
-            for i in range(2, 6):
-                self.ws.cell(base_row + 2, self.col_num + i, '-')
-            self.ws.cell(base_row + 2, self.col_num + 6, ref)
-
-        # 항목번호 셀 병합 (전체 행)
-        self.ws.merge_cells(start_row=start_row, start_column=self.col_num,
-                          end_row=start_row + total_rows - 1, end_column=self.col_num)
-        # 병합된 셀 중앙 정렬
-        self.ws.cell(start_row, self.col_num).alignment = Alignment(horizontal='center', vertical='center')
-
-        self.current_row += total_rows
-        print(f"  ✓ [MMC] 항목 {item_no}: {num_sets}세트 ({total_rows}개 행)")
-    
-    def save_file(self):
+                print("\n💾 백그라운드에서 저장을 시작했습니다. (전체 저장이라 저장이 끝날 때까지 입력은 기다립니다)")
+            return
         try:
             print("\n저장 중...")
-            self.wb.save(self.file_path)
-            print(f"✓ 저장 완료: {os.path.basename(self.file_path)}")
+            start = time.perf_counter()
+            with self.profiler.stage('save'):
+                patched = self._compact()
+            self._record_save(patched, time.perf_counter() - start)
+            if patched:
+                print("  (빠른 저장: 수정한 시트만 다시 기록)")
+            print(f"✓ 저장 완료: {os.path.basename(self.file_path)} ({self.last_save})")
             print(f"  경로: {self.file_path}")
+            self.print_profile()
         except Exception as e:
             print(f"❌ 저장 실패: {e}")
             print("  파일이 다른 프로그램에서 열려있다면 닫아주세요.")
+
+    def wait_save(self):
+        """백그라운드 저장이 있으면 끝날 때까지 기다려서 결과 기록 (실패하면 출력)"""
+        saving, self._saving = self._saving, None
+        if saving is None:
+            return
+        try:
+            patched = saving.wait()
+            self._record_save(patched, saving.seconds)
+        except Exception as e:
+            self.last_save = f"실패 ({e})"
+            print(f"\n❌ 백그라운드 저장 실패: {e}")
+            print("  파일이 다른 프로그램에서 열려있다면 닫고 다시 저장하세요. (입력은 저널에 남아 있음)")
+
+    def _record_save(self, patched, seconds):
+        """마지막 저장 시각/방식/소요 시간 기록 (메뉴와 저장 메시지에 표시)"""
+        self.save_seconds = seconds
+        size = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else None
+        mode = "빠른 저장" if patched else "전체 저장"
+        self.last_save = f"{time.strftime('%H:%M:%S')} {mode}, {format_save(seconds, size, self.compression)}"
+
+    def change_compression(self):
+        """저장 zip 압축 수준 변경 (큰 템플릿은 store/fast가 더 빠름)"""
+        names = list(COMPRESSION_LEVELS)
+        print("\n저장 압축 수준:")
+        for i, name in enumerate(names, 1):
+            print(f"  {i}. {name} - {COMPRESSION_LABELS[name]}")
+        print("  (store는 가장 빠르지만 파일이 커지고, fast는 default와 크기가 비슷하면서 더 빠름)")
+        choice = input(f"선택 (현재: {self.compression}): ").strip().lower()
+        if choice.isdigit() and 1 <= int(choice) <= len(names):
+            choice = names[int(choice) - 1]
+        if choice not in COMPRESSION_LEVELS:
+            print("❌ 잘못된 선택입니다!")
+            return
+        self.compression = choice
+        print(f"✓ 저장 압축 수준: {choice} ({COMPRESSION_LABELS[choice]}) - 마지막 저장 시간을 메뉴에서 비교하세요.")
+    
+    def _compact(self, verbose=True):
+        """지금까지의 입력을 워크북 파일에 반영하고 저널 비우기 (빠른 저장이면 True)
+
+        빠른 저장은 저장할 계획과 저널 기록만 잠금 안에서 떼어 두고 시트 XML은 잠금 밖에서
+        만들므로, 저장하는 동안의 입력은 새 기록으로 쌓였다가 다음 저장에 반영된다.
+        빠른 저장이 안 되면 잠금 안에서 같은 폴더의 임시 파일에 전체 저장한 뒤 교체하므로,
+        저장 중에 종료되어도 원본과 저널은 그대로 남는다.
+        """
+        with self._save_lock:
+            with self._lock:
+                # 저장할 기록을 저장 중 파일로 옮김 (교체 후 종료되어도 다시 적용하지 않도록)
+                if self.journal is not None:
+                    self.journal.begin_save()
+                plans = list(self._pending_plans)
+                journaled = self._journaled
+                patchable = self._can_patch()
+
+            if patchable:
+                try:
+                    patched = self._patch_save(verbose=verbose, plans=plans)
+                except Exception:
+                    with self._lock:
+                        if self.journal is not None:
+                            self.journal.abort_save()
+                    raise
+                if patched:
+                    with self._lock:
+                        del self._pending_plans[:len(plans)]
+                        self._journaled -= journaled
+                        if self.journal is not None:
+                            self.journal.end_save()
+                    return True
+
+            with self._lock:
+                # 전체 저장 - 빠른 저장을 시도하는 동안 들어온 입력도 워크북에 있으므로 함께 반영
+                if self.journal is not None:
+                    self.journal.begin_save()
+                folder = os.path.dirname(os.path.abspath(self.file_path))
+                fd, tmp_path = tempfile.mkstemp(suffix='.xlsx', dir=folder)
+                os.close(fd)
+                try:
+                    save_workbook(self.wb, tmp_path, self.compression)
+                    self._replace_file(tmp_path, self.file_path)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    if self.journal is not None:
+                        self.journal.abort_save()
+                    raise
+                del self._pending_plans[:]
+                self._direct_edits = False
+                if self.journal is not None:
+                    self.journal.end_save()
+                self._journaled = 0
+                return False
+
+    def _can_patch(self):
+        """남은 입력을 빠른 저장으로 반영할 수 있는지 (개별 입력이나 행 이동이 없을 때)"""
+        return not self._direct_edits and not any(plan.shifts for _, plan in self._pending_plans)
+
+    def _replace_file(self, tmp_path, dest_path):
+        """임시 파일로 dest_path 교체 - 작업 파일이면 교체 직전에 저널에 새 파일을 표시"""
+        if self.journal is not None and dest_path == self.file_path:
+            self.journal.mark_saved(tmp_path)
+        os.replace(tmp_path, dest_path)
+
+    def autosave(self):
+        """자동 저장 스레드에서 호출 - 저장하지 않은 입력이 있을 때만 조용히 저장"""
+        with self._lock:
+            if not self._journaled:
+                return
+        try:
+            self._compact(verbose=False)
+            self.last_autosave = time.strftime('%H:%M:%S')
+        except Exception as e:
+            # 실패해도 저널이 남아 있으므로 다음 주기 또는 수동 저장 때 다시 시도
+            self.last_autosave = f"실패 ({e})"
+
+    def recover_journal(self):
+        """지난 실행에서 저장하지 못한 입력(저널)이 있으면 다시 적용 (복구했으면 True)
+
+        저장 도중 종료된 경우 이미 워크북에 반영된 기록은 settle()이 먼저 걸러낸다.
+        """
+        self.journal.settle()
+        records = self.journal.read()
+        if not records:
+            self.journal.clear()
+            return False
+
+        print(f"\n⚠ 저장되지 않은 입력 {len(records)}건이 남아 있습니다. (비정상 종료)")
+        answer = input("복구할까요? (y/n, 기본값: y): ").strip().lower()
+        if answer == 'n':
+            self.journal.discard()
+            print("  복구하지 않고 기록을 백업해 두었습니다.")
+            return False
+
+        # 이미 기록된 입력이므로 다시 적용하는 동안에는 저널에 쓰지 않음
+        journal, self.journal = self.journal, None
+        try:
+            for sheet_name, plan, start_col, next_row, direct in records:
+                if sheet_name not in self.sheet_names:
+                    print(f"  ⚠ '{sheet_name}' 시트가 없어 건너뜁니다.")
+                    continue
+                self._use_sheet(sheet_name)
+                self.start_col = start_col
+                self.col_num = column_index_from_string(start_col)
+                self._commit_plan(plan, direct)
+                self.current_row = next_row
+        finally:
+            self.journal = journal
+        self._journaled = len(records)
+
+        print(f"✓ {len(records)}건 복구 완료 - 시트: {self.sheet_name}, 다음 입력 위치: {self.start_col}{self.current_row}")
+        self.save_file()
+        return True
+
+    def toggle_profiler(self):
+        """단계별 성능 측정 켜기/끄기"""
+        if self.profiler.enabled:
+            self.profiler.stop()
+            self.profiler = NULL_PROFILER
+            print("✓ 성능 측정을 껐습니다.")
+        else:
+            self.profiler = StageProfiler().start()
+            print("✓ 성능 측정을 켰습니다. (일괄 입력/저장 후 단계별 시간 표시)")
+
+    def toggle_upsert(self):
+        """항목 교체 모드 켜기/끄기"""
+        self.upsert = not self.upsert
+        if self.upsert:
+            print("✓ 항목 교체 모드를 켰습니다.")
+            print("  일괄 입력에서 시트에 있는 항목번호는 그 자리에 다시 쓰고 (행 수가 달라지면 아래 행 이동),")
+            print("  없는 항목번호는 번호 순서 자리에 끼워 넣습니다.")
+        else:
+            print("✓ 항목 교체 모드를 껐습니다. (현재 위치에 추가)")
+
+    def print_profile(self):
+        """측정 중이면 지금까지의 단계별 시간/메모리 출력 후 초기화"""
+        if not self.profiler.enabled:
+            return
+        print("\n⏱ 단계별 성능")
+        print("-" * 60)
+        for line in self.profiler.format_lines():
+            print(f"  {line}")
+        self.profiler.stop()
+        self.profiler = StageProfiler().start()
+
+    def _patch_save(self, dest_path=None, verbose=True, plans=None):
+        """일괄 입력만 있었다면 원본 파일에서 수정한 시트 XML만 다시 만들어 저장
+
+        일괄 입력 계획만 남아 있을 때 사용하고 (여러 시트도 가능),
+        그 외의 경우(개별 입력, 행 이동 등)는 False를 반환한다.
+        dest_path를 주면 원본 대신 그 경로에 저장한다. 저메모리 모드에서는 전체 저장으로
+        넘어가지 않고 XlsxPatchError를 그대로 낸다 (원본과 저장하지 않은 입력은 그대로).
+        plans를 주면 남은 계획 대신 그 계획들만 저장한다 (_compact가 잠금 안에서 떼어 둔 목록).
+        """
+        dest_path = dest_path or self.file_path
+        if plans is None:
+            plans = self._pending_plans
+        if self._direct_edits:
+            return False
+        if any(plan.shifts for _, plan in plans):
+            return False
+        sheet_plans = [(sheet, [plan]) for sheet, plan in plans] or [(self.sheet_name, [])]
+
+        # 같은 폴더의 임시 파일에 쓴 뒤 교체 (저장 중 실패해도 원본 보존)
+        folder = os.path.dirname(os.path.abspath(dest_path))
+        fd, tmp_path = tempfile.mkstemp(suffix='.xlsx', dir=folder)
+        try:
+            with os.fdopen(fd, 'w+b') as tmp:
+                patch_sheets(self.file_path, tmp, sheet_plans, self.compression)
+            self._replace_file(tmp_path, dest_path)
+        except XlsxPatchError as e:
+            os.remove(tmp_path)
+            if self.low_memory:
+                raise XlsxPatchError(f"저메모리 모드에서는 전체 저장을 할 수 없습니다: {e} "
+                                     f"(저메모리 모드를 끄고 다시 열면 전체 저장으로 처리)") from e
+            if verbose:
+                print(f"  빠른 저장 불가 ({e}) → 전체 저장으로 진행")
+            return False
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return True
     
+    def run_batch(self, file_path, lines, sheet_name=None, start_col='F', start_row=5, output_path=None):
+        """대화 없이 일괄 입력 실행 (스크립트/야간 작업용)
+
+        줄 분석(line_parser) / _batch_* 규칙은 대화형 일괄 입력과 같고,
+        처리 결과 요약을 dict로 반환한다. 가능하면 대상 시트 XML만 수정해서
+        저장하고, 안 되면 전체 워크북을 불러와 저장한다.
+        start_row가 None이면 입력 영역의 첫 빈 행부터 입력한다.
+        """
+        self.file_path = file_path
+        output_path = output_path or file_path
+        self.start_col = start_col.upper()
+        self.col_num = column_index_from_string(self.start_col)
+        self.wb = None
+
+        # 시트 목록/활성 시트만 확인 (workbook.xml만 읽어서 가볍게)
+        with self.profiler.stage('load'):
+            sheet_names, active_sheet = list_sheets(file_path)
+            sheet_name = sheet_name or active_sheet
+            if sheet_name not in sheet_names:
+                raise ValueError(f"'{sheet_name}' 시트를 찾을 수 없습니다. (시트: {', '.join(sheet_names)})")
+            self.sheet_names = sheet_names
+            self._use_sheet(sheet_name)
+            if start_row is None:
+                start_row = self._scan_free_row()
+
+        self.current_row = max(start_row, 5)
+        first_row = self.current_row
+
+        # [시트!셀] 지시문으로 나눈 구역 (없으면 구역 하나)
+        sections = split_sections(lines)
+        check_sheets(sections, sheet_names)
+
+        # 항목 교체 모드는 기존 항목 위치를 알아야 하므로 워크북을 먼저 불러옴
+        if self.upsert and self.wb is None:
+            with self.profiler.stage('load'):
+                self.wb = load_workbook(file_path)
+        self._use_sheet(sheet_name)
+
+        # 계획을 만들기 전에 모든 구역의 줄을 검사 (기본은 오류 줄이 하나라도 있으면 중단, 파일은 바뀌지 않음)
+        checked = []  # (인스턴스, 구역, 검사 결과, 시작 행)
+        workers = {}
+        for section in sections:
+            target = self._section_input(section, sheet_name, workers)
+            section_row = target.current_row
+            result = target.check_batch(section.lines, section.first_line_no,
+                                        None if self.upsert else section_row)
+            if not self.upsert:
+                target.current_row = section_row + result.rows
+            checked.append((target, section, result, section_row))
+        errors = [(target.sheet_name, *error) for target, _, result, _ in checked for error in result.errors]
+        if errors and self.on_error != 'skip':
+            raise BatchCheckError(errors, " (--on-error skip으로 오류 줄만 건너뛸 수 있음)")
+
+        # 구역마다 그 시트의 인스턴스로 계획 작성 (저장은 모든 구역을 모아 한 번)
+        targets = []  # (인스턴스, 시트 이름, 계획, 시작 행)
+        for target, section, result, section_row in checked:
+            if not self.upsert:
+                target.current_row = section_row
+            elif section.start_row is not None:
+                target.current_row = section_row = section.start_row
+            else:
+                section_row = target.current_row
+            targets.append((target, section.sheet or sheet_name,
+                            target.plan_checked(result), section_row))
+
+        # 기존 데이터를 덮어쓰는지 확인 (기본은 겹치면 중단, 파일은 바뀌지 않음)
+        if not self.upsert and self.on_conflict != 'force':
+            found = []
+            with self.profiler.stage('conflicts'):
+                for target, target_sheet, plan, _ in targets:
+                    conflicts = find_conflicts(plan, *target._occupied(plan))
+                    found.append((target_sheet, plan, conflicts))
+            conflicted = [(target_sheet, conflict[0]) for target_sheet, _, conflicts in found for conflict in conflicts]
+            if conflicted and self.on_conflict != 'skip':
+                names = [str(line_no) for _, line_no in conflicted[:10]]
+                if len(targets) > 1:
+                    names = [f"{line_no}({target_sheet})" for target_sheet, line_no in conflicted[:10]]
+                lines_text = ', '.join(names)
+                if len(conflicted) > 10:
+                    lines_text += f" 외 {len(conflicted) - 10}줄"
+                raise ValueError(f"기존 데이터와 겹치는 줄이 있어 중단했습니다: {lines_text}번째 줄 "
+                                 f"(--on-conflict skip/force로 건너뛰거나 덮어쓸 수 있음)")
+            for _, plan, conflicts in found:
+                plan.drop_lines({conflict[0] for conflict in conflicts})
+
+        plans = [plan for _, _, plan, _ in targets]
+        save_mode = self._save_plans([(target_sheet, plan) for _, target_sheet, plan, _ in targets], output_path)
+
+        summary = {
+            'file': file_path,
+            'output': output_path,
+            'sheet': sheet_name,
+            'start': f"{self.start_col}{first_row}",
+            'next_row': self.current_row,
+            'lines': sum(len(plan.entries) + len(plan.errors) + len(plan.skipped) for plan in plans),
+            'processed': sum(len(plan.entries) for plan in plans),
+            'failed': sum(len(plan.errors) for plan in plans),
+            'errors': [{'line': line_no, 'text': line, 'message': msg}
+                       for plan in plans for line_no, line, msg in plan.errors],
+            'skipped': [{'line': line_no, 'rows': f"{start}-{start + num_rows - 1}"}
+                        for plan in plans for line_no, start, num_rows in plan.skipped],
+            'parse_cache': cache_stats(sum(plan.cache_hits for plan in plans),
+                                       sum(plan.cache_misses for plan in plans)),
+            'save_mode': save_mode,
+            'save_seconds': round(self.save_seconds, 3),
+            'compression': self.compression,
+        }
+        if not is_single(sections):
+            summary['sheets'] = [{
+                'sheet': target_sheet,
+                'start': f"{target.start_col}{section_row}",
+                'processed': len(plan.entries),
+                'failed': len(plan.errors),
+            } for target, target_sheet, plan, section_row in targets]
+        return summary
+
+    def run_measurements(self, file_path, lines, sheet_name=None, start_col='F',
+                         sample_col=None, judge_col=None, output_path=None):
+        """대화 없이 측정값 가져오기/판정 실행 - 처리 결과와 OK/NG 요약을 dict로 반환
+
+        규격 열을 읽어야 하므로 워크북을 불러오고, 저장은 run_batch와 같이
+        가능하면 대상 시트 XML만 수정한다.
+        """
+        self.file_path = file_path
+        output_path = output_path or file_path
+        self.start_col = start_col.upper()
+        self.col_num = column_index_from_string(self.start_col)
+        sample_col = column_index_from_string(sample_col.upper()) if sample_col else None
+        judge_col = column_index_from_string(judge_col.upper()) if judge_col else None
+
+        with self.profiler.stage('load'):
+            self.wb = load_workbook(file_path)
+        self.sheet_names = self.wb.sheetnames
+        sheet_name = sheet_name or self.wb.active.title
+        if sheet_name not in self.sheet_names:
+            raise ValueError(f"'{sheet_name}' 시트를 찾을 수 없습니다. (시트: {', '.join(self.sheet_names)})")
+        self._use_sheet(sheet_name)
+
+        plan, measured = plan_measurements(self.ws, self.col_num, lines, sample_col, judge_col, self.profiler)
+        save_mode = self._save_plans([(sheet_name, plan)], output_path)
+
+        return {
+            'file': file_path,
+            'output': output_path,
+            'sheet': sheet_name,
+            'lines': len(lines),
+            'processed': len(plan.entries),
+            'failed': len(plan.errors),
+            'errors': [{'line': line_no, 'text': line, 'message': msg}
+                       for line_no, line, msg in plan.errors],
+            'measurements': measured,
+            'save_mode': save_mode,
+            'save_seconds': round(self.save_seconds, 3),
+            'compression': self.compression,
+        }
+
+    def _save_plans(self, sheet_plans, output_path):
+        """계획들을 한 번에 저장 ('patch' 수정한 시트 XML만 다시 만듦 / 'full' 워크북에 적용 후 전체 저장)
+
+        sheet_plans: [(시트 이름, 계획)] - 빠른 저장이 안 되면 워크북을 (아직 안 불러왔으면)
+        한 번만 불러와서 계획을 차례로 적용한다. 저메모리 모드에서는 불러오지 않고 오류를 낸다.
+        """
+        self._pending_plans = list(sheet_plans)
+        self._direct_edits = False
+        start = time.perf_counter()
+        try:
+            with self.profiler.stage('save'):
+                if self._patch_save(output_path):
+                    self.save_seconds = time.perf_counter() - start
+                    return 'patch'
+            if self.wb is None:
+                with self.profiler.stage('load'):
+                    self.wb = load_workbook(self.file_path)
+            for sheet_name, plan in sheet_plans:
+                self._use_sheet(sheet_name)
+                with self.profiler.stage('index'):
+                    merge_index = MergedRangeIndex(self.ws, plan.min_col, plan.max_col)
+                apply_plan(plan, self.ws, merge_index, self.profiler)
+            save_start = time.perf_counter()
+            with self.profiler.stage('save'):
+                save_workbook(self.wb, output_path, self.compression)
+            self.save_seconds = time.perf_counter() - save_start
+            return 'full'
+        finally:
+            self._pending_plans = []
+
+    def run_new_report(self, output_path, lines, sheet_name=None, start_col='F', start_row=5):
+        """템플릿 없이 일괄 입력 블록만 담은 새 성적서 생성
+
+        워크시트를 메모리에 만들지 않고 쓰기 전용 워크북에 행 단위로 바로 기록하므로
+        줄 수가 많아도 메모리 사용이 일정하다. 기존 파일은 덮어쓰지 않는다.
+        """
+        if os.path.exists(output_path):
+            raise ValueError(f"이미 있는 파일입니다: {output_path}")
+
+        sheet_name = sheet_name or "검사성적서"
+        self.file_path = output_path
+        self.start_col = start_col.upper()
+        self.col_num = column_index_from_string(self.start_col)
+        self.current_row = max(start_row or 5, 5)
+        first_row = self.current_row
+
+        # 같은 폴더의 임시 파일에 다 쓴 뒤 교체 (중간에 실패해도 반쪽 파일이 남지 않음)
+        fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=os.path.dirname(os.path.abspath(output_path)))
+        os.close(fd)
+        try:
+            stats = write_report(temp_path, sheet_name, self.iter_plans(lines), self.profiler, self.compression)
+            os.replace(temp_path, output_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        return {
+            'file': None,
+            'output': output_path,
+            'sheet': sheet_name,
+            'start': f"{self.start_col}{first_row}",
+            'next_row': self.current_row,
+            'lines': stats['processed'] + len(stats['errors']),
+            'processed': stats['processed'],
+            'failed': len(stats['errors']),
+            'errors': [{'line': line_no, 'text': line, 'message': msg}
+                       for line_no, line, msg in stats['errors']],
+            'parse_cache': cache_stats(stats['cache_hits'], stats['cache_misses']),
+            'save_mode': 'new',
+            'compression': self.compression,
+        }
+
     def save_and_exit(self):
         self.save_file()
         print("\n프로그램을 종료합니다.")
     
     def show_position(self):
         print(f"\n📍 현재 상태:")
-        print(f"  - 시트: {self.ws.title}")
+        print(f"  - 시트: {self.sheet_name}")
         print(f"  - 위치: {self.start_col}{self.current_row}")
     
     def change_position(self):
         try:
-            new_row = int(input(f"\n새로운 행 번호 (현재: {self.current_row}): "))
-            self.current_row = max(new_row, 5)
+            free_row = self._free_row()
+            text = input(f"\n새로운 행 번호 (현재: {self.current_row}, Enter: 첫 빈 행 {free_row}): ").strip()
+            self.current_row = max(int(text), 5) if text else free_row
             print(f"✓ 위치 변경: {self.start_col}{self.current_row}")
+            self._warn_overwrite()
         except ValueError:
             print("❌ 올바른 숫자를 입력해주세요.")
 
+    def _free_row(self):
+        """현재 시트 입력 영역의 첫 빈 행 (시트/시작 열별로 캐시, 입력하면 다시 계산)"""
+        key = (self.sheet_name, self.col_num)
+        if key not in self._free_rows:
+            if self.ws is not None:
+                self._free_rows[key] = next_free_row(self.ws, self.col_num)
+            else:
+                self._free_rows[key] = self._scan_free_row()
+        return self._free_rows[key]
+
+    def _scan_free_row(self):
+        """워크북 없이 파일에서 찾은 첫 빈 행 - 아직 저장하지 않은 계획이 쓴 행도 반영"""
+        min_col, max_col = self.col_num, self.col_num + 6
+        # 저장(파일 교체) 중에 파일을 읽지 않도록 잠금
+        with self._lock:
+            try:
+                row = scan_free_row(self.file_path, self.sheet_name, self.col_num)
+            except XlsxPatchError as e:
+                row = next_free_row(self._fallback_sheet(e), self.col_num)
+            for sheet_name, plan in self._pending_plans:
+                if sheet_name != self.sheet_name:
+                    continue
+                for cell_row, col, value in plan.cells():
+                    if min_col <= col <= max_col and value is not None and value != '':
+                        row = max(row, cell_row + 1)
+                for start_row, num_rows, col in plan.merges:
+                    if min_col <= col <= max_col:
+                        row = max(row, start_row + num_rows)
+        return row
+
+    def _occupied(self, plan):
+        """계획이 쓸 행의 기존 값/병합 (occupied_cells()와 같은 형식)
+
+        워크북 없이 (저메모리 모드, 비대화형 일괄 입력) 파일과 아직 저장하지 않은 계획에서 찾는다.
+        """
+        intervals = target_rows(plan)
+        if self.ws is not None:
+            return occupied_cells(self.ws, intervals, plan.min_col, plan.max_col)
+        with self._lock:
+            try:
+                cells, merges = scan_occupied(self.file_path, self.sheet_name, intervals, plan.min_col, plan.max_col)
+            except XlsxPatchError as e:
+                cells, merges = occupied_cells(self._fallback_sheet(e), intervals, plan.min_col, plan.max_col)
+            for sheet_name, pending in self._pending_plans:
+                if sheet_name != self.sheet_name:
+                    continue
+                for row, col, value in pending.cells():
+                    if (plan.min_col <= col <= plan.max_col and value is not None and value != ''
+                            and any(start_row <= row <= end_row for start_row, end_row in intervals)):
+                        cells.append((row, col))
+                for start_row, num_rows, col in pending.merges:
+                    merged = CellRange(min_col=col, min_row=start_row, max_col=col, max_row=start_row + num_rows - 1)
+                    if (plan.min_col <= col <= plan.max_col
+                            and any(merged.min_row <= end_row and merged.max_row >= start_row
+                                    for start_row, end_row in intervals)):
+                        merges.append(merged)
+        return cells, merges
+
+    def _fallback_sheet(self, error):
+        """파일에서 바로 읽을 수 없는 시트 XML(네임스페이스 접두사 등)이면 워크북을 불러와 현재 시트를 반환
+
+        전체 저장과 같이 저메모리 모드에서는 불러오지 않고 XlsxPatchError를 낸다.
+        """
+        if self.low_memory:
+            raise XlsxPatchError(f"저메모리 모드에서는 이 시트를 읽을 수 없습니다: {error} "
+                                 f"(저메모리 모드를 끄고 다시 열면 워크북을 불러와 처리)") from error
+        if self.wb is None:
+            with self.profiler.stage('load'):
+                self.wb = load_workbook(self.file_path)
+        self._use_sheet(self.sheet_name)
+        return self.ws
+
+    def _warn_overwrite(self):
+        """현재 위치가 이미 입력된 데이터 위쪽이면 덮어쓸 수 있다고 알림"""
+        free_row = self._free_row()
+        if self.current_row < free_row:
+            print(f"⚠ {self.current_row}행부터 {free_row - 1}행까지 이미 데이터가 있습니다. "
+                  f"이 위치부터 입력하면 덮어씁니다. (첫 빈 행: {free_row})")
+
 if __name__ == "__main__":
+    # 인자가 있으면 비대화형 모드로 실행 (cli.py와 같음)
+    if len(sys.argv) > 1:
+        from cli import main
+        sys.exit(main())
+
     try:
         app = EasyExcelInput()
         app.run()
     except KeyboardInterrupt:
         print("\n\n프로그램이 사용자에 의해 중단되었습니다.")
+        if app.journal is not None and app.journal.exists():
+            print("  저장하지 않은 입력은 다음에 같은 파일을 열 때 복구할 수 있습니다.")
     except Exception as e:
         print(f"\n❌ 예상치 못한 오류: {e}")
         input("\nEnter를 눌러 종료...")
\ No newline at end of file
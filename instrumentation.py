@@ -0,0 +1,128 @@
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+# 보고서에 표시할 단계 순서 (없는 단계는 건너뜀)
+STAGE_ORDER = ['load', 'items', 'detect', 'rules', 'judge', 'conflicts', 'index', 'shift', 'unmerge', 'write', 'merge', 'save']
+
+STAGE_LABELS = {
+    'load': '파일 로드',
+    'items': '항목 인덱스',
+    'detect': '줄 분석 (유형/값)',
+    'rules': '입력 규칙 (계획)',
+    'judge': '측정값 판정',
+    'conflicts': '덮어쓰기 확인',
+    'index': '병합 인덱스',
+    'shift': '행 이동',
+    'unmerge': '병합 해제',
+    'write': '셀 쓰기',
+    'merge': '병합/정렬',
+    'save': '저장',
+}
+
+
+class StageProfiler:
+    """단계별 시간, 호출 횟수, 최대 메모리 측정 (성능 측정을 켰을 때만 사용)"""
+
+    enabled = True
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.times = {}
+        self.calls = {}
+        self.peaks = {}
+        self.counters = {}
+        self._started_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.times[name] = self.times.get(name, 0.0) + elapsed
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] - before
+                self.peaks[name] = max(self.peaks.get(name, 0), peak)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        """JSON으로 저장할 수 있는 측정 결과"""
+        names = [n for n in STAGE_ORDER if n in self.times]
+        names += sorted(n for n in self.times if n not in STAGE_ORDER)
+        stages = []
+        for name in names:
+            stages.append({
+                'stage': name,
+                'label': STAGE_LABELS.get(name, name),
+                'seconds': round(self.times[name], 6),
+                'calls': self.calls[name],
+                'peak_bytes': self.peaks.get(name),
+            })
+
+        report = {
+            'stages': stages,
+            'total_seconds': round(sum(self.times.values()), 6),
+            'counters': dict(self.counters),
+        }
+        lines = self.counters.get('lines', 0)
+        if lines:
+            report['cells_per_line'] = round(self.counters.get('cells', 0) / lines, 2)
+        return report
+
+    def format_lines(self):
+        """화면 출력용 요약 줄 목록"""
+        report = self.report()
+        result = []
+        for stage in report['stages']:
+            text = f"{stage['label']:<12} {stage['seconds'] * 1000:>10.1f} ms  ({stage['calls']}회)"
+            if stage['peak_bytes'] is not None:
+                text += f"  최대 {stage['peak_bytes'] / 1048576:.1f} MB"
+            result.append(text)
+        result.append(f"{'합계':<12} {report['total_seconds'] * 1000:>10.1f} ms")
+        if 'cells_per_line' in report:
+            result.append(f"줄당 셀 쓰기: {report['cells_per_line']}개 "
+                          f"(총 {report['counters'].get('cells', 0)}개 / {report['counters']['lines']}줄)")
+        return result
+
+
+class NullProfiler:
+    """성능 측정을 끈 경우의 기본값 - 아무것도 기록하지 않음"""
+
+    enabled = False
+    _null = nullcontext()
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def stage(self, name):
+        return self._null
+
+    def count(self, name, n=1):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,145 @@
+import re
+from bisect import bisect_left
+
+
+def item_key(value):
+    """셀 값을 항목번호 문자열로 (엑셀에서 숫자로 입력한 51.0도 '51')"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    key = str(value).strip()
+    return key or None
+
+
+def natural_key(item_no):
+    """숫자 부분은 숫자로 비교하는 정렬 키 ('9' < '10' < '10a')"""
+    return tuple((0, int(part), '') if part.isdigit() else (1, 0, part)
+                 for part in re.split(r'(\d+)', item_no) if part)
+
+
+def next_free_row(ws, col, first_row=5):
+    """입력 영역(col부터 7개 열)에서 마지막으로 사용 중인 행의 다음 행
+
+    맨 아래 행(max_row)부터 위로 올라가며 값이 있는 행을 찾으므로 시트 크기와
+    관계없이 끝부분 몇 행만 확인한다. 입력 영역에 걸친 병합 범위의 끝 행도 사용 중으로 본다.
+    워크북을 불러오지 않고 파일에서 바로 찾을 때는 xlsx_patch.scan_free_row()를 쓴다.
+    """
+    last = first_row - 1
+    for merged in ws.merged_cells.ranges:
+        if merged.min_col <= col + 6 and merged.max_col >= col and merged.max_row > last:
+            last = merged.max_row
+
+    cells = ws._cells
+    for row in range(ws.max_row, last, -1):
+        for c in range(col, col + 7):
+            cell = cells.get((row, c))
+            if cell is not None and cell.value is not None and cell.value != '':
+                return row + 1
+    return last + 1
+
+
+class ItemIndex:
+    """항목번호 → 행 블록 (시작 행, 행 수) 인덱스
+
+    시트마다 한 번 입력 영역(항목번호 열부터 7개 열)을 읽어서 만든다.
+    항목번호가 있는 행에서 블록이 시작하고, 다음 항목번호 전까지 값이 있는 행
+    (또는 항목번호 셀의 병합 범위)까지가 그 항목의 블록이다.
+    같은 항목번호가 여러 번 있으면 처음 것만 찾는다.
+    """
+
+    def __init__(self, ws, col, first_row=5):
+        self.ws = ws
+        self.col = col
+        self.first_row = first_row
+        self._starts = []   # 블록 시작 행 (오름차순)
+        self._blocks = []   # [시작 행, 행 수, 항목번호] (_starts와 같은 순서)
+        self._items = {}    # 항목번호 -> 블록
+
+        merged_ends = {merged.min_row: merged.max_row for merged in ws.merged_cells.ranges
+                       if merged.min_col == col and merged.max_col == col}
+
+        # ws.iter_rows()는 없는 셀을 새로 만들므로 셀 사전에서 바로 읽음
+        get = ws._cells.get
+        block = None
+        for row in range(first_row, ws.max_row + 1):
+            cell = get((row, col))
+            key = item_key(cell.value) if cell is not None else None
+            if key is not None:
+                block = [row, 1, key]
+                self._blocks.append(block)
+            elif block is not None:
+                for c in range(col + 1, col + 7):
+                    cell = get((row, c))
+                    if cell is not None and cell.value is not None:
+                        block[1] = row - block[0] + 1
+                        break
+
+        for block in self._blocks:
+            merged_end = merged_ends.get(block[0])
+            if merged_end is not None:
+                block[1] = max(block[1], merged_end - block[0] + 1)
+            self._starts.append(block[0])
+            self._items.setdefault(block[2], block)
+
+        keys = [natural_key(block[2]) for block in self._blocks]
+        # 항목번호 순서로 정리된 시트에서만 새 항목을 번호 순서 자리에 끼워 넣음
+        self.ordered = all(a <= b for a, b in zip(keys, keys[1:]))
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def blocks(self):
+        """항목 블록 목록 [(시작 행, 행 수, 항목번호)] - 시트 순서, 같은 항목번호는 처음 것만"""
+        return [tuple(block) for block in self._blocks if self._items.get(block[2]) is block]
+
+    def end_row(self):
+        """마지막 블록의 끝 행 (블록이 없으면 첫 데이터 행 바로 위)"""
+        if not self._blocks:
+            return self.first_row - 1
+        return max(start + num_rows - 1 for start, num_rows, _ in self._blocks)
+
+    def find(self, item_no):
+        """항목의 (시작 행, 행 수) - 없으면 None"""
+        block = self._items.get(item_no)
+        return (block[0], block[1]) if block is not None else None
+
+    def insert_row(self, item_no):
+        """새 항목을 번호 순서에 맞게 넣을 행 (뒤에 올 항목의 시작 행) - 맨 뒤거나 순서가 없으면 None"""
+        if not self.ordered:
+            return None
+        key = natural_key(item_no)
+        for block in self._blocks:
+            if natural_key(block[2]) > key:
+                return block[0]
+        return None
+
+    def shift(self, from_row, delta):
+        """from_row부터 시작하는 블록을 delta 행만큼 이동 (BatchPlan.shift와 같은 기준)"""
+        if not delta:
+            return
+        for i in range(bisect_left(self._starts, from_row), len(self._starts)):
+            self._starts[i] += delta
+            self._blocks[i][0] += delta
+
+    def put(self, item_no, start_row, num_rows):
+        """항목 블록 등록/갱신 - 새 블록과 시작 행이 겹치는 기존 블록은 제거"""
+        end_row = start_row + num_rows - 1
+        lo = bisect_left(self._starts, start_row)
+        hi = lo
+        while hi < len(self._starts) and self._starts[hi] <= end_row:
+            old = self._blocks[hi]
+            if self._items.get(old[2]) is old:
+                del self._items[old[2]]
+            hi += 1
+
+        block = [start_row, num_rows, item_no]
+        self._starts[lo:hi] = [start_row]
+        self._blocks[lo:hi] = [block]
+        self._items[item_no] = block
+
+        if self.ordered:
+            key = natural_key(item_no)
+            if ((lo > 0 and natural_key(self._blocks[lo - 1][2]) > key)
+                    or (lo + 1 < len(self._blocks) and natural_key(self._blocks[lo + 1][2]) < key)):
+                self.ordered = False
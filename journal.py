@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+
+from batch_plan import BatchPlan
+
+
+# 자동 저장(저널을 워크북에 반영) 간격 (초)
+AUTOSAVE_INTERVAL = 60
+
+
+def journal_path(workbook_path):
+    """작업 파일 옆의 저널 파일 경로 (예: 검사.xlsx → 검사.xlsx.journal)"""
+    return workbook_path + '.journal'
+
+
+class EditJournal:
+    """저장 전 입력 기록 - 한 줄에 JSON 하나씩 추가만 하는 파일
+
+    입력할 때마다 바로 디스크에 기록하고, 워크북에 저장(반영)하면 지운다.
+    프로그램이 비정상 종료되면 다음 실행 때 남은 기록을 다시 적용해서 복구한다.
+    여러 스레드에서 쓸 때는 호출하는 쪽에서 순서를 맞춘다 (EasyExcelInput._lock).
+
+    저장할 때는 그때까지의 기록을 저장 중 파일(.saving)로 옮기고(begin_save), 워크북을
+    교체하기 직전에 새 파일의 크기/수정 시각을 끝에 적는다(mark_saved). 교체와 기록 삭제
+    사이에 종료되면 다음 실행의 settle()이 워크북이 그 파일인지 보고 이미 반영된 기록을
+    버리므로, 행 이동이 있는 계획(항목 교체)도 두 번 적용되지 않는다.
+    """
+
+    def __init__(self, workbook_path):
+        self.workbook_path = workbook_path
+        self.path = journal_path(workbook_path)
+        self.saving_path = self.path + '.saving'
+
+    def exists(self):
+        return os.path.exists(self.path) or os.path.exists(self.saving_path)
+
+    def append(self, sheet_name, plan, start_col, next_row, direct=False):
+        record = {
+            'sheet': sheet_name,
+            'start_col': start_col,
+            'next_row': next_row,
+            'direct': direct,
+            'plan': plan.to_dict(),
+        }
+        _append_line(self.path, json.dumps(record, ensure_ascii=False))
+
+    def read(self):
+        """남은 기록 목록 [(시트 이름, 계획, 시작 열, 다음 행, 개별 입력 여부)]
+
+        기록 도중 종료되어 잘린 마지막 줄은 건너뛴다. 저장 중 기록은 먼저 settle()로 정리한다.
+        """
+        return [(record['sheet'], BatchPlan.from_dict(record['plan']),
+                 record['start_col'], record['next_row'], record.get('direct', False))
+                for record in _read_records(self.path)]
+
+    def clear(self):
+        """워크북에 모두 반영된 기록 삭제"""
+        for path in (self.saving_path, self.path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def discard(self):
+        """복구하지 않기로 한 기록을 .bak으로 옮겨 보관"""
+        self.settle()
+        if os.path.exists(self.path):
+            os.replace(self.path, self.path + '.bak')
+
+    def begin_save(self):
+        """지금까지의 기록을 저장 중 파일로 옮김 - 이후 입력은 새 기록 파일에 쌓임
+
+        이전 저장이 실패해서 저장 중 파일이 남아 있으면 그 뒤에 이어 붙인다.
+        """
+        if not os.path.exists(self.path):
+            return
+        if not os.path.exists(self.saving_path):
+            os.replace(self.path, self.saving_path)
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                _append_line(self.saving_path, line.rstrip('\n'))
+        os.remove(self.path)
+
+    def mark_saved(self, saved_path):
+        """워크북을 saved_path로 교체하기 직전에 호출 - 교체 후 파일을 알아볼 수 있게 크기/수정 시각 기록"""
+        if not os.path.exists(self.saving_path):
+            return
+        stat = os.stat(saved_path)
+        _append_line(self.saving_path, json.dumps({'saved': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}}))
+
+    def end_save(self):
+        """워크북 교체가 끝남 - 저장 중 파일의 기록은 모두 반영됨"""
+        if os.path.exists(self.saving_path):
+            os.remove(self.saving_path)
+
+    def abort_save(self):
+        """저장 실패 - 저장 중 파일의 기록을 새 기록 앞에 되돌림"""
+        self._restore()
+
+    def settle(self):
+        """지난 실행에서 저장 도중 종료되어 남은 저장 중 파일 정리 (시작할 때 read() 전에 호출)
+
+        워크북이 이미 기록된 크기/수정 시각의 파일이면 교체까지 끝난 것이므로 버리고,
+        아니면 (교체 전에 종료) 기록 앞에 되돌린다.
+        """
+        if not os.path.exists(self.saving_path):
+            return
+        marker = None
+        for record in _read_records(self.saving_path, markers=True):
+            if 'saved' in record:
+                marker = record['saved']
+        if marker is not None and os.path.exists(self.workbook_path):
+            stat = os.stat(self.workbook_path)
+            if stat.st_size == marker['size'] and stat.st_mtime_ns == marker['mtime_ns']:
+                os.remove(self.saving_path)
+                return
+        self._restore()
+
+    def _restore(self):
+        if not os.path.exists(self.saving_path):
+            return
+        lines = [json.dumps(record, ensure_ascii=False) for record in _read_records(self.saving_path)]
+        lines += [json.dumps(record, ensure_ascii=False) for record in _read_records(self.path)]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(line + '\n' for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        os.remove(self.saving_path)
+
+
+def _append_line(path, line):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(line + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_records(path, markers=False):
+    """기록 파일의 JSON 줄 목록 (잘린 줄은 건너뜀, markers=False면 저장 표시 줄도 뺌)"""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if markers or 'saved' not in record:
+                records.append(record)
+    return records
+
+
+class AutoSaver:
+    """일정 간격으로 save()를 호출하는 백그라운드 스레드"""
+
+    def __init__(self, save, interval=AUTOSAVE_INTERVAL):
+        self.save = save
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='autosave', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
@@ -0,0 +1,254 @@
+import re
+from collections import OrderedDict, namedtuple
+
+
+# 일괄 입력 한 줄의 분석 결과
+#   kind      : 'simple' | 'position' | 'reference' | 'mmc'
+#   item_no   : 항목번호 (문자열 그대로)
+#   count     : 행 개수 (MMC는 세트 개수)
+#   base      : 계산용 기준값 (참고 값에서 숫자로 바꿀 수 없으면 None, MMC는 MMC 공차)
+#   label     : 기준값 열에 쓸 값 (단순은 숫자, 위치도/참고는 원본 문자열, MMC는 '0.2ⓜ')
+#   upper_tol : 상한공차 (참고 값에서 공차가 없으면 None)
+#   lower_tol : 하한공차 (양수로 입력해도 음수로 변환, MMC는 MMC 공차)
+#   ref       : REF 열에 쓸 값
+#   max_val   : MMC MAX값 (숫자로 바꿀 수 있으면 float, 없으면 None)
+#   lower_calc: 하한계산값 (기준 + 하한공차, MMC는 0, 참고 값에서 공차가 없으면 None)
+#   upper_calc: 상한계산값 (기준 + 상한공차, MMC는 MMC 공차, 참고 값에서 공차가 없으면 None)
+ParsedLine = namedtuple('ParsedLine', ['kind', 'item_no', 'count', 'base', 'label',
+                                       'upper_tol', 'lower_tol', 'ref', 'max_val',
+                                       'lower_calc', 'upper_calc'])
+
+# namedtuple 생성자(파이썬 함수)를 거치지 않고 바로 튜플을 만듦 - 줄마다 호출되므로
+_new_record = tuple.__new__
+
+# MMC 공차 표기에서 숫자 이외의 표시 ('mmc', 'm', 괄호) - 소문자로 바꾼 뒤 적용
+_MMC_MARKS = re.compile(r'mmc|[()m]')
+
+_NO_DIAMETER = str.maketrans('', '', 'Øø')
+_NO_PARENS = str.maketrans('', '', '()')
+
+# 줄 분석 캐시에 보관할 최대 줄 수 (항목번호를 뺀 나머지가 다른 줄 수)
+PARSE_CACHE_SIZE = 4096
+
+# 항목번호에 들어 있으면 유형 감지가 달라지는 표시 - 이런 줄은 캐시하지 않음
+_DETECT_MARKS = ('ref', '참고', 'mmc')
+
+_MISSING = object()
+
+
+def parse_line(line, kind=None):
+    """일괄 입력 한 줄의 유형 감지와 필드 변환을 한 번에 처리
+
+    감지 순서는 참고 값 → MMC → 위치도 → 단순 측정값이고, 유형을 알 수 없으면 None.
+    kind를 주면 (표 가져오기의 유형 열) 감지 없이 그 유형으로 변환한다.
+    유형은 맞지만 숫자 변환 등이 실패하면 ValueError.
+    항목이 2개 미만인 줄(쉼표 없음)은 호출하기 전에 걸러야 한다.
+    """
+    # int()/float()는 앞뒤 공백을 무시하므로 숫자 항목은 공백 제거 없이 바로 변환
+    parts = line.split(',')
+    try:
+        return _parse(parts, line, kind)
+    except ValueError:
+        # 오류 메시지에 공백이 섞이지 않도록 공백을 제거한 항목으로 다시 분석
+        return _parse([part.strip() for part in parts], line, kind)
+
+
+def _parse(parts, line, kind=None):
+    num_parts = len(parts)
+    value = parts[2].strip() if num_parts >= 3 else ''
+    if kind is not None:
+        return _parse_kind(kind, parts, value)
+    line_lower = line.lower()
+
+    # 1. 참고 값 - 기준값이 괄호로 싸여있거나 REF/참고 키워드 포함
+    if num_parts >= 3 and (('(' in value and ')' in value)
+                           or 'ref' in line_lower or '참고' in line_lower):
+        return _parse_reference(parts, value)
+
+    # 2. MMC 공차 - 'mmc' 키워드 또는 기준값에 'm' 포함 ('mm' 단위 표기는 제외)
+    value_lower = value.lower()
+    if 'mmc' in line_lower or ('m' in value_lower and 'mm' not in value_lower):
+        return _parse_mmc(parts, value_lower)
+
+    if num_parts >= 5:
+        # 3. 위치도 값 - 기준값에 Ø 포함
+        if 'ø' in value_lower:
+            return _parse_tolerance('position', parts, value)
+        # 6개 항목이고 상한/하한이 숫자면 위치도
+        if num_parts == 6:
+            try:
+                upper_tol = float(parts[3])
+                lower_tol = float(parts[4])
+            except ValueError:
+                pass
+            else:
+                return _parse_tolerance('position', parts, value, upper_tol, lower_tol)
+
+        # 4. 단순 측정값 (5개 항목 이상, 기본값)
+        return _parse_tolerance('simple', parts, value)
+
+    return None
+
+
+def _parse_kind(kind, parts, value):
+    """유형을 정해 준 줄의 필드 변환"""
+    if kind in ('simple', 'position'):
+        if len(parts) < 5:
+            raise ValueError("형식: 항목번호, 행개수, 기준값, 상한공차, 하한공차")
+        return _parse_tolerance(kind, parts, value)
+    if kind == 'reference':
+        if len(parts) < 3:
+            raise ValueError("형식: 항목번호, 행개수, (기준값), [상한공차], [하한공차], [REF]")
+        return _parse_reference(parts, value)
+    if kind == 'mmc':
+        return _parse_mmc(parts, value.lower())
+    raise ValueError(f"알 수 없는 유형: {kind}")
+
+
+def _count(text, label="행 개수"):
+    """행/세트 개수 - 1보다 작으면 ValueError (0이나 음수면 입력 위치가 뒤로 가므로)"""
+    count = int(text)
+    if count < 1:
+        raise ValueError(f"{label}는 1 이상이어야 합니다: {count}")
+    return count
+
+
+def _parse_tolerance(kind, parts, value, upper_tol=None, lower_tol=None):
+    """단순 측정값 / 위치도 값: 항목번호, 행개수, 기준값, 상한공차, 하한공차, [REF]"""
+    rows = _count(parts[1])
+    base = float(value.translate(_NO_DIAMETER) if kind == 'position' else value)
+    if upper_tol is None:
+        upper_tol = float(parts[3])
+        lower_tol = float(parts[4])
+
+    # 하한공차가 양수로 입력되면 자동으로 마이너스 붙이기
+    if lower_tol > 0:
+        lower_tol = -lower_tol
+
+    ref = parts[5].strip() if len(parts) > 5 else ""
+    # 위치도는 Ø가 포함된 문자열 그대로 표시
+    label = value if kind == 'position' else base
+    return _new_record(ParsedLine, (kind, parts[0].strip(), rows, base, label,
+                                    upper_tol, lower_tol, ref, None,
+                                    base + lower_tol, base + upper_tol))
+
+
+def _parse_reference(parts, value):
+    """참고 값: 항목번호, 행개수, (기준값), [상한공차], [하한공차], [REF]"""
+    rows = _count(parts[1])
+    num_parts = len(parts)
+    has_tolerances = num_parts >= 5 and bool(parts[3].strip()) and bool(parts[4].strip())
+
+    base = upper_tol = lower_tol = None
+    if has_tolerances:
+        try:
+            base = float(value.translate(_NO_PARENS))  # 괄호 제거한 값으로 계산
+            upper_tol = float(parts[3])
+            lower_tol = float(parts[4])
+            if lower_tol > 0:
+                lower_tol = -lower_tol
+        except ValueError:
+            # 숫자 변환 실패하면 공차 열은 '-'로 표시
+            base = upper_tol = lower_tol = None
+
+    if has_tolerances and num_parts > 5:
+        ref = parts[5].strip()
+    elif not has_tolerances and num_parts > 3:
+        ref = parts[3].strip()
+    else:
+        ref = "참고"
+
+    lower_calc = upper_calc = None
+    if upper_tol is not None:
+        lower_calc = base + lower_tol
+        upper_calc = base + upper_tol
+
+    # 기준값은 괄호 포함 문자열 그대로 표시
+    return _new_record(ParsedLine, ('reference', parts[0].strip(), rows, base, value,
+                                    upper_tol, lower_tol, ref, None, lower_calc, upper_calc))
+
+
+def _parse_mmc(parts, value_lower):
+    """MMC 공차: 항목번호, 세트개수, MMC공차, [MAX값], [REF]"""
+    if len(parts) < 3:
+        raise ValueError("형식: 항목번호, 세트개수, MMC공차, [MAX값]")
+
+    num_sets = _count(parts[1], "세트 개수")
+    mmc_tol = float(_MMC_MARKS.sub('', value_lower).strip())
+
+    max_val = None
+    if len(parts) > 3:
+        text = parts[3].strip()
+        if text:
+            try:
+                max_val = float(text)
+            except ValueError:
+                max_val = text
+
+    ref = parts[4].strip() if len(parts) > 4 else ""
+    return _new_record(ParsedLine, ('mmc', parts[0].strip(), num_sets, mmc_tol, f"{mmc_tol}ⓜ",
+                                    0, mmc_tol, ref, max_val, 0, mmc_tol))
+
+
+class ParseCache:
+    """parse_line() 결과를 줄 내용으로 기억하는 LRU 캐시
+
+    같은 규격(위치도 공차 등)이 항목번호만 바꿔 수백 번 반복되는 일괄 입력을 위해
+    항목번호를 뺀 나머지(첫 쉼표 뒤)와 유형을 키로 쓰고, 찾으면 항목번호만 바꿔서 돌려준다.
+    유형을 알 수 없는 줄(None)과 변환 오류도 기억한다. 최근에 쓰지 않은 줄부터 버려서
+    maxsize개를 넘지 않는다. hits/misses는 누적 값이므로 일괄 입력마다 차이를 센다.
+    """
+
+    def __init__(self, maxsize=PARSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._records = OrderedDict()
+
+    def __len__(self):
+        return len(self._records)
+
+    def parse(self, line, kind=None):
+        """parse_line()과 같음 (결과, 예외 모두)"""
+        item_no, _, rest = line.partition(',')
+        item_lower = item_no.lower()
+        if any(mark in item_lower for mark in _DETECT_MARKS):
+            self.misses += 1
+            return parse_line(line, kind)
+
+        key = (rest, kind)
+        cached = self._records.get(key, _MISSING)
+        if cached is _MISSING:
+            self.misses += 1
+            try:
+                cached = parse_line(line, kind)
+            except ValueError as e:
+                cached = e
+            self._records[key] = cached
+            if len(self._records) > self.maxsize:
+                self._records.popitem(last=False)
+        else:
+            self.hits += 1
+            self._records.move_to_end(key)
+
+        if cached is None:
+            return None
+        if isinstance(cached, ValueError):
+            raise ValueError(*cached.args)
+        return _new_record(ParsedLine, (cached[0], item_no.strip()) + cached[2:])
+
+
+def cache_stats(hits, misses):
+    """줄 분석 캐시 적중 요약 (처리 결과 요약용 dict)"""
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+def format_cache_stats(hits, misses):
+    """'줄 분석 캐시: 280/300줄 적중 (93.3%)' 형식의 요약"""
+    stats = cache_stats(hits, misses)
+    return f"줄 분석 캐시: {hits:,}/{hits + misses:,}줄 적중 ({stats['hit_rate'] * 100:.1f}%)"
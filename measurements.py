@@ -0,0 +1,214 @@
+import math
+import re
+
+import numpy as np
+from openpyxl.utils import get_column_letter
+
+from batch_plan import BatchPlan
+from instrumentation import NULL_PROFILER
+from item_index import ItemIndex, item_key
+
+
+# 측정값 시작 열 (입력 영역 7개 열 바로 다음 열)
+SAMPLE_OFFSET = 7
+
+# 판정 열을 따로 주지 않을 때 한 줄의 최대 측정값 개수 - 판정은 측정값 시작 열에서 이만큼 뒤 열에 씀
+# (측정값 개수에 따라 판정 열이 옮겨 가면 다시 입력했을 때 이전 OK/NG가 남으므로 고정)
+MAX_SAMPLES = 10
+
+# 하한/상한과 같은 값이 부동소수점 오차로 NG가 되지 않도록 허용하는 차이
+EPSILON = 1e-9
+
+# MMC 블록의 MAX값 행을 알아보는 REF 열 값 (_batch_mmc와 같음)
+MMC_REF = "MMC 공차"
+
+# 판정 결과 코드 → 판정 열에 쓸 값
+OK, NG, UNJUDGED = 1, 0, -1
+JUDGE_LABELS = {OK: 'OK', NG: 'NG'}
+
+_DELIMITERS = re.compile(r'[\t,;]')
+
+
+def split_fields(line):
+    """측정값 한 줄을 항목으로 나눔 (탭/쉼표/세미콜론, 없으면 공백 구분)"""
+    if _DELIMITERS.search(line):
+        return [field.strip() for field in _DELIMITERS.split(line)]
+    return line.split()
+
+
+def to_float(value):
+    """셀 값/문자열을 숫자로 (빈 값이나 '-' 등 숫자가 아니면 nan)"""
+    if value is None or isinstance(value, bool):
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return math.nan
+
+
+def parse_measurements(lines):
+    """측정값 줄 목록 분석 - ([(줄 번호, 원본 줄, 항목번호, [측정값...])], [(줄 번호, 원본 줄, 오류 메시지)])
+
+    형식: 항목번호, 측정값1, 측정값2, ... (CMM/캘리퍼 CSV 또는 엑셀에서 복사한 열)
+    빈 측정값은 nan으로 두고, 첫 줄에 숫자 측정값이 하나도 없으면 머리글로 보고 건너뛴다.
+    """
+    records = []
+    errors = []
+    for line_no, line in enumerate(lines, 1):
+        fields = split_fields(line)
+        item_no = item_key(fields[0]) if fields else None
+        texts = fields[1:]
+
+        values = [to_float(text) for text in texts]
+        bad = [text for text, value in zip(texts, values) if text and math.isnan(value)]
+        if line_no == 1 and texts and len(bad) == len(texts):
+            continue  # 머리글
+        if item_no is None or not texts:
+            errors.append((line_no, line, f"⚠ 형식 오류 (항목번호, 측정값...): {line}"))
+        elif bad:
+            errors.append((line_no, line, f"⚠ 숫자가 아닌 측정값: {', '.join(bad)}"))
+        else:
+            records.append((line_no, line, item_no, values))
+    return records, errors
+
+
+def spec_rows(ws, col, start_row, num_rows):
+    """항목 블록에서 측정값을 넣을 행과 그 행의 규격 [(행, 하한, 상한)]
+
+    _batch_* 규칙이 쓴 하한계산값/상한계산값 열을 읽고, 숫자가 아니면 nan(판정 안 함).
+    대화형 개별 입력은 두 열에 상한/하한 순서로 쓰므로 둘 다 숫자면 작은 값을 하한으로 본다.
+    MMC 블록은 세트마다 세 번째 행(측정값 행)만 쓰며, 하한은 0, 상한은 MAX값(없으면 MMC 공차).
+    """
+    get = ws._cells.get
+
+    def value(row, offset):
+        cell = get((row, col + offset))
+        return cell.value if cell is not None else None
+
+    def limits(row):
+        lower, upper = to_float(value(row, 4)), to_float(value(row, 5))
+        if lower > upper:
+            return upper, lower
+        return lower, upper
+
+    rows = []
+    end_row = start_row + num_rows
+    row = start_row
+    while row < end_row:
+        if row + 2 < end_row and value(row + 1, 6) == MMC_REF:
+            lower, upper = limits(row)
+            max_val = to_float(value(row + 1, 1))
+            rows.append((row + 2, lower, upper if math.isnan(max_val) else max_val))
+            row += 3
+        else:
+            rows.append((row, *limits(row)))
+            row += 1
+    return rows
+
+
+def judge(values, lower, upper):
+    """측정값 행렬(행 × 시료)을 행별 하한/상한과 한 번에 비교
+
+    반환은 (행별 판정 코드 배열, 규격을 벗어난 측정값 표시 행렬).
+    nan 측정값은 비교하지 않고, 규격이 없거나 측정값이 없는 행은 UNJUDGED.
+    한쪽 규격만 있으면 그쪽만 비교한다 (nan과의 비교는 항상 False).
+    """
+    values = np.asarray(values, dtype=float)
+    lower = np.asarray(lower, dtype=float)[:, None]
+    upper = np.asarray(upper, dtype=float)[:, None]
+
+    out = (values < lower - EPSILON) | (values > upper + EPSILON)
+    status = np.where(out.any(axis=1), NG, OK)
+
+    measured = ~np.isnan(values).all(axis=1)
+    limited = ~(np.isnan(lower[:, 0]) & np.isnan(upper[:, 0]))
+    status[~(measured & limited)] = UNJUDGED
+    return status, out
+
+
+def plan_measurements(ws, col, lines, sample_col=None, judge_col=None, profiler=NULL_PROFILER):
+    """측정값 줄들을 규격 행 옆에 쓰고 OK/NG를 판정하는 쓰기 계획 - (계획, 판정 요약)
+
+    항목번호로 시트의 항목 블록을 찾아, 같은 항목번호 줄이 여러 개면 블록의
+    측정 행에 차례로 넣는다. 측정값은 sample_col(기본: 입력 영역 다음 열)부터
+    시료 순서대로 쓰고, 판정은 judge_col에 쓴다. judge_col의 기본값은 측정값 개수와
+    관계없이 sample_col + MAX_SAMPLES 열이고, 이때 측정값이 MAX_SAMPLES개보다 많은 줄은 오류.
+    """
+    sample_col = sample_col or col + SAMPLE_OFFSET
+
+    with profiler.stage('detect'):
+        records, errors = parse_measurements(lines)
+
+    with profiler.stage('items'):
+        index = ItemIndex(ws, col)
+
+    # 줄마다 측정 행과 규격 찾기
+    targets = []  # (줄 번호, 항목번호, 행, 측정값)
+    lower = []
+    upper = []
+    with profiler.stage('rules'):
+        blocks = {}  # 항목번호 -> [규격 행 목록, 다음에 쓸 순번]
+        for line_no, line, item_no, values in records:
+            block = blocks.get(item_no)
+            if block is None:
+                found = index.find(item_no)
+                if found is None:
+                    errors.append((line_no, line, f"⚠ 시트에 없는 항목번호: {item_no}"))
+                    continue
+                block = blocks[item_no] = [spec_rows(ws, col, *found), 0]
+            rows, used = block
+            if used >= len(rows):
+                errors.append((line_no, line, f"⚠ 항목 {item_no}의 측정 행({len(rows)}개)보다 줄이 많습니다."))
+                continue
+            row, row_lower, row_upper = rows[used]
+            block[1] += 1
+            targets.append((line_no, item_no, row, values))
+            lower.append(row_lower)
+            upper.append(row_upper)
+
+    num_samples = max((len(values) for *_, values in targets), default=0)
+    if judge_col is None:
+        if num_samples > MAX_SAMPLES:
+            raise ValueError(f"측정값이 {MAX_SAMPLES}개보다 많은 줄이 있습니다. 판정 열을 따로 지정하세요. "
+                             f"(측정값 {num_samples}개)")
+        judge_col = sample_col + MAX_SAMPLES
+    if sample_col <= judge_col < sample_col + num_samples:
+        raise ValueError(f"판정 열({get_column_letter(judge_col)})이 측정값 열과 겹칩니다.")
+
+    with profiler.stage('judge'):
+        matrix = np.full((len(targets), num_samples), np.nan)
+        for i, (*_, values) in enumerate(targets):
+            matrix[i, :len(values)] = values
+        status, _ = judge(matrix, lower, upper)
+
+    plan = BatchPlan(min(sample_col, judge_col), max(sample_col + num_samples - 1, judge_col))
+    plan.errors.extend(sorted(errors))
+    ng_items = []
+    with profiler.stage('rules'):
+        for (line_no, item_no, row, values), code in zip(targets, status.tolist()):
+            for i, value in enumerate(values):
+                if not math.isnan(value):
+                    plan.write(row, sample_col + i, value)
+            label = JUDGE_LABELS.get(code)
+            if label is not None:
+                plan.write(row, judge_col, label)
+            if code == NG and item_no not in ng_items:
+                ng_items.append(item_no)
+            plan.entries.append((line_no, 'measure', row, 1))
+
+    profiler.count('lines', len(plan.entries))
+    profiler.count('cells', len(plan))
+    codes = status.tolist()
+    summary = {
+        'rows': len(targets),
+        'points': int(np.count_nonzero(~np.isnan(matrix))),
+        'ok': codes.count(OK),
+        'ng': codes.count(NG),
+        'unjudged': codes.count(UNJUDGED),
+        'ng_items': ng_items,
+        'sample_col': get_column_letter(sample_col),
+        'judge_col': get_column_letter(judge_col),
+    }
+    return plan, summary
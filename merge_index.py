@@ -0,0 +1,121 @@
+from bisect import bisect_left, bisect_right, insort
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.merge import MergedCellRange
+
+
+class RangeIndex:
+    """셀 범위(CellRange) 행 구간 인덱스
+
+    시작 행 기준으로 정렬된 키 목록을 유지해서 겹치는 범위를
+    이분 탐색으로 찾는다. 워크시트와 무관한 순수 자료구조.
+    """
+
+    def __init__(self, ranges=()):
+        self._keys = []      # (min_row, min_col, max_row, max_col) 정렬 목록
+        self._ranges = {}    # 키 -> 범위 객체
+        self._max_height = 0  # 가장 긴 범위의 행 수 (탐색 하한 계산용)
+        for cell_range in ranges:
+            self.add(cell_range)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        """시작 행 순으로 범위 반환"""
+        for key in self._keys:
+            yield self._ranges[key]
+
+    @staticmethod
+    def _key(cell_range):
+        return (cell_range.min_row, cell_range.min_col,
+                cell_range.max_row, cell_range.max_col)
+
+    def add(self, cell_range):
+        key = self._key(cell_range)
+        if key in self._ranges:
+            return
+        insort(self._keys, key)
+        self._ranges[key] = cell_range
+        height = cell_range.max_row - cell_range.min_row + 1
+        if height > self._max_height:
+            self._max_height = height
+
+    def remove(self, cell_range):
+        key = self._key(cell_range)
+        idx = bisect_left(self._keys, key)
+        if idx < len(self._keys) and self._keys[idx] == key:
+            del self._keys[idx]
+        return self._ranges.pop(key, None)
+
+    def overlapping(self, start_row, end_row, min_col=None, max_col=None):
+        """start_row~end_row 행 (및 min_col~max_col 열)과 겹치는 범위 목록"""
+        # 시작 행이 (start_row - 최대 높이)보다 작은 범위는 start_row에 닿을 수 없음
+        lo = bisect_left(self._keys, (start_row - self._max_height + 1,))
+        hi = bisect_right(self._keys, (end_row, float('inf')))
+
+        found = []
+        for key in self._keys[lo:hi]:
+            if key[2] < start_row:
+                continue
+            if min_col is not None and (key[1] > max_col or key[3] < min_col):
+                continue
+            found.append(self._ranges[key])
+        return found
+
+
+class MergedRangeIndex(RangeIndex):
+    """입력 영역(열 구간)에 걸친 워크시트 병합 범위 인덱스
+
+    배치마다 한 번 만들고, merge/unmerge를 이 객체를 통해 호출해서
+    워크시트와 항상 같은 상태를 유지한다.
+    """
+
+    def __init__(self, ws, min_col, max_col):
+        super().__init__(merged_range for merged_range in ws.merged_cells.ranges
+                         if merged_range.min_col <= max_col and merged_range.max_col >= min_col)
+        self.ws = ws
+        self.min_col = min_col
+        self.max_col = max_col
+
+    def reload(self):
+        """워크시트 병합 목록을 다시 읽음 (행 이동처럼 인덱스를 거치지 않고 바뀐 뒤)"""
+        self._keys = []
+        self._ranges = {}
+        self._max_height = 0
+        for merged_range in self.ws.merged_cells.ranges:
+            if merged_range.min_col <= self.max_col and merged_range.max_col >= self.min_col:
+                self.add(merged_range)
+
+    def unmerge_rows(self, start_row, end_row):
+        """지정된 행 범위와 겹치는 모든 병합 해제"""
+        for merged_range in self.overlapping(start_row, end_row):
+            self.unmerge(merged_range)
+
+    def unmerge(self, merged_range):
+        """병합 해제 (워크시트 + 인덱스)"""
+        self.remove(merged_range)
+
+        # ws.unmerge_cells()는 병합 목록 전체를 훑어 존재 여부를 확인하므로
+        # 인덱스가 이미 알고 있는 범위는 직접 제거한다
+        self.ws.merged_cells.ranges.discard(merged_range)
+        cells = merged_range.cells
+        next(cells)  # 첫 셀은 값을 가진 일반 셀
+        for row, col in cells:
+            self.ws._cells.pop((row, col), None)
+
+    def merge(self, start_row, start_col, end_row, end_col):
+        """셀 병합 (워크시트 + 인덱스)"""
+        # 겹치는 기존 병합이 남아 있으면 먼저 해제
+        for merged_range in self.overlapping(start_row, end_row, start_col, end_col):
+            self.unmerge(merged_range)
+
+        coord = (f"{get_column_letter(start_col)}{start_row}:"
+                 f"{get_column_letter(end_col)}{end_row}")
+        merged_range = MergedCellRange(self.ws, coord)
+        # ws.merge_cells()의 중복 검사(전체 탐색)를 건너뛰고 직접 등록
+        self.ws.merged_cells.ranges.add(merged_range)
+        self.ws._clean_merge_range(merged_range)
+
+        if start_col <= self.max_col and end_col >= self.min_col:
+            self.add(merged_range)
+        return merged_range
@@ -0,0 +1,102 @@
+from itertools import islice
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.cell_range import CellRange
+
+from instrumentation import NULL_PROFILER
+from save_pipeline import DEFAULT_COMPRESSION, save_workbook
+from style_registry import StyleRegistry
+
+
+# 새 성적서를 만들 때 한 번에 계획으로 바꿀 줄 수 (메모리에 올라가는 계획 크기)
+CHUNK_LINES = 1000
+
+
+def iter_chunks(lines, chunk_size=CHUNK_LINES):
+    """줄 목록(또는 이터레이터)을 (첫 줄 번호, 줄 묶음)으로 나눔"""
+    lines = iter(lines)
+    first_line_no = 1
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield first_line_no, chunk
+        first_line_no += len(chunk)
+
+
+def _plan_rows(plan):
+    """계획 하나의 셀 쓰기/스타일을 행 순서대로 (행 번호, {열: (값, 스타일)})로 반환"""
+    # 병합 범위의 첫 셀이 아닌 셀은 일반 저장과 마찬가지로 값을 기록하지 않음
+    covered = set()
+    for start_row, num_rows, col in plan.merges:
+        for row in range(start_row + 1, start_row + num_rows):
+            covered.add((row, col))
+
+    rows = {}
+    for row, col, value in plan.cells():
+        if (row, col) not in covered:
+            rows.setdefault(row, {})[col] = (value, None)
+    for row, col, name in plan.styles:
+        value, _ = rows.setdefault(row, {}).get(col, (None, None))
+        rows[row][col] = (value, name)
+
+    for row in sorted(rows):
+        yield row, rows[row]
+
+
+def write_report(dest, sheet_name, plans, profiler=NULL_PROFILER, compression=DEFAULT_COMPRESSION):
+    """쓰기 계획들을 새 워크북(쓰기 전용)에 행 단위로 바로 기록
+
+    plans는 행 순서대로 나오는 BatchPlan 이터러블(보통 제너레이터)이고,
+    워크시트 전체를 메모리에 만들지 않으므로 줄 수와 관계없이 메모리 사용이 일정하다.
+    이미 기록한 행으로 되돌아가는 계획은 쓸 수 없다. compression은 zip 압축 수준 이름.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    registry = StyleRegistry(wb)
+
+    next_row = 1
+    processed = 0
+    cells = 0
+    errors = []
+    cache_hits = cache_misses = 0
+    for plan in plans:
+        processed += len(plan.entries)
+        cells += len(plan)
+        errors.extend(plan.errors)
+        cache_hits += plan.cache_hits
+        cache_misses += plan.cache_misses
+
+        with profiler.stage('write'):
+            # merged_cells.add()는 기존 범위 전체를 훑어 포함 여부를 확인하므로 직접 등록
+            for start_row, num_rows, col in plan.merges:
+                ws.merged_cells.ranges.add(CellRange(min_col=col, min_row=start_row,
+                                                     max_col=col, max_row=start_row + num_rows - 1))
+
+            for row, row_cells in _plan_rows(plan):
+                if row < next_row:
+                    raise ValueError(f"이미 기록한 행에는 쓸 수 없습니다: {row}행")
+                while next_row < row:
+                    ws.append([])
+                    next_row += 1
+
+                values = [None] * max(row_cells)
+                for col, (value, style) in row_cells.items():
+                    if style:
+                        value = registry.style_cell(WriteOnlyCell(ws, value), style)
+                    values[col - 1] = value
+                ws.append(values)
+                next_row += 1
+
+    with profiler.stage('save'):
+        save_workbook(wb, dest, compression)
+
+    return {
+        'rows': next_row - 1,
+        'processed': processed,
+        'cells': cells,
+        'errors': errors,
+        'cache_hits': cache_hits,
+        'cache_misses': cache_misses,
+    }
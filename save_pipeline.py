@@ -0,0 +1,99 @@
+import threading
+import time
+from datetime import datetime, timezone
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from openpyxl.writer.excel import ExcelWriter
+
+
+# xlsx(zip) 압축 수준 - 이름: (압축 방식, zlib 수준)
+#   store   : 압축하지 않음 (가장 빠르고 파일이 가장 큼)
+#   fast    : deflate 1단계 (store보다 조금 느리고 크기는 default에 가까움)
+#   default : deflate 기본 수준 (openpyxl wb.save()와 같은 결과)
+COMPRESSION_LEVELS = {
+    'store': (ZIP_STORED, None),
+    'fast': (ZIP_DEFLATED, 1),
+    'default': (ZIP_DEFLATED, None),
+}
+DEFAULT_COMPRESSION = 'default'
+
+COMPRESSION_LABELS = {
+    'store': '압축 안 함',
+    'fast': '빠른 압축',
+    'default': '기본 압축',
+}
+
+
+def zip_options(compression=DEFAULT_COMPRESSION):
+    """압축 수준 이름 → (압축 방식, zlib 수준) - 모르는 이름이면 ValueError"""
+    try:
+        return COMPRESSION_LEVELS[compression or DEFAULT_COMPRESSION]
+    except KeyError:
+        raise ValueError(f"알 수 없는 압축 수준: {compression} "
+                         f"({', '.join(COMPRESSION_LEVELS)} 중 하나)") from None
+
+
+def save_workbook(wb, dest, compression=DEFAULT_COMPRESSION):
+    """wb.save()와 같지만 zip 압축 수준을 고를 수 있음
+
+    dest는 파일 경로 또는 쓰기 가능한 파일 객체 (다운로드 버퍼 등)이고,
+    시트 XML을 중간 버퍼에 모으지 않고 zip 항목으로 dest에 바로 기록한다.
+    """
+    if wb.read_only:
+        raise TypeError("읽기 전용으로 불러온 워크북은 저장할 수 없습니다.")
+    if wb.write_only and not wb.worksheets:
+        wb.create_sheet()
+    compress_type, level = zip_options(compression)
+    archive = ZipFile(dest, 'w', compress_type, allowZip64=True, compresslevel=level)
+    wb.properties.modified = datetime.now(timezone.utc).replace(tzinfo=None)
+    ExcelWriter(wb, archive).save()
+
+
+def format_save(seconds, size=None, compression=DEFAULT_COMPRESSION):
+    """'0.42초 · 1.2 MB · 빠른 압축' 형식의 저장 요약"""
+    parts = [f"{seconds:.2f}초"]
+    if size is not None:
+        parts.append(f"{size / 1048576:.1f} MB" if size >= 1048576 else f"{size / 1024:.0f} KB")
+    parts.append(COMPRESSION_LABELS.get(compression, compression))
+    return " · ".join(parts)
+
+
+class BackgroundSave:
+    """저장(직렬화)을 작업 스레드에서 실행하고 걸린 시간을 기록
+
+    zlib 압축과 파일 쓰기는 GIL을 놓기 때문에 저장하는 동안 호출한 쪽(메뉴, 화면 그리기)이
+    계속 진행된다. 저장 중에 워크북을 고치지 않도록 호출하는 쪽에서 잠금이나 순서를 맞춘다.
+    """
+
+    def __init__(self, save, *args, **kwargs):
+        self._save = save
+        self._args = args
+        self._kwargs = kwargs
+        self._thread = None
+        self.result = None
+        self.error = None
+        self.seconds = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='save')
+        self._thread.start()
+        return self
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            self.result = self._save(*self._args, **self._kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.seconds = time.perf_counter() - start
+
+    def done(self):
+        return self._thread is not None and not self._thread.is_alive()
+
+    def wait(self):
+        """저장이 끝날 때까지 기다려서 결과 반환 (저장 중 오류는 여기서 다시 발생)"""
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.result
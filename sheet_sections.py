@@ -0,0 +1,96 @@
+import re
+from collections import namedtuple
+
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string
+from openpyxl.utils.exceptions import CellCoordinatesException
+
+
+# 일괄 입력 안에서 대상 시트/시작 위치를 바꾸는 지시문 한 줄
+#   [시트이름]        - 그 시트 (시작 열은 기본값, 시작 행은 첫 빈 행 - 선택한 시트도 마찬가지)
+#   [시트이름!H]      - 그 시트의 H열 입력 영역 첫 빈 행부터
+#   [시트이름!F12]    - 그 시트의 F12부터
+#   [!F30]            - 선택한 시트의 F30부터
+# 엑셀 시트 이름에는 [ ]를 쓸 수 없으므로 일괄 입력 줄과 헷갈리지 않는다.
+_DIRECTIVE = re.compile(r'^\[(.*)\]$')
+
+# 일괄 입력의 한 구역 (지시문 다음 줄부터 다음 지시문 전까지)
+#   sheet         : 대상 시트 이름 (None이면 선택한 시트)
+#   start_col     : 시작 열 문자 (None이면 기본 시작 열)
+#   start_row     : 시작 행 (None이면 그 시트 입력 영역의 첫 빈 행 - 첫 지시문 전의 구역은 선택한 위치,
+#                   같은 시트/열이 앞 구역에 있었으면 그 다음 행)
+#   first_line_no : 구역 첫 줄의 줄 번호 (지시문 줄도 번호에 포함)
+#   lines         : 구역의 일괄 입력 줄 목록
+Section = namedtuple('Section', ['sheet', 'start_col', 'start_row', 'first_line_no', 'lines'])
+
+
+def parse_directive(line):
+    """지시문 줄이면 (시트 이름, 시작 열, 시작 행), 아니면 None - 셀 주소가 잘못되면 ValueError"""
+    if not isinstance(line, str):
+        return None  # 표 가져오기의 (줄, 유형)
+    match = _DIRECTIVE.match(line.strip())
+    if match is None:
+        return None
+
+    text = match.group(1).strip()
+    sheet, sep, cell = text.rpartition('!')
+    if not sep:
+        sheet, cell = cell, ''
+    sheet = sheet.strip() or None
+    cell = cell.strip().upper()
+    if not sheet and not cell:
+        raise ValueError(f"시트 이름이나 시작 셀이 없는 지시문: {line}")
+    if not cell:
+        return sheet, None, None
+    try:
+        if cell.isalpha():
+            column_index_from_string(cell)
+            return sheet, cell, None
+        start_col, start_row = coordinate_from_string(cell)
+    except (ValueError, CellCoordinatesException):
+        if sheet is None:
+            raise ValueError(f"잘못된 시작 셀 '{cell}': {line}") from None
+        # 시트 이름 자체에 '!'가 들어 있는 경우 - 없는 시트면 check_sheets()에서 걸러짐
+        return text, None, None
+    return sheet, start_col, max(start_row, 5)
+
+
+def split_sections(lines):
+    """일괄 입력 줄들을 지시문 기준으로 구역 목록으로 나눔
+
+    첫 지시문 전의 줄은 선택한 시트/위치의 구역이 된다. 줄이 없는 구역(지시문만 있는
+    경우)은 빼고, 지시문이 하나도 없으면 구역 하나만 반환한다 (줄이 없어도 빈 구역 하나).
+    """
+    sections = []
+    sheet = start_col = start_row = None
+    first_line_no = 1
+    current = []
+    for line_no, line in enumerate(lines, 1):
+        directive = parse_directive(line)
+        if directive is None:
+            current.append(line)
+            continue
+        if current:
+            sections.append(Section(sheet, start_col, start_row, first_line_no, current))
+        sheet, start_col, start_row = directive
+        first_line_no = line_no + 1
+        current = []
+    if current:
+        sections.append(Section(sheet, start_col, start_row, first_line_no, current))
+    return sections or [Section(None, None, None, 1, [])]
+
+
+def is_single(sections):
+    """지시문 없이 선택한 시트/위치에만 입력하는 경우"""
+    return len(sections) <= 1 and all(
+        section.sheet is None and section.start_col is None and section.start_row is None
+        for section in sections)
+
+
+def check_sheets(sections, sheet_names):
+    """지시문의 시트가 모두 워크북에 있는지 확인 (없으면 처리 전에 ValueError)"""
+    missing = []
+    for section in sections:
+        if section.sheet is not None and section.sheet not in sheet_names and section.sheet not in missing:
+            missing.append(section.sheet)
+    if missing:
+        raise ValueError(f"시트를 찾을 수 없습니다: {', '.join(missing)} (시트: {', '.join(sheet_names)})")
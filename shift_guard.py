@@ -0,0 +1,113 @@
+from openpyxl.formula import Tokenizer
+from openpyxl.utils.cell import range_boundaries
+
+from batch_check import MAX_ROW
+
+
+def _references(text, own_sheet):
+    """수식(또는 이름 정의/링크 위치)의 셀 참조 [(시트 이름, 범위 문자열)] - 시트가 없으면 own_sheet"""
+    if not text.startswith('='):
+        text = '=' + text
+    try:
+        tokens = Tokenizer(text).items
+    except Exception:
+        return []
+    refs = []
+    for token in tokens:
+        if token.type != 'OPERAND' or token.subtype != 'RANGE':
+            continue
+        sheet, sep, ref = token.value.rpartition('!')
+        if sep:
+            sheet = sheet[1:-1].replace("''", "'") if sheet.startswith("'") else sheet
+        else:
+            sheet = own_sheet
+        refs.append((sheet, ref))
+    return refs
+
+
+def _bottom_row(ref):
+    """범위의 마지막 행 (열 전체 참조는 시트 끝 행) - 셀 범위가 아니면 (이름, 표 참조) None"""
+    try:
+        _, _, _, max_row = range_boundaries(ref.replace('$', ''))
+    except (ValueError, TypeError):
+        return None
+    return max_row or MAX_ROW
+
+
+class ShiftGuard:
+    """행 이동(항목 교체/삽입)으로 어긋나는 참조 찾기
+
+    batch_plan.shift_rows()는 셀/병합/행 높이만 옮기고 수식 참조, 조건부 서식, 데이터 유효성 검사,
+    하이퍼링크, 이름 정의, 표, 자동 필터, 인쇄 영역의 범위는 바꾸지 않는다. 그래서 처음 만들 때
+    워크북을 한 번 훑어서 이런 참조가 걸린 가장 아래 행(last_row)과 그 이유를 기억해 두고,
+    그보다 아래에서만 행을 옮기게 한다.
+    먼저 허용한 이동은 last_row보다 아래에서만 일어나므로 계획의 이동 후 행 번호로 확인해도 된다.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.last_row = 0
+        self.reason = None
+
+        title = ws.title
+        for sheet in ws.parent.worksheets:
+            for cell in sheet._cells.values():
+                link = cell.hyperlink
+                if link is not None:
+                    # 링크는 셀 주소(ref)를 따로 들고 있어 셀과 같이 옮겨지지 않음
+                    if sheet is ws:
+                        self._mark(cell.row, f"{cell.coordinate} 셀의 하이퍼링크")
+                    location = link.location or (link.target or '').partition('#')[2]
+                    if location:
+                        self._mark_refs(location, sheet.title, f"{sheet.title}!{cell.coordinate} 셀의 하이퍼링크")
+                if cell.data_type != 'f':
+                    continue
+                if sheet is ws:
+                    self._mark(cell.row, f"{cell.coordinate} 셀의 수식")
+                text = getattr(cell.value, 'text', cell.value)
+                if isinstance(text, str):
+                    self._mark_refs(text, sheet.title, f"{sheet.title}!{cell.coordinate} 셀 수식의 참조")
+
+        for cf in ws.conditional_formatting:
+            self._mark_ranges(cf.sqref, f"조건부 서식 범위({cf.sqref})")
+        for dv in ws.data_validations.dataValidation:
+            self._mark_ranges(dv.sqref, f"데이터 유효성 검사 범위({dv.sqref})")
+        for table in ws.tables.values():
+            self._mark(_bottom_row(table.ref), f"표 '{table.name}' 범위({table.ref})")
+        if ws.auto_filter.ref:
+            self._mark(_bottom_row(ws.auto_filter.ref), f"자동 필터 범위({ws.auto_filter.ref})")
+        if ws.print_area:
+            self._mark_refs(ws.print_area, title, "인쇄 영역")
+        if ws.print_title_rows:
+            self._mark(_bottom_row(ws.print_title_rows), "인쇄 제목 행")
+
+        names = list(ws.parent.defined_names.items())
+        for sheet in ws.parent.worksheets:
+            names.extend(sheet.defined_names.items())
+        for name, defined in names:
+            if defined.attr_text:
+                self._mark_refs(defined.attr_text, None, f"이름 정의 '{name}'")
+
+    def _mark(self, row, reason):
+        if row is not None and row > self.last_row:
+            self.last_row, self.reason = row, reason
+
+    def _mark_refs(self, text, own_sheet, reason):
+        for sheet, ref in _references(text, own_sheet):
+            if sheet == self.ws.title:
+                self._mark(_bottom_row(ref), reason)
+
+    def _mark_ranges(self, sqref, reason):
+        for cell_range in sqref.ranges:
+            self._mark(cell_range.max_row, reason)
+
+    def check(self, from_row, delta):
+        """from_row부터 아래를 delta만큼 옮겨도 되는지 확인 - 어긋나는 참조가 있으면 ValueError
+
+        당길 때(delta < 0)는 from_row 바로 위 -delta개 행이 지워지므로 그 행부터 본다.
+        """
+        top = from_row + min(delta, 0)
+        if top <= self.last_row:
+            raise ValueError(f"{top}행부터 아래를 옮겨야 하지만 {self.reason}이(가) 행 이동을 따라가지 않아 "
+                             f"처리하지 않았습니다. (행 수가 같은 교체나 {self.last_row + 1}행 아래의 "
+                             f"교체/삽입만 가능)")
@@ -1,281 +1,455 @@
 import streamlit as st
 from openpyxl import load_workbook
-from openpyxl.styles import Alignment
-from openpyxl.utils import column_index_from_string
+from openpyxl.utils import column_index_from_string, get_column_letter
+import hashlib
 import io
+import json
+import pickle
 import re
+import time
+from collections import Counter
+from datetime import datetime
+
+from batch_check import BatchCheckError, split_checked
+from batch_plan import apply_plan, find_conflicts, occupied_cells, target_rows
+from batch_planner import BatchPlanner
+from capability import CPK_TARGET, SUMMARY_COLUMNS, low_capability, run_capability, write_summary
+from instrumentation import NULL_PROFILER, StageProfiler
+from item_index import next_free_row
+from line_parser import ParseCache, format_cache_stats
+from measurements import MAX_SAMPLES, SAMPLE_OFFSET, plan_measurements
+from merge_index import MergedRangeIndex
+from report_writer import CHUNK_LINES, write_report
+from save_pipeline import (COMPRESSION_LABELS, COMPRESSION_LEVELS, DEFAULT_COMPRESSION, BackgroundSave,
+                           format_save, save_workbook)
+from sheet_sections import check_sheets, is_single, split_sections
+from table_import import iter_table_lines, parse_mapping
+from xlsx_patch import XlsxPatchError, list_sheets, patch_sheets, patch_xlsx, scan_free_row, scan_occupied
+
+class StreamlitExcelInput(BatchPlanner):
+    """웹 화면의 일괄 입력 - 계획은 BatchPlanner, 처리 메시지는 목록(results)에 모아 화면에 표시"""
 
-class StreamlitExcelInput:
     def __init__(self, wb, sheet_name, start_col, start_row):
+        # wb가 None이면 쓰기 계획만 만들 수 있음 (빠른 저장용)
+        super().__init__(wb[sheet_name] if wb is not None else None, sheet_name, start_col, start_row)
         self.wb = wb
-        self.ws = wb[sheet_name]
-        self.current_row = start_row
-        self.start_col = start_col
-        self.col_num = column_index_from_string(start_col)
-
-    def _unmerge_range(self, start_row, num_rows):
-        """지정된 범위의 모든 병합 해제"""
-        merged_ranges_to_unmerge = []
-        for merged_range in list(self.ws.merged_cells.ranges):
-            if (merged_range.min_row <= start_row + num_rows - 1 and
-                merged_range.max_row >= start_row and
-                merged_range.min_col <= self.col_num + 6 and
-                merged_range.max_col >= self.col_num):
-                merged_ranges_to_unmerge.append(merged_range)
-
-        for merged_range in merged_ranges_to_unmerge:
-            self.ws.unmerge_cells(str(merged_range))
-
-    def _detect_data_type(self, parts, line):
-        """데이터 유형 자동 감지"""
-        line_lower = line.lower()
-
-        # 1. 참고 값 감지
-        if len(parts) >= 3:
-            if '(' in parts[2] and ')' in parts[2]:
-                return 'reference'
-            if 'ref' in line_lower or '참고' in line_lower:
-                return 'reference'
-
-        # 2. MMC 공차 감지
-        if 'mmc' in line_lower or (len(parts) >= 3 and 'm' in parts[2].lower() and not 'mm' in parts[2].lower()):
-            return 'mmc'
-
-        # 3. 위치도 값 감지
-        if len(parts) >= 5:
-            if 'ø' in parts[2].lower() or 'Ø' in parts[2]:
-                return 'position'
-            if len(parts) == 6:
-                try:
-                    float(parts[3])
-                    float(parts[4])
-                    return 'position'
-                except:
-                    pass
-
-        # 4. 단순 측정값
-        if len(parts) >= 5:
-            return 'simple'
-
-        return None
-
-    def _batch_simple(self, parts):
-        """단순 측정값 일괄 입력"""
-        item_no = parts[0]
-        rows = int(parts[1])
-        base = float(parts[2].replace('Ø', '').replace('ø', ''))
-        upper_tol = float(parts[3])
-        lower_tol = float(parts[4])
-        ref = parts[5] if len(parts) > 5 else ""
-
-        if lower_tol > 0:
-            lower_tol = -lower_tol
-
-        lower_calc = base + lower_tol
-        upper_calc = base + upper_tol
-
-        start_row = self.current_row
-        self._unmerge_range(start_row, rows)
-
-        for i in range(rows):
-            row = self.current_row + i
-            if i == 0:
-                self.ws.cell(row, self.col_num, item_no)
-            self.ws.cell(row, self.col_num + 1, base)
-            self.ws.cell(row, self.col_num + 2, upper_tol)
-            self.ws.cell(row, self.col_num + 3, lower_tol)
-            self.ws.cell(row, self.col_num + 4, lower_calc)
-            self.ws.cell(row, self.col_num + 5, upper_calc)
-            self.ws.cell(row, self.col_num + 6, ref)
-
-        if rows > 1:
-            self.ws.merge_cells(start_row=start_row, start_column=self.col_num,
-                              end_row=start_row + rows - 1, end_column=self.col_num)
-            self.ws.cell(start_row, self.col_num).alignment = Alignment(horizontal='center', vertical='center')
-
-        self.current_row += rows
-        return f"[단순] 항목 {item_no}: {rows}개 행"
-
-    def _batch_position(self, parts):
-        """위치도 값 일괄 입력"""
-        item_no = parts[0]
-        rows = int(parts[1])
-        base_str = parts[2]
-        base = float(base_str.replace('Ø', '').replace('ø', ''))
-        upper_tol = float(parts[3])
-        lower_tol = float(parts[4])
-        ref = parts[5] if len(parts) > 5 else ""
-
-        if lower_tol > 0:
-            lower_tol = -lower_tol
-
-        lower_calc = base + lower_tol
-        upper_calc = base + upper_tol
-
-        start_row = self.current_row
-        self._unmerge_range(start_row, rows)
-
-        for i in range(rows):
-            row = self.current_row + i
-            if i == 0:
-                self.ws.cell(row, self.col_num, item_no)
-            self.ws.cell(row, self.col_num + 1, base_str)
-            self.ws.cell(row, self.col_num + 2, upper_tol)
-            self.ws.cell(row, self.col_num + 3, lower_tol)
-            self.ws.cell(row, self.col_num + 4, lower_calc)
-            self.ws.cell(row, self.col_num + 5, upper_calc)
-            self.ws.cell(row, self.col_num + 6, ref)
-
-        if rows > 1:
-            self.ws.merge_cells(start_row=start_row, start_column=self.col_num,
-                              end_row=start_row + rows - 1, end_column=self.col_num)
-            self.ws.cell(start_row, self.col_num).alignment = Alignment(horizontal='center', vertical='center')
-
-        self.current_row += rows
-        return f"[위치도] 항목 {item_no}: {rows}개 행"
-
-    def _batch_reference(self, parts):
-        """참고 값 일괄 입력"""
-        item_no = parts[0]
-        rows = int(parts[1])
-        base_str_with_paren = parts[2].strip()
-        base_str_calc = parts[2].replace('(', '').replace(')', '').strip()
-
-        has_tolerances = len(parts) >= 5 and parts[3] and parts[4]
-
-        start_row = self.current_row
-        self._unmerge_range(start_row, rows)
-
-        for i in range(rows):
-            row = self.current_row + i
-
-            if i == 0:
-                self.ws.cell(row, self.col_num, item_no)
-
-            self.ws.cell(row, self.col_num + 1, base_str_with_paren)
-
-            if has_tolerances:
-                try:
-                    base = float(base_str_calc)
-                    upper_tol = float(parts[3])
-                    lower_tol = float(parts[4])
-
-                    if lower_tol > 0:
-                        lower_tol = -lower_tol
-
-                    lower_calc = base + lower_tol
-                    upper_calc = base + upper_tol
-
-                    self.ws.cell(row, self.col_num + 2, upper_tol)
-                    self.ws.cell(row, self.col_num + 3, lower_tol)
-                    self.ws.cell(row, self.col_num + 4, lower_calc)
-                    self.ws.cell(row, self.col_num + 5, upper_calc)
-                except ValueError:
-                    for j in range(2, 6):
-                        self.ws.cell(row, self.col_num + j, '-')
-            else:
-                for j in range(2, 6):
-                    self.ws.cell(row, self.col_num + j, '-')
+        # 마지막 계획의 줄별 처리 메시지
+        self.results = []
 
-            if has_tolerances and len(parts) > 5:
-                ref = parts[5]
-            elif not has_tolerances and len(parts) > 3:
-                ref = parts[3]
-            else:
-                ref = "참고"
-
-            self.ws.cell(row, self.col_num + 6, ref)
-
-        if rows > 1:
-            self.ws.merge_cells(start_row=start_row, start_column=self.col_num,
-                              end_row=start_row + rows - 1, end_column=self.col_num)
-            self.ws.cell(start_row, self.col_num).alignment = Alignment(horizontal='center', vertical='center')
-
-        self.current_row += rows
-        return f"[참고] 항목 {item_no}: {rows}개 행"
-
-    def _batch_mmc(self, parts):
-        """MMC 공차 일괄 입력"""
-        item_no = parts[0]
-        num_sets = int(parts[1])
-        mmc_str = parts[2].lower().replace('mmc', '').replace('(', '').replace(')', '').replace('m', '').strip()
-        mmc_tol = float(mmc_str)
-        max_val = parts[3] if len(parts) > 3 and parts[3] else ""
-        ref = parts[4] if len(parts) > 4 else ""
-
-        total_rows = num_sets * 3
-        start_row = self.current_row
-
-        self._unmerge_range(start_row, total_rows)
-
-        for set_idx in range(num_sets):
-            base_row = self.current_row + (set_idx * 3)
-
-            # 1행: MMC 기준값 행
-            if set_idx == 0:
-                self.ws.cell(base_row, self.col_num, item_no)
-            self.ws.cell(base_row, self.col_num + 1, f"{mmc_tol}ⓜ")
-            self.ws.cell(base_row, self.col_num + 2, 0)
-            self.ws.cell(base_row, self.col_num + 3, mmc_tol)
-            self.ws.cell(base_row, self.col_num + 4, 0)
-            self.ws.cell(base_row, self.col_num + 5, mmc_tol)
-            self.ws.cell(base_row, self.col_num + 6, ref)
-
-            # 2행: MAX값 행
-            if max_val:
-                try:
-                    self.ws.cell(base_row + 1, self.col_num + 1, float(max_val))
-                except:
-                    self.ws.cell(base_row + 1, self.col_num + 1, max_val)
-            for i in range(2, 6):
-                self.ws.cell(base_row + 1, self.col_num + i, '-')
-            self.ws.cell(base_row + 1, self.col_num + 6, "MMC 공차")
+    def report(self, msg):
+        self.results.append(msg)
 
-            # 3행: 측정값 입력 빈 칸
-            for i in range(2, 6):
-                self.ws.cell(base_row + 2, self.col_num + i, '-')
-            self.ws.cell(base_row + 2, self.col_num + 6, ref)
+    def plan_results(self, checked):
+        """plan_checked()와 같고 그 계획의 처리 메시지도 함께 - (계획, 처리 메시지)"""
+        self.results = []
+        plan = self.plan_checked(checked)
+        return plan, self.results
 
-        self.ws.merge_cells(start_row=start_row, start_column=self.col_num,
-                          end_row=start_row + total_rows - 1, end_column=self.col_num)
-        self.ws.cell(start_row, self.col_num).alignment = Alignment(horizontal='center', vertical='center')
-
-        self.current_row += total_rows
-        return f"[MMC] 항목 {item_no}: {num_sets}세트 ({total_rows}개 행)"
+    def iter_plans(self, lines, results):
+        """일괄 입력 줄들을 묶음 단위 쓰기 계획으로 차례로 변환 (처리 메시지는 results에 추가)"""
+        self.results = results
+        yield from super().iter_plans(lines)
 
     def process_batch(self, lines):
-        """일괄 입력 처리"""
-        results = []
-        count = 0
-
-        for line in lines:
-            parts = [p.strip() for p in line.split(',')]
-            if len(parts) < 2:
-                results.append(f"⚠ 형식 오류 (최소 2개 항목 필요): {line}")
-                continue
-
-            try:
-                data_type = self._detect_data_type(parts, line)
-
-                if data_type == 'simple':
-                    msg = self._batch_simple(parts)
-                elif data_type == 'position':
-                    msg = self._batch_position(parts)
-                elif data_type == 'reference':
-                    msg = self._batch_reference(parts)
-                elif data_type == 'mmc':
-                    msg = self._batch_mmc(parts)
-                else:
-                    results.append(f"⚠ 유형을 감지할 수 없음: {line}")
-                    continue
-
-                results.append(f"✓ {msg}")
-                count += 1
-
-            except Exception as e:
-                results.append(f"⚠ 오류: {line} - {str(e)}")
+        """일괄 입력 처리 (계획 작성 → 한 번에 적용)"""
+        plan, results = self.plan_results(self.check_batch(lines, 1, None if self.upsert else self.current_row))
+        self.write_plan(plan)
+        return results, len(plan.entries)
+
+    def find_conflicts(self, plans, source=None, snapshot=None):
+        """(묶음) 계획들이 쓸 행에서 기존 값/병합과 겹치는 줄 (워크북 없이 만든 계획은 원본 파일 source에서 확인)
+
+        묶음이 몇 개든 모든 계획의 행 구간을 합쳐 시트를 한 번만 훑는다.
+        source의 시트 XML을 바로 읽을 수 없으면 (네임스페이스 접두사 등) 워크북 snapshot에서 찾고,
+        snapshot이 없으면 (저메모리 모드) XlsxPatchError를 그대로 낸다.
+        """
+        if not plans:
+            return []
+        with self.profiler.stage('conflicts'):
+            intervals = target_rows(*plans)
+            min_col = min(plan.min_col for plan in plans)
+            max_col = max(plan.max_col for plan in plans)
+            if self.ws is not None:
+                occupied = occupied_cells(self.ws, intervals, min_col, max_col)
+            else:
+                try:
+                    occupied = scan_occupied(source, self.sheet_name, intervals, min_col, max_col)
+                except XlsxPatchError:
+                    if snapshot is None:
+                        raise
+                    occupied = occupied_cells(fresh_workbook(snapshot)[self.sheet_name], intervals, min_col, max_col)
+            return [conflict for plan in plans for conflict in find_conflicts(plan, *occupied)]
+
+    def write_plan(self, plan):
+        """쓰기 계획을 시트에 적용
+
+        병합 인덱스는 계획을 적용하면서 같이 갱신되므로, 한 번 실행 안에서 묶음 계획을
+        여러 개 적용해도 처음 한 번만 만든다 (시트를 바꾸면 다시 만듦).
+        """
+        with self.profiler.stage('index'):
+            merge_index = self._get_merge_index()
+        apply_plan(plan, self.ws, merge_index, self.profiler)
+
+# 업로드 파일 캐시 크기 (최근 파일 몇 개까지 파싱 결과를 유지할지)
+WORKBOOK_CACHE_SIZE = 4
+# 이보다 큰 업로드 파일은 저메모리 모드를 기본으로 켬
+LOW_MEMORY_SIZE = 50 * 1048576
+
+
+@st.cache_resource(max_entries=WORKBOOK_CACHE_SIZE, show_spinner="파일 읽는 중...")
+def load_cached_workbook(file_hash, _data):
+    """업로드 파일 파싱 결과 캐시 (파일 내용 해시 기준)
+
+    위젯을 조작할 때마다 스크립트가 다시 실행되어도 같은 파일은 다시 파싱하지 않는다.
+    워크북은 직렬화한 스냅샷으로 보관하고, 처리할 때 fresh_workbook()으로 사본을 만든다.
+    """
+    wb = load_workbook(io.BytesIO(_data))
+    snapshot = pickle.dumps(wb, pickle.HIGHEST_PROTOCOL)
+    return wb.sheetnames, wb.active.title, snapshot
+
+
+@st.cache_data(max_entries=WORKBOOK_CACHE_SIZE, show_spinner=False)
+def list_cached_sheets(file_hash, _data):
+    """저메모리 모드의 (시트 이름 목록, 활성 시트) - 워크북을 불러오지 않고 workbook.xml만 읽음"""
+    return list_sheets(io.BytesIO(_data))
+
+
+def fresh_workbook(snapshot):
+    """캐시된 스냅샷에서 처리용 워크북 사본 생성 (캐시 원본은 변경되지 않음)"""
+    return pickle.loads(snapshot)
+
+
+def file_free_row(data, sheet_name, col, snapshot=None):
+    """워크북 없이 원본 파일에서 찾은 첫 빈 행
+
+    시트 XML을 바로 읽을 수 없으면 (네임스페이스 접두사 등) 워크북 snapshot에서 찾고,
+    snapshot이 없으면 (저메모리 모드) XlsxPatchError를 그대로 낸다.
+    """
+    try:
+        return scan_free_row(io.BytesIO(data), sheet_name, col)
+    except XlsxPatchError:
+        if snapshot is None:
+            raise
+        return next_free_row(fresh_workbook(snapshot)[sheet_name], col)
+
+
+def start_save(profiler, save, *args):
+    """결과 파일 저장을 작업 스레드에서 시작 (성능 측정 중이면 'save' 단계로 기록)
+
+    스크립트 스레드는 그동안 처리 결과를 그리고, 다운로드 버튼을 만들기 전에 wait()로 기다린다.
+    """
+    def run():
+        with profiler.stage('save'):
+            return save(*args)
+    return BackgroundSave(run).start()
+
+
+def session_parse_cache():
+    """세션의 줄 분석 캐시 - 다시 처리해도 유지되어 같은 규격 줄을 다시 분석하지 않음"""
+    cache = st.session_state.get('parse_cache')
+    if cache is None:
+        cache = st.session_state['parse_cache'] = ParseCache()
+    return cache
+
+
+def plan_sections(sections, wb, sheet_name, start_col, start_row, free_row, profiler=NULL_PROFILER,
+                  upsert=False, progress=None, on_error='abort'):
+    """[시트!셀] 지시문으로 나눈 구역들의 쓰기 계획 - ([(인스턴스, 시작 행, [묶음 계획...])], 처리 메시지)
+
+    첫 지시문 전의 구역은 사이드바 시작 행부터 쓰고, (시트, 열)마다 StreamlitExcelInput을
+    하나씩 만들어 이미 불러온 워크북 wb를 공유한다 (같은 (시트, 열)이 다시 나오면 이어서).
+    시작 행이 없는 [시트이름] 구역은 선택한 시트라도 free_row(시트, 열)로 구한 첫 빈 행부터 입력한다.
+    계획을 만들기 전에 모든 구역의 줄을 검사하고, 오류 줄이 있으면 on_error가 'skip'이
+    아닌 한 BatchCheckError로 중단한다 (워크북은 바뀌지 않음).
+    구역은 iter_chunks() 묶음 단위로 계획하고, 묶음마다 progress(BatchProgress)를 갱신한다.
+    """
+    single = is_single(sections)
+    processors = {}
+    checked = []  # (인스턴스, 검사 결과, 시작 행)
+    for section in sections:
+        target_sheet = section.sheet or sheet_name
+        col = (section.start_col or start_col).upper()
+        processor = processors.get((target_sheet, col))
+        if processor is None:
+            if section.start_row is not None:
+                row = section.start_row
+            elif section.sheet is None and col == start_col.upper():
+                row = start_row
+            else:
+                row = free_row(target_sheet, col)
+            processor = processors[(target_sheet, col)] = StreamlitExcelInput(wb, target_sheet, col, row)
+            processor.profiler = profiler
+            processor.parse_cache = session_parse_cache()
+            processor.upsert = upsert
+        elif section.start_row is not None:
+            processor.current_row = section.start_row
+
+        first_row = processor.current_row
+        result = processor.check_batch(section.lines, section.first_line_no, None if upsert else first_row)
+        if not upsert:
+            # 오류 줄은 행을 차지하지 않으므로 다음 구역의 시작 행은 검사 결과로 정해짐
+            processor.current_row = first_row + result.rows
+        checked.append((processor, section, result, first_row))
+
+    errors = [(processor.sheet_name, *error) for processor, _, result, _ in checked for error in result.errors]
+    if errors and on_error != 'skip':
+        raise BatchCheckError(errors)
+
+    planned = []
+    results = []
+    for processor, section, result, first_row in checked:
+        if not upsert:
+            processor.current_row = first_row
+        elif section.start_row is not None:
+            processor.current_row = first_row = section.start_row
+        else:
+            first_row = processor.current_row  # 항목 교체는 앞 구역을 계획한 뒤의 위치부터
+        if not single:
+            results.append(f"📄 [{processor.sheet_name}] {processor.start_col}{first_row}부터")
+        plans = []
+        for part in split_checked(result, CHUNK_LINES):
+            plan, chunk_results = processor.plan_results(part)
+            results.extend(chunk_results)
+            plans.append(plan)
+            if progress is not None:
+                progress.planned(plan)
+        planned.append((processor, first_row, plans))
+    return planned, results
+
+
+# 진행 막대에서 단계별 비율 (줄 분석 → 시트에 쓰기 → 저장)
+PLAN_SHARE = 0.7
+WRITE_SHARE = 0.2
+
+# 줄 유형 표시 이름 (요약 순서)
+KIND_LABELS = {'simple': '단순', 'position': '위치도', 'reference': '참고', 'mmc': 'MMC'}
+
+# 처리 결과를 줄마다 메시지로 보여 줄 최대 줄 수 (넘으면 스크롤 표 하나로 표시)
+RESULT_LIST_LIMIT = 200
+
+
+class BatchProgress:
+    """일괄 처리 진행 막대와 유형별 누적 건수 (묶음 계획마다 갱신)
+
+    total_lines는 대략의 줄 수 (표 파일은 줄바꿈 수)로, 넘어가면 막대만 멈춘다.
+    """
+
+    def __init__(self, total_lines):
+        self.total_lines = max(total_lines, 1)
+        self.lines = 0
+        self.kinds = Counter()
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._bar = st.progress(0.0, text="줄 분석 중...")
+        self._status = st.empty()
+
+    def planned(self, plan):
+        self.lines += len(plan.entries) + len(plan.errors)
+        self.kinds.update(kind for _, kind, _, _ in plan.entries)
+        self.errors += len(plan.errors)
+        self.cache_hits += plan.cache_hits
+        self.cache_misses += plan.cache_misses
+        done = min(self.lines / self.total_lines, 1.0)
+        self._bar.progress(done * PLAN_SHARE, text=f"줄 분석 {self.lines:,} / {self.total_lines:,}줄")
+        self._status.caption(kind_summary(self.kinds, self.errors))
+
+    def track(self, plans):
+        """묶음 계획 이터레이터를 그대로 넘기면서 진행 표시 (새 성적서 스트리밍 저장용)"""
+        for plan in plans:
+            self.planned(plan)
+            yield plan
+
+    def step(self, fraction, text):
+        self._bar.progress(min(fraction, 1.0), text=text)
+
+    def finish(self):
+        self._bar.empty()
+        self._status.empty()
+
+
+def kind_summary(kinds, errors):
+    """'단순 120 · 위치도 40 · 오류 2' 형식의 유형별 건수"""
+    parts = [f"{label} {kinds[kind]:,}" for kind, label in KIND_LABELS.items() if kinds[kind]]
+    parts.append(f"오류 {errors:,}")
+    return " · ".join(parts)
+
+
+def show_results(results, kinds, errors, cache_stats=None):
+    """처리 요약 - 유형별 건수, 오류 줄 표, 줄별 결과 (줄이 많으면 위젯 대신 스크롤 표)
+
+    cache_stats는 줄 분석 캐시의 (적중, 새로 분석) 줄 수.
+    """
+    columns = st.columns(len(KIND_LABELS) + 1)
+    for column, (kind, label) in zip(columns, KIND_LABELS.items()):
+        column.metric(label, f"{kinds[kind]:,}")
+    columns[-1].metric("오류", f"{len(errors):,}")
+    if cache_stats is not None:
+        st.caption(format_cache_stats(*cache_stats))
+
+    if errors:
+        with st.expander(f"⚠️ 오류 줄 {len(errors):,}개", expanded=True):
+            st.dataframe([{"줄": line_no, "내용": line, "오류": msg} for line_no, line, msg in errors],
+                         hide_index=True, use_container_width=True)
+
+    with st.expander("📋 처리 결과", expanded=len(results) <= RESULT_LIST_LIMIT):
+        if len(results) <= RESULT_LIST_LIMIT:
+            for result in results:
+                if result.startswith("📄"):
+                    st.markdown(f"**{result}**")
+                elif "✓" in result:
+                    st.success(result)
+                elif "⚠" in result:
+                    st.warning(result)
+        else:
+            # 줄마다 위젯을 만들지 않고 표 하나로 (화면에 보이는 부분만 그림)
+            st.dataframe([{"결과": result} for result in results], hide_index=True,
+                         use_container_width=True, height=400)
+
+
+def show_check_errors(errors, single=True):
+    """사전 검사에서 나온 오류 줄 전체를 표로 표시 (처리를 취소한 경우)"""
+    st.error(f"❌ 형식 오류가 있는 줄 {len(errors):,}개가 있어 아무것도 입력하지 않았습니다. "
+             "줄을 고치거나 '형식 오류가 있을 때'를 '오류 줄만 건너뛰기'로 바꾸세요.")
+    rows = [{"시트": sheet, "줄": line_no, "내용": line, "오류": msg} for sheet, line_no, line, msg in errors]
+    if single:
+        for row in rows:
+            del row["시트"]
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+
+
+def resolve_conflicts(plans, conflicts, action, sheet_name=None):
+    """겹치는 줄 표시 후 처리 방법에 따라 (묶음) 계획들 조정 - 취소했으면 False (sheet_name은 여러 시트 입력일 때 표시)"""
+    if not conflicts:
+        return True
+    prefix = f"[{sheet_name}] " if sheet_name else ""
+    rows = [{
+        "줄": line_no,
+        "행": f"{start_row}~{start_row + num_rows - 1}",
+        "값 있는 칸": n_cells,
+        "병합": ", ".join(merged),
+    } for line_no, start_row, num_rows, n_cells, merged in conflicts]
+
+    if action == 'abort':
+        st.error(f"❌ {prefix}기존 데이터와 겹치는 줄 {len(conflicts)}개가 있어 처리를 취소했습니다. "
+                 "시작 행을 바꾸거나 '기존 데이터와 겹칠 때' 설정을 변경하세요.")
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        return False
+    if action == 'skip':
+        line_nos = {conflict[0] for conflict in conflicts}
+        for plan in plans:
+            plan.drop_lines(line_nos)
+        st.warning(f"⚠️ {prefix}기존 데이터와 겹치는 {len(conflicts)}줄은 건너뛰고 기존 내용을 유지했습니다.")
+    else:
+        st.warning(f"⚠️ {prefix}기존 데이터와 겹치는 {len(conflicts)}줄을 덮어썼습니다.")
+    with st.expander(f"{prefix}겹치는 줄", expanded=False):
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+    return True
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def detect_free_row(file_hash, sheet_name, start_col, _snapshot, _data=None):
+    """선택한 시트 입력 영역의 첫 빈 행 (파일/시트/시작 열별로 한 번만 계산)
+
+    저메모리 모드(_snapshot이 None)에서는 워크북 대신 원본 파일의 시트 XML을 조각씩 읽어서 찾는다.
+    """
+    try:
+        col = column_index_from_string(start_col.upper())
+    except ValueError:
+        return 5
+    if _snapshot is None:
+        try:
+            return max(scan_free_row(io.BytesIO(_data), sheet_name, col), 5)
+        except XlsxPatchError:
+            return 5  # 읽을 수 없는 시트는 처리할 때 오류로 알림
+    wb = fresh_workbook(_snapshot)
+    return max(next_free_row(wb[sheet_name], col), 5)
+
+
+def get_workspace(file_hash, snapshot):
+    """세션 작업 공간 - 같은 업로드 파일이면 고친 워크북, 입력 위치, 기록을 이어서 사용
+
+    처음 한 번만 스냅샷에서 워크북을 만들고, 이후 일괄 입력/측정값은 이 워크북에 바로 적용한다.
+    파일은 결과 파일을 만들 때만 저장(직렬화)한다. 다른 파일을 올리면 새 작업 공간으로 바꾼다.
+    """
+    workspace = st.session_state.get('workspace')
+    if workspace is not None and workspace['file_hash'] == file_hash:
+        return workspace
+    if workspace is not None and workspace['history']:
+        st.warning(f"⚠️ 다른 파일을 올려서 이전 작업 공간(입력 {len(workspace['history'])}회)을 비웠습니다.")
+    workspace = st.session_state['workspace'] = {
+        'file_hash': file_hash,
+        'wb': fresh_workbook(snapshot),
+        'cursors': {},   # (시트, 시작 열) -> 다음 입력 행
+        'history': [],   # 적용한 입력 요약 (시각, 작업, 시트, 위치, 항목, 오류)
+        'output': None,  # 마지막으로 만든 결과 파일 (입력하면 비움)
+        'saved': None,   # 결과 파일 저장 시간/크기 요약
+    }
+    return workspace
+
+
+def workspace_free_row(workspace, sheet_name, start_col):
+    """작업 공간 워크북에서 입력 영역의 첫 빈 행"""
+    try:
+        col = column_index_from_string(start_col.upper())
+    except ValueError:
+        return 5
+    return max(next_free_row(workspace['wb'][sheet_name], col), 5)
+
+
+def workspace_row(workspace, sheet_name, start_col):
+    """작업 공간에서 (시트, 열)의 다음 입력 행 - 이어서 입력한 위치, 없으면 입력 영역의 첫 빈 행"""
+    row = workspace['cursors'].get((sheet_name, start_col.upper()))
+    return row if row is not None else workspace_free_row(workspace, sheet_name, start_col)
+
+
+def record_history(workspace, action, sheet_name, place, items, errors):
+    """작업 공간 기록 추가 - 워크북이 바뀌었으므로 만들어 둔 결과 파일은 비움"""
+    workspace['history'].append({
+        "시각": datetime.now().strftime("%H:%M:%S"),
+        "작업": action,
+        "시트": sheet_name,
+        "위치": place,
+        "항목": items,
+        "오류": errors,
+    })
+    workspace['output'] = None
+
+
+def show_workspace(workspace, file_name, compression=DEFAULT_COMPRESSION):
+    """작업 공간 요약, 결과 파일 만들기/다운로드, 비우기 (스크립트 끝에서 사이드바 자리에 그림)"""
+    history = workspace['history']
+    st.markdown("**🧰 작업 공간**")
+    st.caption(f"입력 {len(history)}회 · 항목 {sum(entry['항목'] for entry in history):,}개")
+    if workspace['cursors']:
+        st.caption("다음 입력 위치: " + ", ".join(
+            f"{sheet} {col}{row}" for (sheet, col), row in workspace['cursors'].items()))
+    if history:
+        with st.expander("작업 기록", expanded=False):
+            st.dataframe(history, hide_index=True, use_container_width=True)
+
+    if workspace['output'] is None:
+        if st.button("📦 결과 파일 만들기", disabled=not history, use_container_width=True):
+            with st.spinner("저장 중..."):
+                output = io.BytesIO()
+                start = time.perf_counter()
+                save_workbook(workspace['wb'], output, compression)
+            workspace['output'] = output.getvalue()
+            workspace['saved'] = format_save(time.perf_counter() - start, len(workspace['output']), compression)
+    if workspace['output'] is not None:
+        st.caption(f"💾 저장 {workspace['saved']}")
+        st.download_button(
+            label="💾 결과 파일 다운로드",
+            data=workspace['output'],
+            file_name=f"입력완료_{file_name}",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
+    if st.button("🗑 작업 공간 비우기", use_container_width=True,
+                 help="지금까지 입력한 내용을 버리고 업로드한 원본부터 다시 시작합니다."):
+        st.session_state.pop('workspace', None)
+        st.rerun()
 
-        return results, count
 
 # Streamlit UI
 st.set_page_config(
@@ -291,36 +465,130 @@ st.markdown("---")
 with st.sidebar:
     st.header("⚙️ 설정")
 
-    uploaded_file = st.file_uploader(
-        "엑셀 파일 업로드",
-        type=['xlsx', 'xlsm'],
-        help="측정 데이터를 입력할 엑셀 파일을 선택하세요"
+    new_report = st.checkbox(
+        "📄 새 성적서 만들기",
+        value=False,
+        help="템플릿 파일 없이 입력 블록만 담은 새 엑셀 파일을 만듭니다. 행 단위로 바로 기록해서 줄 수가 많아도 메모리를 적게 씁니다."
     )
 
-    if uploaded_file:
-        # 파일 로드
-        wb = load_workbook(io.BytesIO(uploaded_file.read()))
-
-        # 시트 선택
-        sheet_names = wb.sheetnames
-        selected_sheet = st.selectbox(
-            "시트 선택",
-            sheet_names,
-            index=sheet_names.index(wb.active.title) if wb.active.title in sheet_names else 0
+    uploaded_file = None
+    if not new_report:
+        uploaded_file = st.file_uploader(
+            "엑셀 파일 업로드",
+            type=['xlsx', 'xlsm'],
+            help="측정 데이터를 입력할 엑셀 파일을 선택하세요"
         )
 
+    if uploaded_file or new_report:
+        low_memory = False
+        if new_report:
+            selected_sheet = st.text_input("시트 이름", value="검사성적서")
+        else:
+            # 파일 로드 (내용 해시로 캐시)
+            file_data = uploaded_file.getvalue()
+            file_hash = hashlib.sha256(file_data).hexdigest()
+            low_memory = st.checkbox(
+                "🪶 저메모리 모드 (큰 파일)",
+                value=len(file_data) >= LOW_MEMORY_SIZE,
+                help="워크북 전체를 불러오지 않고 시트 목록만 읽은 뒤, 입력할 시트의 XML만 조각씩 고쳐서 저장합니다. "
+                     "다른 시트는 그대로 복사되어 파일 크기와 관계없이 메모리를 적게 씁니다. "
+                     "항목 교체, 작업 공간, 측정값 판정, 공정능력 계산은 사용할 수 없습니다."
+            )
+            if low_memory:
+                sheet_names, active_title = list_cached_sheets(file_hash, file_data)
+                wb_snapshot = None
+            else:
+                sheet_names, active_title, wb_snapshot = load_cached_workbook(file_hash, file_data)
+
+            # 시트 선택
+            selected_sheet = st.selectbox(
+                "시트 선택",
+                sheet_names,
+                index=sheet_names.index(active_title) if active_title in sheet_names else 0
+            )
+
+        workspace = None
+        if not new_report and not low_memory and st.checkbox(
+                "🧰 작업 공간 유지 (이어서 입력)",
+                value=False,
+                help="고친 워크북과 입력 위치를 세션에 보관해서 다음 일괄 입력/측정값을 다시 올리지 않고 이어서 입력합니다. "
+                     "파일은 '결과 파일 만들기'를 누를 때 한 번만 저장합니다."):
+            workspace = get_workspace(file_hash, wb_snapshot)
+
         # 시작 위치 설정
         col1, col2 = st.columns(2)
         with col1:
             start_col = st.text_input("시작 열", value="F")
         with col2:
-            start_row = st.number_input("시작 행", min_value=1, value=5, step=1)
+            if new_report:
+                free_row = default_row = 5
+            elif workspace is not None:
+                # 작업 공간에서는 지난번 입력이 끝난 위치부터 이어서
+                free_row = workspace_free_row(workspace, selected_sheet, start_col)
+                default_row = workspace_row(workspace, selected_sheet, start_col)
+            else:
+                free_row = default_row = detect_free_row(file_hash, selected_sheet, start_col, wb_snapshot, file_data)
+            start_row = st.number_input(
+                "시작 행", min_value=1, value=default_row, step=1,
+                help="기본값은 입력 영역에서 비어 있는 첫 행입니다. (작업 공간에서는 지난번 입력 다음 행)"
+            )
+        if start_row < free_row:
+            st.warning(f"⚠️ {start_row}~{free_row - 1}행에 이미 데이터가 있습니다. 이 위치부터 입력하면 덮어씁니다. (첫 빈 행: {free_row})")
+
+        fast_save = False
+        upsert = False
+        if not new_report:
+            if not low_memory:
+                upsert = st.checkbox(
+                    "🔁 항목 교체",
+                    value=False,
+                    help="시트에 이미 있는 항목번호는 그 자리에 다시 입력하고(행 수가 달라지면 아래 행을 밀거나 당김), "
+                         "없는 항목번호는 번호 순서에 맞는 자리에 끼워 넣습니다. 이 경우 빠른 저장은 사용하지 않습니다."
+                )
+            on_conflict = st.radio(
+                "기존 데이터와 겹칠 때",
+                ['abort', 'skip', 'force'],
+                format_func={'abort': "취소", 'skip': "겹치는 줄만 건너뛰기", 'force': "덮어쓰기"}.get,
+                horizontal=True,
+                help="입력할 행에 이미 값이나 병합이 있으면 처리 전에 알려줍니다. (항목 교체를 켜면 확인하지 않음)"
+            )
+            on_error = st.radio(
+                "형식 오류가 있을 때",
+                ['abort', 'skip'],
+                format_func={'abort': "취소", 'skip': "오류 줄만 건너뛰기"}.get,
+                horizontal=True,
+                help="처리 전에 모든 줄의 유형, 숫자, 행 개수, 시트 범위를 검사합니다. "
+                     "취소하면 오류 줄을 모두 보여 주고 아무것도 입력하지 않습니다."
+            )
+            if low_memory:
+                st.caption("🪶 저메모리 모드: 입력할 시트만 고쳐서 저장합니다. (빠른 저장)")
+            elif workspace is None:
+                fast_save = st.checkbox(
+                    "⚡ 빠른 저장",
+                    value=False,
+                    help="원본 파일에서 선택한 시트만 수정해서 저장합니다. 다른 시트와 서식은 그대로 복사되어 큰 파일도 빠르게 저장됩니다."
+                )
+        compression = st.selectbox(
+            "🗜 저장 압축",
+            list(COMPRESSION_LEVELS),
+            index=list(COMPRESSION_LEVELS).index(DEFAULT_COMPRESSION),
+            format_func=lambda name: f"{name} - {COMPRESSION_LABELS[name]}",
+            help="결과 파일(xlsx)의 zip 압축 수준입니다. store는 가장 빠르지만 파일이 커지고, "
+                 "fast는 기본과 크기가 비슷하면서 더 빠릅니다. 처리 후 표시되는 저장 시간으로 비교하세요."
+        )
+        profile_enabled = st.checkbox(
+            "⏱ 성능 측정",
+            value=False,
+            help="처리 단계별 소요 시간, 호출 횟수, 최대 메모리 사용량을 표시합니다."
+        )
 
         st.markdown("---")
         st.info(f"📍 입력 위치: **{start_col}{start_row}**")
+        # 작업 공간 요약은 이번 실행의 입력까지 반영해서 스크립트 끝에서 그림
+        workspace_panel = st.container() if workspace is not None else None
 
 # 메인 영역
-if uploaded_file:
+if uploaded_file or new_report:
     st.header("📝 데이터 입력")
 
     # 입력 형식 가이드
@@ -343,6 +611,10 @@ if uploaded_file:
         **형식:** `항목번호, 세트개수, MMC공차, [MAX값]`
         **예시:** `70, 10, 0.2m` 또는 `70, 10, 0.2m, 0.5`
 
+        ### 📄 여러 시트에 한 번에 입력
+        **형식:** `[시트이름]` (첫 빈 행부터), `[시트이름!F12]` (F12부터), `[!F30]` (선택한 시트 F30부터)
+        **예시:** 지시문 다음 줄부터 다음 지시문 전까지 그 시트에 입력 - 파일은 한 번만 읽고 한 번만 저장
+
         ---
 
         **💡 팁:**
@@ -360,9 +632,25 @@ if uploaded_file:
 55, 4, Ø4.25, 0.15, 0.15
 60, 1, (1.2)
 61, 3, (7.0), 0.15, 0.15, 참고
-70, 10, 0.2m, 0.5"""
+70, 10, 0.2m, 0.5""",
+        help="엑셀에서 복사한 표(탭 구분)를 붙여 넣어도 됩니다. 첫 행이 머리글이면 열 이름으로 인식합니다."
     )
 
+    # CAD 풍선 목록 등 표 파일 (입력란이 비어 있을 때 사용)
+    with st.expander("📑 표 파일 가져오기 (CSV/TSV)", expanded=False):
+        table_file = st.file_uploader(
+            "표 파일",
+            type=['csv', 'tsv', 'txt'],
+            help="한 행씩 읽어서 바로 처리하므로 수천 행도 메모리를 적게 씁니다. 입력란이 비어 있을 때 사용됩니다."
+        )
+        table_columns = st.text_input(
+            "열 지정",
+            value="",
+            placeholder="item=Balloon, count=Qty, base=Nominal, upper=+Tol, lower=-Tol, ref=Remark, type=Type",
+            help="필드: item, count, base, upper, lower, ref, type, max - 열은 머리글 이름 또는 열 번호(1부터). "
+                 "비워 두면 머리글 이름(항목번호, 기준값, Nominal 등)으로 자동 인식합니다."
+        )
+
     col1, col2, col3 = st.columns([1, 1, 2])
 
     with col1:
@@ -375,33 +663,201 @@ if uploaded_file:
         st.rerun()
 
     # 데이터 처리
-    if process_btn and batch_input:
-        lines = [line.strip() for line in batch_input.split('\n') if line.strip()]
+    if process_btn and (batch_input.strip() or table_file is not None):
+        try:
+            if not batch_input.strip():
+                # 표 파일은 전체를 문자열로 만들지 않고 한 행씩 읽음
+                table_data = table_file.getvalue()
+                total_lines = table_data.count(b'\n') + 1
+                table_stream = io.TextIOWrapper(io.BytesIO(table_data), encoding='utf-8-sig', newline='')
+                lines = iter_table_lines(table_stream, parse_mapping(table_columns))
+            elif '\t' in batch_input:
+                lines = [line for line in batch_input.split('\n') if line.strip()]
+                total_lines = len(lines)
+                lines = iter_table_lines(lines)
+            else:
+                lines = [line.strip() for line in batch_input.split('\n') if line.strip()]
+                total_lines = len(lines)
+            sections = None
+            if not new_report:
+                # [시트!셀] 지시문으로 구역 나누기 (지시문이 없으면 선택한 시트 구역 하나)
+                sections = split_sections(lines)
+                check_sheets(sections, sheet_names)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            st.stop()
 
         if lines:
-            with st.spinner('데이터 처리 중...'):
-                processor = StreamlitExcelInput(wb, selected_sheet, start_col, start_row)
-                results, count = processor.process_batch(lines)
-
-                st.success(f"✅ 처리 완료! 총 {count}개 항목이 입력되었습니다.")
-
-                # 결과 표시
-                with st.expander("📋 처리 결과", expanded=True):
-                    for result in results:
-                        if "✓" in result:
-                            st.success(result)
-                        elif "⚠" in result:
-                            st.warning(result)
-
-                # 다운로드 버튼
-                output = io.BytesIO()
-                wb.save(output)
+            # 묶음(iter_chunks) 단위로 계획하면서 진행 막대와 유형별 건수를 갱신
+            progress = BatchProgress(total_lines)
+            output = io.BytesIO()
+            profiler = StageProfiler().start() if profile_enabled else NULL_PROFILER
+            if new_report:
+                # 워크시트를 메모리에 만들지 않고 묶음 단위 계획을 행 순서대로 바로 기록
+                processor = StreamlitExcelInput(None, selected_sheet, start_col, start_row)
+                processor.profiler = profiler
+                processor.parse_cache = session_parse_cache()
+                results = []
+                stats = write_report(output, selected_sheet or "검사성적서",
+                                     progress.track(processor.iter_plans(lines, results)), profiler, compression)
+                count = stats['processed']
+                kinds = progress.kinds
+                errors = stats['errors']
+                planned = []
+                saving = None
+            else:
+                single = is_single(sections)
+                if workspace is not None:
+                    # 작업 공간 워크북에 바로 이어서 입력 (파일을 다시 읽거나 저장하지 않음)
+                    wb = workspace['wb']
+                    source = None
+                    free_row = lambda sheet, col: workspace_row(workspace, sheet, col)
+                elif (fast_save or low_memory) and not upsert:
+                    # 워크북을 불러오지 않고 계획만 만든 뒤 원본 XML 직접 수정 (여러 시트도 한 번에)
+                    wb = None
+                    source = file_data
+                    free_row = lambda sheet, col: max(file_free_row(file_data, sheet, column_index_from_string(col),
+                                                                    wb_snapshot), 5)
+                else:
+                    with profiler.stage('load'):
+                        wb = fresh_workbook(wb_snapshot)
+                    source = None
+                    free_row = lambda sheet, col: max(next_free_row(wb[sheet], column_index_from_string(col)), 5)
+                # 구역마다 시트별 인스턴스가 같은 워크북에 입력하고 저장은 한 번
+                try:
+                    planned, results = plan_sections(sections, wb, selected_sheet, start_col, start_row,
+                                                     free_row, profiler, upsert, progress, on_error)
+                    if not upsert:
+                        progress.step(PLAN_SHARE, "덮어쓰기 확인 중...")
+                        for processor, _, plans in planned:
+                            conflicts = processor.find_conflicts(
+                                plans, io.BytesIO(source) if source is not None else None, wb_snapshot)
+                            if not resolve_conflicts(plans, conflicts, on_conflict,
+                                                     None if single else processor.sheet_name):
+                                progress.finish()
+                                profiler.stop()
+                                st.stop()
+                except BatchCheckError as e:
+                    progress.finish()
+                    profiler.stop()
+                    show_check_errors(e.errors, single)
+                    st.stop()
+                except ValueError as e:
+                    progress.finish()
+                    profiler.stop()
+                    st.error(f"❌ {e}")
+                    st.stop()
+                except XlsxPatchError as e:
+                    # 워크북 스냅샷이 있으면 그쪽에서 찾으므로 저메모리 모드에서만 여기까지 옴
+                    progress.finish()
+                    profiler.stop()
+                    st.error(f"❌ 저메모리 모드로 읽을 수 없는 시트입니다: {e} "
+                             "(저메모리 모드를 끄고 다시 처리하면 일반 저장으로 처리합니다)")
+                    st.stop()
+
+                all_plans = [plan for _, _, plans in planned for plan in plans]
+                count = sum(len(plan.entries) for plan in all_plans)
+                kinds = Counter(kind for plan in all_plans for _, kind, _, _ in plan.entries)
+                errors = [error for plan in all_plans for error in plan.errors]
+
+                # 저장(직렬화)은 작업 스레드에서 하고 그동안 처리 결과를 그림 (다운로드 버튼 전에 기다림)
+                saving = None
+                if wb is None:
+                    saving = start_save(profiler, patch_sheets, io.BytesIO(file_data), output,
+                                        [(processor.sheet_name, plans) for processor, _, plans in planned],
+                                        compression)
+                else:
+                    for i, (processor, plan) in enumerate(
+                            (processor, plan) for processor, _, plans in planned for plan in plans):
+                        progress.step(PLAN_SHARE + WRITE_SHARE * i / len(all_plans),
+                                      f"시트에 쓰는 중... ({i + 1}/{len(all_plans)} 묶음)")
+                        processor.write_plan(plan)
+                    if workspace is not None:
+                        for processor, first_row, plans in planned:
+                            workspace['cursors'][(processor.sheet_name, processor.start_col)] = processor.current_row
+                            record_history(workspace, "일괄 입력", processor.sheet_name,
+                                           f"{processor.start_col}{first_row}~{processor.start_col}{processor.current_row - 1}",
+                                           sum(len(plan.entries) for plan in plans),
+                                           sum(len(plan.errors) for plan in plans))
+                    else:
+                        saving = start_save(profiler, save_workbook, wb, output, compression)
+            progress.finish()
+
+            st.success(f"✅ 처리 완료! 총 {count}개 항목이 입력되었습니다.")
+            if not new_report and not single:
+                st.table([{
+                    "시트": processor.sheet_name,
+                    "시작": f"{processor.start_col}{first_row}",
+                    "항목": sum(len(plan.entries) for plan in plans),
+                    "오류": sum(len(plan.errors) for plan in plans),
+                    "다음 입력 위치": f"{processor.start_col}{processor.current_row}",
+                } for processor, first_row, plans in planned])
+
+            # 결과 표시 (유형별 건수와 오류 줄, 줄이 많으면 스크롤 표)
+            show_results(results, kinds, errors, (progress.cache_hits, progress.cache_misses))
+
+            if saving is not None:
+                with st.spinner("저장 중..."):
+                    try:
+                        saving.wait()
+                        save_seconds = saving.seconds
+                    except XlsxPatchError as e:
+                        if low_memory:
+                            # 저메모리 모드에서는 워크북 전체를 불러오는 일반 저장으로 넘어가지 않음
+                            profiler.stop()
+                            st.error(f"❌ 저메모리 모드로 저장할 수 없는 입력입니다: {e} "
+                                     "(저메모리 모드를 끄고 다시 처리하면 일반 저장으로 처리합니다)")
+                            st.stop()
+                        # 빠른 저장이 안 되면 워크북에 계획을 적용해서 전체 저장
+                        st.warning(f"⚠️ 빠른 저장을 사용할 수 없어 일반 저장으로 처리합니다: {e}")
+                        with profiler.stage('load'):
+                            wb = fresh_workbook(wb_snapshot)
+                        for processor, _, plans in planned:
+                            processor.wb, processor.ws = wb, wb[processor.sheet_name]
+                            for plan in plans:
+                                processor.write_plan(plan)
+                        output = io.BytesIO()
+                        start = time.perf_counter()
+                        with profiler.stage('save'):
+                            save_workbook(wb, output, compression)
+                        save_seconds = time.perf_counter() - start
+                st.caption(f"💾 저장 {format_save(save_seconds, output.getbuffer().nbytes, compression)}")
+            profiler.stop()
+
+            # 성능 측정 결과
+            if profiler.enabled:
+                report = profiler.report()
+                with st.expander("⏱ 단계별 성능", expanded=True):
+                    st.table([{
+                        "단계": stage['label'],
+                        "시간 (ms)": round(stage['seconds'] * 1000, 1),
+                        "호출 횟수": stage['calls'],
+                        "최대 메모리 (MB)": round((stage['peak_bytes'] or 0) / 1048576, 2),
+                    } for stage in report['stages']])
+                    st.caption(f"합계 {report['total_seconds'] * 1000:.1f} ms")
+                    if 'cells_per_line' in report:
+                        st.caption(f"줄당 셀 쓰기: {report['cells_per_line']}개 "
+                                   f"(총 {report['counters'].get('cells', 0)}개)")
+                    st.download_button(
+                        label="📄 측정 결과 (JSON)",
+                        data=json.dumps(report, ensure_ascii=False, indent=2),
+                        file_name="성능측정.json",
+                        mime="application/json"
+                    )
+
+            # 다운로드 버튼 (작업 공간에서는 사이드바에서 마지막에 한 번만 저장)
+            if workspace is not None:
+                # 여러 시트 입력은 위 표의 '다음 입력 위치' 참고
+                next_place = f" 다음 입력은 {processor.start_col}{processor.current_row}부터 이어집니다." if single else ""
+                st.info(f"🧰 작업 공간에 반영했습니다.{next_place} "
+                        "다 입력하면 사이드바에서 결과 파일을 만들어 내려받으세요.")
+            else:
                 output.seek(0)
 
                 st.download_button(
                     label="💾 결과 파일 다운로드",
                     data=output,
-                    file_name=f"입력완료_{uploaded_file.name}",
+                    file_name="새성적서.xlsx" if new_report else f"입력완료_{uploaded_file.name}",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     use_container_width=True
                 )
@@ -411,6 +867,160 @@ if uploaded_file:
     elif process_btn:
         st.warning("⚠️ 데이터를 입력해주세요.")
 
+    if low_memory:
+        st.markdown("---")
+        st.info("🪶 저메모리 모드에서는 측정값 입력 / 판정과 공정능력 계산을 사용할 수 없습니다. "
+                "(규격과 측정값을 읽으려면 시트 전체를 불러와야 함)")
+
+    # 측정값 입력 / 판정 (규격이 입력된 기존 파일만)
+    if not new_report and not low_memory:
+        st.markdown("---")
+        st.header("📏 측정값 입력 / 판정")
+
+        measure_input = st.text_area(
+            "측정값 (항목번호, 측정값1, 측정값2, ...)",
+            height=200,
+            help="CMM/캘리퍼 CSV나 엑셀에서 복사한 열을 붙여 넣으세요. 여러 행 항목은 같은 항목번호를 "
+                 "줄마다 반복하면 위 행부터 차례로 들어가고, MMC 항목은 세트마다 측정값 행에 들어갑니다.",
+            placeholder="""51, 7.02, 6.98, 7.05
+55, 4.31, 4.28, 4.30
+55, 4.27, 4.33, 4.29"""
+        )
+        try:
+            default_sample_col = get_column_letter(column_index_from_string(start_col.upper()) + SAMPLE_OFFSET)
+        except ValueError:
+            default_sample_col = "M"
+        mcol1, mcol2 = st.columns(2)
+        with mcol1:
+            sample_col = st.text_input("측정값 시작 열", value=default_sample_col)
+        with mcol2:
+            judge_col = st.text_input("판정 열", value="",
+                                      help=f"비워 두면 측정값 시작 열에서 {MAX_SAMPLES}열 뒤에 OK/NG를 씁니다. "
+                                           f"(측정값 개수와 관계없이 같은 열)")
+
+        measure_btn = st.button("📏 측정값 입력 / 판정", type="primary")
+
+        if measure_btn and measure_input.strip():
+            lines = [line.strip() for line in measure_input.split('\n') if line.strip()]
+            try:
+                with st.spinner('측정값 판정 중...'):
+                    profiler = StageProfiler().start() if profile_enabled else NULL_PROFILER
+                    if workspace is not None:
+                        wb = workspace['wb']
+                    else:
+                        with profiler.stage('load'):
+                            wb = fresh_workbook(wb_snapshot)
+                    ws = wb[selected_sheet]
+                    plan, measured = plan_measurements(
+                        ws, column_index_from_string(start_col.upper()), lines,
+                        column_index_from_string(sample_col.strip().upper()),
+                        column_index_from_string(judge_col.strip().upper()) if judge_col.strip() else None,
+                        profiler)
+
+                    output = io.BytesIO()
+                    if workspace is not None:
+                        # 작업 공간 워크북에 바로 적용하고 저장은 결과 파일을 만들 때
+                        apply_plan(plan, ws, MergedRangeIndex(ws, plan.min_col, plan.max_col), profiler)
+                        record_history(workspace, "측정값", selected_sheet,
+                                       f"{measured['sample_col']}~{measured['judge_col']}열",
+                                       measured['rows'], len(plan.errors))
+                    else:
+                        try:
+                            with profiler.stage('save'):
+                                patch_xlsx(io.BytesIO(file_data), output, selected_sheet, [plan], compression)
+                        except XlsxPatchError:
+                            apply_plan(plan, ws, MergedRangeIndex(ws, plan.min_col, plan.max_col), profiler)
+                            output = io.BytesIO()
+                            with profiler.stage('save'):
+                                save_workbook(wb, output, compression)
+                    profiler.stop()
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+
+            st.success(f"✅ 측정값 {measured['points']}개 ({measured['rows']}개 행) 입력 - "
+                       f"{measured['sample_col']}열부터, 판정 {measured['judge_col']}열")
+            mcol1, mcol2, mcol3 = st.columns(3)
+            mcol1.metric("OK", f"{measured['ok']}행")
+            mcol2.metric("NG", f"{measured['ng']}행")
+            mcol3.metric("판정 안 함", f"{measured['unjudged']}행")
+            if measured['ng_items']:
+                st.error(f"NG 항목: {', '.join(measured['ng_items'])}")
+            for _, _, msg in plan.errors:
+                st.warning(msg)
+            if profiler.enabled:
+                with st.expander("⏱ 단계별 성능", expanded=False):
+                    st.text("\n".join(profiler.format_lines()))
+
+            if workspace is None:
+                output.seek(0)
+                st.download_button(
+                    label="💾 판정 결과 파일 다운로드",
+                    data=output,
+                    file_name=f"판정완료_{uploaded_file.name}",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
+        elif measure_btn:
+            st.warning("⚠️ 측정값을 입력해주세요.")
+
+        # 공정능력 (Cp/Cpk) - 업로드한 파일과 추가 로트 파일의 측정값을 합쳐서 계산
+        st.markdown("---")
+        st.header("📈 공정능력 (Cp/Cpk)")
+        lot_files = st.file_uploader(
+            "다른 로트 파일 (선택)",
+            type=['xlsx', 'xlsm'],
+            accept_multiple_files=True,
+            help="같은 양식의 다른 로트 파일을 함께 올리면 특성별 측정값을 모두 합쳐서 계산합니다. "
+                 "추가 파일은 같은 이름의 시트(없으면 활성 시트)를 읽습니다."
+        )
+        capability_btn = st.button("📈 공정능력 계산")
+
+        if capability_btn:
+            tasks = [{'file': io.BytesIO(file_data), 'name': uploaded_file.name, 'sheet': selected_sheet,
+                      'start_col': start_col, 'sample_col': sample_col.strip(), 'judge_col': judge_col.strip()}]
+            if workspace is not None:
+                # 작업 공간에서 입력한 측정값까지 포함 (저장하지 않고 메모리의 워크북을 읽음)
+                tasks[0]['workbook'] = workspace['wb']
+            for lot_file in lot_files or []:
+                tasks.append({'file': io.BytesIO(lot_file.getvalue()), 'name': lot_file.name,
+                              'sheet': selected_sheet, 'fallback_active': True, 'start_col': start_col,
+                              'sample_col': sample_col.strip(), 'judge_col': judge_col.strip()})
+            with st.spinner('공정능력 계산 중...'):
+                # 웹 앱에서는 프로세스를 새로 띄우지 않고 차례로 읽음 (여러 로트 병렬 처리는 CLI --capability)
+                rows, lots = run_capability(tasks, jobs=1)
+
+            for lot in lots:
+                if 'error' in lot:
+                    st.warning(f"⚠️ {lot['file']}: {lot['error']}")
+            if not rows:
+                st.error("❌ 측정값이 입력된 항목이 없습니다.")
+            else:
+                st.success(f"✅ {sum('error' not in lot for lot in lots)}개 로트, 특성 {len(rows)}개")
+                st.dataframe(
+                    [dict(zip([header for header, _ in SUMMARY_COLUMNS], row)) for row in rows],
+                    use_container_width=True, hide_index=True
+                )
+                low = low_capability(rows)
+                if low:
+                    st.warning(f"⚠️ Cpk {CPK_TARGET} 미만 {len(low)}개: "
+                               + ", ".join(f"{item_no}-{point} ({cpk})" for item_no, point, cpk in low))
+
+                summary_output = io.BytesIO()
+                write_summary(summary_output, rows)
+                summary_output.seek(0)
+                st.download_button(
+                    label="💾 공정능력 요약 다운로드",
+                    data=summary_output,
+                    file_name="공정능력.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
+
+    if workspace is not None:
+        with workspace_panel:
+            show_workspace(workspace, uploaded_file.name, compression)
+
 else:
     # 파일이 업로드되지 않았을 때
     st.info("👈 왼쪽 사이드바에서 엑셀 파일을 업로드하세요")
@@ -0,0 +1,51 @@
+from openpyxl.styles import Alignment
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.xml.functions import tostring
+
+
+# 일괄 입력에서 쓰는 셀 스타일 (이름 -> 정렬) - 모든 저장 방식이 이 정의를 공유
+ALIGNMENTS = {
+    'center': Alignment(horizontal='center', vertical='center'),
+}
+
+
+def get_alignment(name):
+    try:
+        return ALIGNMENTS[name]
+    except KeyError:
+        raise ValueError(f"알 수 없는 스타일: {name}") from None
+
+
+def alignment_xml(name):
+    """styles.xml의 xf 안에 넣을 <alignment> 요소 (XML 직접 수정용)"""
+    return tostring(get_alignment(name).to_tree()).decode('utf-8')
+
+
+class StyleRegistry:
+    """워크북 스타일 표에 등록한 정렬 번호 캐시
+
+    셀마다 Alignment 객체를 새로 만들어 대입하면 매번 스타일 표에서 같은 항목을
+    찾아야 하므로, 이름별로 한 번만 등록하고 그 번호를 셀에 바로 기록한다.
+    """
+
+    def __init__(self, wb):
+        self.wb = wb
+        self._alignment_ids = {}
+
+    def alignment_id(self, name):
+        alignment_id = self._alignment_ids.get(name)
+        if alignment_id is None:
+            alignment_id = self.wb._alignments.add(get_alignment(name))
+            self._alignment_ids[name] = alignment_id
+        return alignment_id
+
+    def style_cell(self, cell, name):
+        if not cell._style:
+            cell._style = StyleArray()
+        cell._style.alignmentId = self.alignment_id(name)
+        return cell
+
+    def apply(self, ws, styles):
+        """(행, 열, 스타일 이름) 목록을 한 번에 적용"""
+        for row, col, name in styles:
+            self.style_cell(ws.cell(row, col), name)
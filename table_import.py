@@ -0,0 +1,171 @@
+import csv
+import re
+from itertools import chain
+
+
+# 가져올 필드와 머리글 자동 인식에 쓰는 이름 (소문자, 공백 제거 후 비교)
+FIELD_HEADERS = {
+    'item': ['항목번호', '항목', '번호', 'item', 'itemno', 'no', 'balloon', 'balloonno'],
+    'count': ['행개수', '개수', '세트개수', '수량', 'count', 'qty', 'quantity'],
+    'base': ['기준값', '기준', '치수', 'base', 'nominal', 'value'],
+    'upper': ['상한공차', '상한', 'upper', 'uppertol', '+tol', 'plus'],
+    'lower': ['하한공차', '하한', 'lower', 'lowertol', '-tol', 'minus'],
+    'ref': ['ref', '참고', '비고', 'remark', 'note'],
+    'type': ['유형', 'type', 'kind'],
+    'max': ['max', 'max값', '최대', 'maxvalue'],
+}
+
+# 머리글 없는 표의 기본 열 순서 (일괄 입력 줄과 같은 순서)
+DEFAULT_ORDER = ['item', 'count', 'base', 'upper', 'lower', 'ref']
+
+# 유형 열 값 → line_parser 유형 (비어 있으면 자동 감지)
+KIND_NAMES = {
+    'simple': 'simple', '단순': 'simple',
+    'position': 'position', '위치도': 'position',
+    'reference': 'reference', 'ref': 'reference', '참고': 'reference',
+    'mmc': 'mmc',
+}
+
+_NUMBER = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)$')
+
+
+def parse_mapping(text):
+    """열 지정 문자열 분석 - 'item=Balloon, base=Nominal, count=3' → {필드: 머리글 이름 또는 열 번호(1부터)}"""
+    mapping = {}
+    if not text or not text.strip():
+        return mapping
+    for part in re.split(r'[,;]', text):
+        if not part.strip():
+            continue
+        field, sep, column = part.partition('=')
+        field = field.strip().lower()
+        column = column.strip()
+        if not sep or field not in FIELD_HEADERS or not column:
+            raise ValueError(f"열 지정 형식 오류: '{part.strip()}' "
+                             f"(필드=열, 필드: {', '.join(FIELD_HEADERS)})")
+        mapping[field] = int(column) if column.isdigit() else column
+    return mapping
+
+
+def _normalize(name):
+    return re.sub(r'\s+', '', str(name)).lower()
+
+
+def _is_header(row):
+    """숫자 칸이 하나도 없는 첫 행은 머리글"""
+    return any(cell.strip() for cell in row) and not any(_NUMBER.match(cell.strip()) for cell in row)
+
+
+def _resolve_columns(header, mapping):
+    """필드 → 열 위치(0부터) - 지정이 없으면 머리글 이름으로, 머리글도 없으면 기본 순서로"""
+    if header is None:
+        if any(isinstance(column, str) for column in mapping.values()):
+            raise ValueError("머리글이 없는 표는 열 번호로만 지정할 수 있습니다.")
+        if not mapping:
+            return {field: i for i, field in enumerate(DEFAULT_ORDER)}
+        return {field: column - 1 for field, column in mapping.items()}
+
+    names = [_normalize(name) for name in header]
+    columns = {}
+    for field, column in mapping.items():
+        if isinstance(column, int):
+            columns[field] = column - 1
+        elif _normalize(column) in names:
+            columns[field] = names.index(_normalize(column))
+        else:
+            raise ValueError(f"'{column}' 열을 찾을 수 없습니다. (머리글: {', '.join(header)})")
+    for field, aliases in FIELD_HEADERS.items():
+        if field in columns:
+            continue
+        for alias in aliases:
+            if alias in names and names.index(alias) not in columns.values():
+                columns[field] = names.index(alias)
+                break
+    if 'item' not in columns or 'base' not in columns:
+        raise ValueError(f"항목번호/기준값 열을 찾을 수 없습니다. 열을 지정해 주세요. (머리글: {', '.join(header)})")
+    return columns
+
+
+def _sniff_delimiter(line):
+    if '\t' in line:
+        return '\t'
+    if line.count(';') > line.count(','):
+        return ';'
+    return ','
+
+
+def table_line(fields, kind=None):
+    """필드 dict를 일괄 입력 한 줄로 - 유형별 열 순서는 직접 입력하는 형식과 같음"""
+    item = fields.get('item', '')
+    count = fields.get('count') or '1'
+    base = fields.get('base', '')
+    upper = fields.get('upper', '')
+    lower = fields.get('lower', '')
+    ref = fields.get('ref', '')
+    max_val = fields.get('max', '')
+
+    # 유형 열이 없으면 line_parser와 같은 표시(괄호, MMC 'm')로 열 순서를 정함
+    layout = kind
+    if layout is None:
+        base_lower = base.lower()
+        if base.startswith('(') and base.endswith(')'):
+            layout = 'reference'
+        elif max_val or 'mmc' in base_lower or ('m' in base_lower and 'mm' not in base_lower):
+            layout = 'mmc'
+
+    if layout == 'reference' and not base.startswith('('):
+        base = f"({base})"
+    if layout == 'mmc':
+        parts = [item, count, base, max_val, ref]
+    elif layout == 'reference' and not (upper and lower):
+        parts = [item, count, base, ref]
+    else:
+        parts = [item, count, base, upper, lower, ref]
+    while parts and not parts[-1]:
+        parts.pop()
+    return ', '.join(parts)
+
+
+def iter_table_lines(source, mapping=None, delimiter=None):
+    """CSV/TSV 표(파일 객체 또는 줄 이터러블)를 일괄 입력 줄로 하나씩 바꾸는 제너레이터 반환
+
+    표 전체를 읽어 두지 않고 한 행씩 읽어서 바로 내보내므로 plan_batch()/iter_plans()에
+    그대로 넘기면 행 수와 관계없이 메모리를 적게 쓴다. 구분자는 첫 줄에서 감지하고,
+    숫자 칸이 없는 첫 행은 머리글로 본다. 유형 열이 있는 행은 (줄, 유형) 튜플로 내보낸다.
+    열을 찾을 수 없으면 처리를 시작하기 전에 (첫 행을 읽는 즉시) ValueError.
+    """
+    mapping = mapping or {}
+    lines = iter(source)
+    first = next(lines, None)
+    if first is None:
+        return iter(())
+    delimiter = delimiter or _sniff_delimiter(first)
+
+    rows = csv.reader(chain([first], lines), delimiter=delimiter)
+    header = next(rows)
+    if _is_header(header):
+        columns = _resolve_columns(header, mapping)
+    else:
+        columns = _resolve_columns(None, mapping)
+        rows = chain([header], rows)
+    return _table_lines(rows, columns)
+
+
+def _table_lines(rows, columns):
+    """표의 데이터 행 → 일괄 입력 줄 (빈 행은 건너뜀)"""
+    for row in rows:
+        if not any(cell.strip() for cell in row):
+            continue
+        # 칸 안의 쉼표는 줄 구분과 섞이지 않도록 공백으로
+        fields = {field: row[i].strip().replace(',', ' ') if i < len(row) else ''
+                  for field, i in columns.items()}
+        kind_text = fields.pop('type', '')
+        kind = KIND_NAMES.get(kind_text.lower(), kind_text) if kind_text else None
+        line = table_line(fields, kind)
+        yield line if kind is None else (line, kind)
+
+
+def read_table_lines(path, mapping=None, delimiter=None):
+    """표 파일을 열어 일괄 입력 줄을 하나씩 내보냄 (다 읽으면 파일을 닫음)"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        yield from iter_table_lines(f, mapping, delimiter)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+from openpyxl import Workbook
+
+# 저장소의 모듈은 최상위에 바로 있으므로 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def template(tmp_path):
+    """입력 영역(F~L열)이 비어 있는 성적서 양식 - 머리글과 다른 시트 하나"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = '검사성적서'
+    for col, title in enumerate(['항목번호', '기준값', '상한공차', '하한공차', '하한계산', '상한계산', 'REF'], 6):
+        ws.cell(4, col, title)
+    ws['B2'] = '품번'
+    other = wb.create_sheet('추가')
+    other['A1'] = '메모'
+    path = tmp_path / 'template.xlsx'
+    wb.save(path)
+    return str(path)
@@ -0,0 +1,70 @@
+import pytest
+
+from batch_check import MAX_COL, MAX_ROW, BatchCheckError, check_lines, rows_needed, split_checked
+from excel_automation import EasyExcelInput
+from line_parser import ParseCache
+
+
+LINES = [
+    "51, 2, 7.0, 0.15, 0.15",
+    "잘못된 줄",
+    "52, 0, 7.0, 0.15, 0.15",
+    "70, 2, 0.2m",
+    "53, 1, abc, 0.1",
+]
+
+
+def test_check_lines_collects_every_error():
+    checked = check_lines(LINES, ParseCache(), first_line_no=3, start_row=5)
+    assert [line_no for line_no, _, _ in checked.errors] == [4, 5, 7]
+    assert len(checked.lines) == len(LINES)
+    # 오류 줄은 행을 차지하지 않음 (단순 2행 + MMC 2세트 6행)
+    assert checked.rows == 8
+
+
+def test_rows_needed():
+    checked = check_lines(["70, 2, 0.2m", "51, 3, 7.0, 0.1, 0.1"], ParseCache())
+    assert [rows_needed(rec) for _, _, rec, _ in checked.lines] == [6, 3]
+
+
+def test_check_lines_sheet_bounds():
+    checked = check_lines(["1, 2, 7.0, 0.1, 0.1", "2, 1, 7.0, 0.1, 0.1"], ParseCache(), start_row=MAX_ROW - 1)
+    assert [line_no for line_no, _, _ in checked.errors] == [2]
+    with pytest.raises(ValueError):
+        check_lines(LINES, ParseCache(), col_num=MAX_COL)
+
+
+def test_check_lines_table_kind():
+    # 표 가져오기의 (줄, 유형) - 지정한 유형으로 분석
+    checked = check_lines([("1, 1, 7.0, 0.1, 0.1", 'reference')], ParseCache())
+    assert checked.lines[0][2].kind == 'reference'
+
+
+def test_split_checked_keeps_cache_counts_once():
+    cache = ParseCache()
+    checked = check_lines(["1, 1, 7.0, 0.1, 0.1"] * 5, cache)
+    parts = list(split_checked(checked, 2))
+    assert [len(part.lines) for part in parts] == [2, 2, 1]
+    assert sum(part.rows for part in parts) == checked.rows
+    assert sum(part.cache_hits for part in parts) == checked.cache_hits == 4
+
+
+def test_batch_check_error_lists_lines():
+    error = BatchCheckError([('A', 2, 'x', 'msg'), ('B', 5, 'y', 'msg')])
+    assert '2(A), 5(B)' in str(error)
+    assert isinstance(error, ValueError)
+
+
+def test_run_batch_checks_before_writing(template, tmp_path):
+    lines = ["1, 1, 7.0, 0.1, 0.1", "2, 0, 7.0, 0.1, 0.1", "[추가]", "잘못된 줄"]
+    output = tmp_path / 'out.xlsx'
+    with pytest.raises(BatchCheckError) as info:
+        EasyExcelInput().run_batch(template, lines, output_path=str(output))
+    assert [(sheet, line_no) for sheet, line_no, _, _ in info.value.errors] == [('검사성적서', 2), ('추가', 4)]
+    assert not output.exists()
+
+    app = EasyExcelInput()
+    app.on_error = 'skip'
+    summary = app.run_batch(template, lines, output_path=str(output))
+    assert summary['processed'] == 1
+    assert summary['failed'] == 2
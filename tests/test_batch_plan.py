@@ -0,0 +1,114 @@
+from openpyxl import Workbook
+
+from batch_plan import (BatchPlan, apply_plan, find_conflicts, occupied_cells, shift_rows, shifted_row, shifted_span,
+                        target_rows)
+from merge_index import MergedRangeIndex
+
+
+def test_plan_cells_keep_last_write():
+    plan = BatchPlan(6, 12)
+    plan.write(6, 7, 'b')
+    plan.write(5, 6, 'a')
+    plan.write(6, 7, 'c')
+    assert plan.cells() == [(5, 6, 'a'), (6, 7, 'c')]
+
+
+def test_plan_rollback():
+    plan = BatchPlan(6, 12)
+    plan.write(5, 6, '1')
+    mark = plan.mark()
+    plan.write(6, 6, '2')
+    plan.merge(6, 2, 6)
+    plan.reserve(6, 2)
+    plan.rollback(mark)
+    assert plan.cells() == [(5, 6, '1')]
+    assert (plan.merges, plan.styles, plan.spans) == ([], [], [])
+
+
+def test_apply_plan_replaces_existing_merges():
+    ws = Workbook().active
+    ws.merge_cells('F5:F7')
+    ws.merge_cells('A5:B6')  # 입력 영역 밖은 그대로
+    plan = BatchPlan(6, 12)
+    plan.reserve(5, 2)
+    plan.write(5, 6, '1')
+    plan.write(5, 7, 7.0)
+    plan.merge(5, 2, 6)
+    apply_plan(plan, ws, MergedRangeIndex(ws, 6, 12))
+    assert (ws['F5'].value, ws['G5'].value) == ('1', 7.0)
+    assert sorted(str(r) for r in ws.merged_cells.ranges) == ['A5:B6', 'F5:F6']
+    assert ws['F5'].alignment.horizontal == 'center'
+
+
+def test_shifted_row():
+    assert shifted_row(10, 8, 2) == 12
+    assert shifted_row(7, 8, 2) == 7
+    # 당길 때 from_row 바로 위 행은 지워짐
+    assert shifted_row(7, 8, -2) is None
+    assert shifted_row(5, 8, -2) == 5
+
+
+def test_shifted_span():
+    assert shifted_span(5, 9, 8, 2) == (5, 11)
+    assert shifted_span(6, 7, 8, -2) is None
+    assert shifted_span(5, 9, 8, -2) == (5, 7)
+
+
+def test_plan_shift_moves_earlier_records_only():
+    plan = BatchPlan(6, 12)
+    plan.write(10, 6, 'a')
+    plan.merge(10, 2, 6)
+    plan.entries.append((1, 'simple', 10, 2))
+    mark = plan.mark()
+    plan.write(5, 6, 'b')
+    plan.shift(8, 3, mark)
+    assert plan.cells() == [(5, 6, 'b'), (13, 6, 'a')]
+    assert plan.merges == [(13, 2, 6)]
+    assert plan.entries == [(1, 'simple', 13, 2)]
+    assert plan.shifts == [(8, 3)]
+
+
+def test_apply_plan_shifts_rows_before_writing():
+    ws = Workbook().active
+    ws['F5'], ws['F6'] = '1', '2'
+    ws.merge_cells('F6:F7')
+    plan = BatchPlan(6, 12)
+    plan.shift(6, 2)
+    plan.reserve(6, 2)
+    plan.write(6, 6, 'new')
+    plan.merge(6, 2, 6)
+    apply_plan(plan, ws, MergedRangeIndex(ws, 6, 12))
+    assert [ws.cell(row, 6).value for row in range(5, 10)] == ['1', 'new', None, '2', None]
+    assert sorted(str(r) for r in ws.merged_cells.ranges) == ['F6:F7', 'F8:F9']
+
+
+def test_shift_rows_pulls_up():
+    ws = Workbook().active
+    for row in range(5, 10):
+        ws.cell(row, 6, row)
+    shift_rows(ws, 8, -2)
+    assert [ws.cell(row, 6).value for row in range(5, 9)] == [5, 8, 9, None]
+
+
+def test_find_conflicts():
+    ws = Workbook().active
+    ws['G6'] = 'old'
+    plan = BatchPlan(6, 12)
+    for line_no, row in ((1, 5), (2, 6)):
+        plan.reserve(row, 1)
+        plan.write(row, 6, str(line_no))
+        plan.entries.append((line_no, 'simple', row, 1))
+    intervals = [(5, 6)]
+    conflicts = find_conflicts(plan, *occupied_cells(ws, intervals, 6, 12))
+    assert [conflict[0] for conflict in conflicts] == [2]
+
+
+def test_target_rows_of_several_plans():
+    first, second = BatchPlan(6, 12), BatchPlan(6, 12)
+    first.reserve(5, 2)
+    first.reserve(10, 1)
+    second.reserve(7, 3)
+    second.reserve(20, 3)
+    assert target_rows(first) == [(5, 6), (10, 10)]
+    # 이어지는 구간은 계획이 달라도 하나로
+    assert target_rows(first, second) == [(5, 10), (20, 22)]
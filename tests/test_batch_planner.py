@@ -0,0 +1,41 @@
+from openpyxl import Workbook
+
+from batch_planner import BatchPlanner
+
+
+class RecordingPlanner(BatchPlanner):
+    def __init__(self, ws):
+        super().__init__(ws, ws.title, 'F', 10)
+        self.messages = []
+
+    def report(self, msg):
+        self.messages.append(msg)
+
+
+def make_sheet():
+    ws = Workbook().active
+    for row, item in ((5, '1'), (7, '3')):
+        ws.cell(row, 6, item)
+    ws.merge_cells('F5:F6')
+    return ws
+
+
+def test_plan_rows_and_messages():
+    planner = RecordingPlanner(make_sheet())
+    plan = planner.plan_batch(["1, 2, 5.0, 0.1, 0.1", "bad", "2, 1, 0.2m"])
+    assert plan.entries == [(1, 'simple', 10, 2), (3, 'mmc', 12, 3)]
+    assert [line_no for line_no, _, _ in plan.errors] == [2]
+    assert planner.current_row == 15
+    assert [msg[0] for msg in planner.messages] == ['✓', '⚠', '✓']
+    assert plan.merges == [(10, 2, 6), (12, 3, 6)]
+
+
+def test_upsert_places_items_by_number():
+    planner = RecordingPlanner(make_sheet())
+    planner.upsert = True
+    plan = planner.plan_batch(["2, 1, 5.0, 0.1, 0.1", "1, 1, 6.0, 0.1, 0.1"])
+    # 2는 1과 3 사이에 끼워 넣고 (아래 행 1개 밀림), 1은 2행 → 1행으로 교체 (아래 행 1개 당김)
+    assert plan.shifts == [(7, 1), (7, -1)]
+    assert plan.entries == [(1, 'simple', 6, 1), (2, 'simple', 5, 1)]
+    assert '끼워 넣음' in planner.messages[0]
+    assert '교체' in planner.messages[1]
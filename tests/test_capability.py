@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from openpyxl import Workbook
+
+from capability import capability, combine, lot_statistics
+
+
+def lot_sheet(samples):
+    """항목 1(7.0 ± 0.15)과 항목 2(상한만 0.5)의 측정값을 M열부터 쓴 시트"""
+    ws = Workbook().active
+    ws['F5'], ws['G5'], ws['J5'], ws['K5'] = '1', 7.0, 6.85, 7.15
+    ws['F6'], ws['G6'], ws['J6'], ws['K6'] = '2', 0.5, '-', 0.5
+    for row, values in zip((5, 6), samples):
+        for i, value in enumerate(values):
+            ws.cell(row, 13 + i, value)
+    return ws
+
+
+def test_pooled_sigma_matches_concatenated_samples():
+    rng = np.random.default_rng(7)
+    lots = [
+        (rng.normal(7.0, 0.03, 5), rng.normal(0.2, 0.05, 3)),
+        (rng.normal(7.02, 0.04, 8), rng.normal(0.25, 0.05, 6)),
+        (rng.normal(6.98, 0.02, 2), ()),
+    ]
+    stats = combine([lot_statistics(lot_sheet(samples), 6) for samples in lots])
+    result = capability(stats)
+    assert stats['keys'] == [('1', 1), ('2', 1)]
+    assert stats['lots'].tolist() == [3, 2]
+
+    for i in range(2):
+        values = np.concatenate([samples[i] for samples in lots])
+        sigma = np.std(values, ddof=1)
+        assert stats['n'][i] == len(values)
+        assert stats['mean'][i] == pytest.approx(values.mean())
+        assert result['sigma'][i] == pytest.approx(sigma)
+
+    values = np.concatenate([samples[0] for samples in lots])
+    sigma = np.std(values, ddof=1)
+    assert result['cp'][0] == pytest.approx(0.3 / (6 * sigma))
+    assert result['cpk'][0] == pytest.approx(min(7.15 - values.mean(), values.mean() - 6.85) / (3 * sigma))
+
+    # 상한만 있는 특성은 Cp 없이 상한 쪽 Cpk만
+    values = np.concatenate([samples[1] for samples in lots])
+    assert np.isnan(result['cp'][1])
+    assert result['cpk'][1] == pytest.approx((0.5 - values.mean()) / (3 * np.std(values, ddof=1)))
+
+
+def test_single_sample_has_no_sigma():
+    stats = combine([lot_statistics(lot_sheet(([7.0], [0.2, 0.2])), 6)])
+    result = capability(stats)
+    assert np.isnan(result['sigma'][0])
+    assert result['sigma'][1] == 0
+    assert np.isnan(result['cpk']).all()
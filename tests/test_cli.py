@@ -0,0 +1,67 @@
+import json
+import shutil
+
+from openpyxl import load_workbook
+
+import cli
+
+
+def run_cli(tmp_path, lines, *args):
+    batch = tmp_path / 'input.txt'
+    batch.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    summary_path = tmp_path / 'summary.json'
+    status = cli.main([*args, '--batch', str(batch), '--sheet', '검사성적서',
+                       '--summary', str(summary_path)])
+    with open(summary_path, encoding='utf-8') as f:
+        return status, json.load(f)
+
+
+def test_success_exit_code(template, tmp_path):
+    output = tmp_path / 'out.xlsx'
+    status, summary = run_cli(tmp_path, ["1, 2, 5.0, 0.1, 0.1"], template, '--start', 'F5',
+                              '--output', str(output))
+    assert status == 0
+    assert summary['status'] == 0
+    assert summary['file'] == template
+    assert summary['failed'] == 0
+    assert load_workbook(output)['검사성적서']['G5'].value == 5.0
+
+
+def test_skipped_lines_exit_code(template, tmp_path):
+    output = tmp_path / 'out.xlsx'
+    status, summary = run_cli(tmp_path, ["1, 2, 5.0, 0.1, 0.1", "bad"], template, '--start', 'F5',
+                              '--output', str(output), '--on-error', 'skip')
+    assert status == 1
+    assert summary['status'] == 1
+    assert summary['failed'] == 1
+    assert load_workbook(output)['검사성적서']['G5'].value == 5.0
+
+
+def test_aborted_batch_exit_code(template, tmp_path):
+    output = tmp_path / 'out.xlsx'
+    status, summary = run_cli(tmp_path, ["1, 2, 5.0, 0.1, 0.1", "bad"], template, '--start', 'F5',
+                              '--output', str(output))
+    assert status == 2
+    assert [(error['line'], error['text']) for error in summary['errors']] == [(2, 'bad')]
+    assert not output.exists()
+
+
+def test_invalid_arguments_exit_code(template, tmp_path):
+    status, summary = run_cli(tmp_path, ["1, 2, 5.0, 0.1, 0.1"], str(tmp_path / 'new.xlsx'),
+                              '--new', '--upsert')
+    assert status == 2
+    assert '--upsert' in summary['error']
+    assert not (tmp_path / 'new.xlsx').exists()
+
+
+def test_multiple_files_summary(template, tmp_path):
+    other = tmp_path / 'other.xlsx'
+    shutil.copy(template, other)
+    missing = tmp_path / 'missing.xlsx'
+    output_dir = tmp_path / 'out'
+    status, summary = run_cli(tmp_path, ["1, 2, 5.0, 0.1, 0.1"], template, str(other), str(missing),
+                              '--start', 'F5', '--output-dir', str(output_dir), '--jobs', '1')
+    assert status == 2
+    assert (summary['total'], summary['succeeded'], summary['partial'], summary['failed']) == (3, 2, 0, 1)
+    assert [result['status'] for result in summary['files']] == [0, 0, 2]
+    assert load_workbook(output_dir / 'other.xlsx')['검사성적서']['G5'].value == 5.0
@@ -0,0 +1,109 @@
+import json
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from batch_plan import BatchPlan
+from excel_automation import EasyExcelInput
+from journal import EditJournal
+
+
+ITEMS = ["1, 2, 5.0, 0.1, 0.1", "2, 1, 6.0, 0.1, 0.1", "3, 1, 7.0, 0.1, 0.1"]
+
+
+def open_session(path):
+    """대화형 실행처럼 워크북을 열고 저널을 붙인 인스턴스"""
+    app = EasyExcelInput()
+    app.file_path = path
+    app._open_workbook(path)
+    app._use_sheet(app.active_sheet)
+    app.journal = EditJournal(path)
+    app.on_conflict = 'force'
+    return app
+
+
+def item_column(path):
+    ws = load_workbook(path)['검사성적서']
+    return [ws.cell(row, 6).value for row in range(5, 14)]
+
+
+@pytest.fixture
+def upserted(template, monkeypatch):
+    """항목 1을 2행 → 4행으로 교체해서 아래 항목이 밀린 (저장 전) 세션"""
+    monkeypatch.setattr('builtins.input', lambda *args: 'y')
+    app = open_session(template)
+    app._apply_batch(ITEMS)
+    app.save_file()
+    app.upsert = True
+    app._apply_batch(["1, 4, 5.5, 0.1, 0.1"])
+    assert app.journal.read()[0][1].shifts
+    return app
+
+
+EXPECTED = ['1', None, None, None, '2', '3', None, None, None]
+
+
+def test_replay_after_crash_before_save(upserted, template):
+    # 저장하지 않고 종료 - 다음 실행에서 한 번만 다시 적용
+    app = open_session(template)
+    assert app.recover_journal()
+    assert item_column(template) == EXPECTED
+    assert not app.journal.exists()
+
+
+def test_crash_between_replace_and_clear(upserted, template, monkeypatch):
+    # 워크북 교체 후 저장 중 기록을 지우기 전에 종료
+    with monkeypatch.context() as patch:
+        patch.setattr(EditJournal, 'end_save', lambda self: None)
+        upserted._compact()
+    assert item_column(template) == EXPECTED
+    assert os.path.exists(upserted.journal.saving_path)
+
+    app = open_session(template)
+    assert not app.recover_journal()
+    assert item_column(template) == EXPECTED
+    assert not app.journal.exists()
+
+
+def test_crash_before_replace(upserted, template, monkeypatch):
+    # 임시 파일을 쓴 뒤 교체 전에 실패 - 기록은 저널로 돌아가고 다음 실행에서 다시 적용
+    def fail(*args):
+        raise OSError("교체 실패")
+
+    with monkeypatch.context() as patch:
+        patch.setattr('excel_automation.os.replace', fail)
+        with pytest.raises(OSError):
+            upserted._compact()
+    assert len(upserted.journal.read()) == 1
+
+    app = open_session(template)
+    assert app.recover_journal()
+    assert item_column(template) == EXPECTED
+
+
+def test_settle_restores_unmarked_saving_file(tmp_path):
+    # 표시 없이 남은 저장 중 기록(교체 전 종료)은 새 기록 앞으로 되돌림
+    path = str(tmp_path / 'w.xlsx')
+    open(path, 'wb').close()
+    journal = EditJournal(path)
+    plan = BatchPlan(6, 12)
+    plan.write(5, 6, '1')
+    journal.append('S', plan, 'F', 6)
+    journal.begin_save()
+    journal.append('S', plan, 'F', 7)
+    journal.settle()
+    assert [next_row for _, _, _, next_row, _ in journal.read()] == [6, 7]
+    assert not os.path.exists(journal.saving_path)
+
+
+def test_plan_round_trip():
+    # 저널에는 계획을 JSON으로 기록하므로 되읽은 계획이 같아야 함
+    plan = BatchPlan(6, 12)
+    plan.write(5, 6, '1')
+    plan.merge(5, 2, 6)
+    plan.reserve(5, 2)
+    plan.shift(7, 1)
+    copy = BatchPlan.from_dict(json.loads(json.dumps(plan.to_dict())))
+    assert copy.cells() == plan.cells()
+    assert (copy.merges, copy.styles, copy.spans, copy.shifts) == (plan.merges, plan.styles, plan.spans, plan.shifts)
@@ -0,0 +1,75 @@
+import pytest
+
+from line_parser import ParseCache, cache_stats, parse_line
+
+
+LINES = [
+    "51, 1, 7.0, 0.15, 0.15",
+    "52, 1, 7.0, 0.15, 0.15",
+    "55, 4, Ø4.25, 0.15, 0.15",
+    "56, 4, Ø4.25, 0.15, 0.15",
+    "60, 1, (1.2)",
+    "61, 1, (1.2)",
+    "70, 10, 0.2m, 0.5",
+    "71, 10, 0.2m, 0.5",
+    "80, 1, abc",
+    "81, 1, abc",
+]
+
+
+def parse_all(parse):
+    results = []
+    for line in LINES:
+        try:
+            results.append(parse(line))
+        except ValueError as e:
+            results.append(('error', str(e)))
+    return results
+
+
+def test_cache_hits_return_same_records():
+    cache = ParseCache()
+    assert parse_all(cache.parse) == parse_all(parse_line)
+    assert cache.hits == 5
+    assert cache.misses == 5
+    # 두 번째는 모두 캐시에서
+    assert parse_all(cache.parse) == parse_all(parse_line)
+    assert cache.hits == 15
+
+
+def test_cache_keeps_item_number():
+    cache = ParseCache()
+    cache.parse("1, 2, 5.0, 0.1, 0.1")
+    rec = cache.parse("A-7, 2, 5.0, 0.1, 0.1")
+    assert rec.item_no == 'A-7'
+    assert rec == parse_line("A-7, 2, 5.0, 0.1, 0.1")
+
+
+def test_cache_bypassed_for_detect_marks():
+    # 항목번호 칸의 ref/참고/mmc는 유형 감지에 쓰이므로 캐시하지 않음
+    cache = ParseCache()
+    cache.parse("ref 1, 1, 7.0, 0.1, 0.1")
+    cache.parse("ref 2, 1, 7.0, 0.1, 0.1")
+    assert cache.hits == 0
+    assert len(cache) == 0
+
+
+def test_cache_size_limit():
+    cache = ParseCache(maxsize=2)
+    for value in ('1.0', '2.0', '3.0'):
+        cache.parse(f"1, 1, {value}, 0.1, 0.1")
+    assert len(cache) == 2
+
+
+def test_cached_errors_are_raised_again():
+    cache = ParseCache()
+    with pytest.raises(ValueError):
+        cache.parse("1, 0, 7.0, 0.1, 0.1")
+    with pytest.raises(ValueError):
+        cache.parse("2, 0, 7.0, 0.1, 0.1")
+    assert cache.hits == 1
+
+
+def test_cache_stats():
+    assert cache_stats(3, 1) == {'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+    assert cache_stats(0, 0)['hit_rate'] == 0.0
@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+import pytest
+from openpyxl import Workbook
+
+from measurements import MAX_SAMPLES, MMC_REF, NG, OK, UNJUDGED, judge, plan_measurements, spec_rows
+
+
+def test_spec_rows_either_limit_order():
+    ws = Workbook().active
+    # 일괄 입력은 하한계산/상한계산, 대화형 개별 입력은 상한/하한 순서
+    ws['J5'], ws['K5'] = 6.85, 7.15
+    ws['J6'], ws['K6'] = 7.15, 6.85
+    ws['J7'], ws['K7'] = '-', 7.15
+    rows = spec_rows(ws, 6, 5, 3)
+    assert rows[:2] == [(5, 6.85, 7.15), (6, 6.85, 7.15)]
+    assert rows[2][0] == 7 and math.isnan(rows[2][1]) and rows[2][2] == 7.15
+
+
+def test_spec_rows_mmc_block():
+    ws = Workbook().active
+    ws['J5'], ws['K5'] = 0, 0.2
+    ws['L6'] = MMC_REF
+    ws['J8'], ws['K8'] = 0, 0.2
+    ws['G9'], ws['L9'] = 0.5, MMC_REF
+    assert spec_rows(ws, 6, 5, 6) == [(7, 0, 0.2), (10, 0, 0.5)]
+
+
+def test_default_judge_column_is_fixed():
+    ws = Workbook().active
+    ws['F5'], ws['J5'], ws['K5'] = '1', 6.85, 7.15
+    judge_col = 13 + MAX_SAMPLES
+    # 측정값 개수가 달라도 다시 입력한 판정은 같은 열에 씀
+    for line, label in (("1, 7.0, 7.1, 7.05", 'OK'), ("1, 7.3", 'NG')):
+        plan, summary = plan_measurements(ws, 6, [line])
+        assert summary['judge_col'] == 'W'
+        assert plan.cells()[-1] == (5, judge_col, label)
+
+    with pytest.raises(ValueError):
+        plan_measurements(ws, 6, ["1" + ", 7.0" * (MAX_SAMPLES + 1)])
+    plan, summary = plan_measurements(ws, 6, ["1" + ", 7.0" * (MAX_SAMPLES + 1)], judge_col=30)
+    assert summary['judge_col'] == 'AD'
+
+
+def test_judge_skips_missing_values():
+    nan = math.nan
+    status, out = judge([[7.0, nan, 7.1], [nan, 7.3, nan], [nan, nan, nan]],
+                        [6.85, 6.85, 6.85], [7.15, 7.15, 7.15])
+    assert status.tolist() == [OK, NG, UNJUDGED]
+    assert out.tolist() == [[False, False, False], [False, True, False], [False, False, False]]
+
+
+def test_judge_one_sided_limits():
+    nan = math.nan
+    values = np.array([[0.5], [1.5], [0.5], [1.5], [0.5]])
+    # 상한만, 상한만, 하한만, 하한만, 규격 없음
+    status, _ = judge(values, [nan, nan, 1.0, 1.0, nan], [1.0, 1.0, nan, nan, nan])
+    assert status.tolist() == [OK, NG, NG, OK, UNJUDGED]
+
+
+def test_judge_limit_boundary():
+    status, _ = judge([[0.1 + 0.2], [7.15]], [0.3, 6.85], [0.3, 7.15])
+    assert status.tolist() == [OK, OK]
@@ -0,0 +1,54 @@
+from openpyxl import Workbook
+
+from merge_index import MergedRangeIndex
+
+
+def make_sheet():
+    ws = Workbook().active
+    ws.merge_cells('F5:F7')
+    ws.merge_cells('F10:F11')
+    ws.merge_cells('A1:B1')  # 입력 영역 밖
+    return ws
+
+
+def merged(ws):
+    return sorted(str(merged_range) for merged_range in ws.merged_cells.ranges)
+
+
+def test_index_only_holds_input_area():
+    index = MergedRangeIndex(make_sheet(), 6, 12)
+    assert sorted(str(r) for r in index) == ['F10:F11', 'F5:F7']
+
+
+def test_overlapping():
+    index = MergedRangeIndex(make_sheet(), 6, 12)
+    assert [str(r) for r in index.overlapping(7, 9)] == ['F5:F7']
+    assert index.overlapping(8, 9) == []
+    assert [str(r) for r in index.overlapping(1, 20, 7, 12)] == []
+
+
+def test_merge_replaces_overlapping_range():
+    ws = make_sheet()
+    index = MergedRangeIndex(ws, 6, 12)
+    index.merge(6, 6, 8, 6)
+    assert merged(ws) == ['A1:B1', 'F10:F11', 'F6:F8']
+    assert sorted(str(r) for r in index) == ['F10:F11', 'F6:F8']
+
+
+def test_unmerge_rows_keeps_sheet_and_index_in_sync():
+    ws = make_sheet()
+    index = MergedRangeIndex(ws, 6, 12)
+    index.unmerge_rows(6, 10)
+    assert merged(ws) == ['A1:B1']
+    assert len(index) == 0
+    # 해제한 칸은 일반 셀로 다시 쓸 수 있음
+    ws['F6'] = 1
+    assert ws['F6'].value == 1
+
+
+def test_reload_after_direct_change():
+    ws = make_sheet()
+    index = MergedRangeIndex(ws, 6, 12)
+    ws.merge_cells('G20:G21')
+    index.reload()
+    assert [str(r) for r in index.overlapping(20, 20)] == ['G20:G21']
@@ -0,0 +1,41 @@
+from openpyxl import Workbook, load_workbook
+
+from batch_plan import apply_plan
+from batch_planner import BatchPlanner
+from report_writer import CHUNK_LINES, write_report
+
+
+def sheet_cells(path):
+    """시트의 모든 값/형식/정렬과 병합 범위"""
+    ws = load_workbook(path).active
+    cells = {}
+    for row in ws.iter_rows():
+        for cell in row:
+            if cell.value is not None or cell.alignment.horizontal:
+                cells[cell.coordinate] = (cell.value, cell.data_type,
+                                          cell.alignment.horizontal, cell.alignment.vertical)
+    return cells, sorted(str(merged) for merged in ws.merged_cells.ranges)
+
+
+def test_streamed_report_matches_in_memory(tmp_path):
+    kinds = ["{}, 1, 7.0, 0.15, 0.15", "{}, 3, 10.5, 0.2, 0.1", "{}, 4, Ø4.25, 0.15, 0.15",
+             "{}, 1, (1.2)", "{}, 2, (7.0), 0.15, 0.15, 참고", "{}, 2, 0.2m, 0.5", "bad {}"]
+    # 묶음(CHUNK_LINES줄) 경계를 넘도록
+    lines = [kinds[i % len(kinds)].format(i + 1) for i in range(CHUNK_LINES + 50)]
+
+    streamed = BatchPlanner(start_col='G')
+    stats = write_report(tmp_path / 'streamed.xlsx', '검사성적서', streamed.iter_plans(lines))
+
+    wb = Workbook()
+    wb.active.title = '검사성적서'
+    planner = BatchPlanner(wb.active, '검사성적서', start_col='G')
+    plan = planner.plan_batch(lines)
+    apply_plan(plan, planner.ws, planner._get_merge_index())
+    wb.save(tmp_path / 'memory.xlsx')
+
+    assert stats['processed'] == len(plan.entries)
+    assert stats['errors'] == plan.errors
+    assert stats['rows'] == planner.current_row - 1 == streamed.current_row - 1
+    cells, merges = sheet_cells(tmp_path / 'streamed.xlsx')
+    assert len(cells) > CHUNK_LINES
+    assert (cells, merges) == sheet_cells(tmp_path / 'memory.xlsx')
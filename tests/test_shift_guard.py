@@ -0,0 +1,61 @@
+import pytest
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
+from openpyxl.formatting.rule import CellIsRule
+
+from shift_guard import ShiftGuard
+from test_batch_planner import RecordingPlanner, make_sheet
+
+
+def add_reference(ws, kind):
+    """make_sheet() 시트의 8행(항목 3 아래)에 걸리는 참조 하나"""
+    if kind == 'formula':
+        ws['L8'] = '=G5*2'
+    elif kind == 'formula_above':
+        ws['L1'] = '=SUM(G5:G8)'
+    elif kind == 'other_sheet':
+        ws.parent.create_sheet('요약')['A1'] = f"='{ws.title}'!G8"
+    elif kind == 'conditional':
+        ws.conditional_formatting.add('G5:G8', CellIsRule(operator='greaterThan', formula=['1']))
+    elif kind == 'validation':
+        dv = DataValidation(type='list', formula1='"OK,NG"')
+        dv.add('L8')
+        ws.add_data_validation(dv)
+    elif kind == 'name':
+        ws.parent.defined_names['기준'] = DefinedName('기준', attr_text=f"'{ws.title}'!$G$8")
+    elif kind == 'hyperlink':
+        ws['L8'].hyperlink = 'https://example.com'
+
+
+@pytest.mark.parametrize('kind', ['formula', 'formula_above', 'other_sheet', 'conditional',
+                                  'validation', 'name', 'hyperlink'])
+def test_shift_above_reference_is_refused(kind):
+    ws = make_sheet()
+    add_reference(ws, kind)
+    assert ShiftGuard(ws).last_row == 8
+
+    planner = RecordingPlanner(ws)
+    planner.upsert = True
+    plan = planner.plan_batch(["2, 1, 5.0, 0.1, 0.1", "1, 2, 6.0, 0.1, 0.1", "9, 1, 7.0, 0.1, 0.1"])
+    # 2는 끼워 넣어야 해서 오류, 1은 행 수가 같은 교체, 9는 마지막 항목 다음에 추가
+    assert plan.shifts == []
+    assert [line_no for line_no, _, _ in plan.errors] == [1]
+    assert plan.entries == [(2, 'simple', 5, 2), (3, 'simple', 10, 1)]
+    assert '행 이동을 따라가지 않아' in planner.messages[0]
+
+
+def test_shift_below_references_is_allowed():
+    ws = make_sheet()
+    ws['L4'] = '=G5*2'
+    ws.cell(9, 6, '5')
+    guard = ShiftGuard(ws)
+    assert guard.last_row == 5
+    guard.check(7, 1)
+    with pytest.raises(ValueError):
+        guard.check(7, -2)
+
+    planner = RecordingPlanner(ws)
+    planner.upsert = True
+    plan = planner.plan_batch(["4, 1, 5.0, 0.1, 0.1"])
+    assert plan.shifts == [(9, 1)]
+    assert plan.errors == []
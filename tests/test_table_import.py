@@ -0,0 +1,64 @@
+import pytest
+
+from line_parser import parse_line
+from table_import import iter_table_lines, parse_mapping, read_table_lines
+
+
+def test_header_aliases():
+    rows = ["Balloon,Qty,Nominal,+Tol,-Tol,Remark",
+            "51,1,7.0,0.15,0.15,",
+            "",
+            "52,3,10.5,0.2,0.1,\"외경, 중앙\""]
+    assert list(iter_table_lines(rows)) == ["51, 1, 7.0, 0.15, 0.15", "52, 3, 10.5, 0.2, 0.1, 외경  중앙"]
+
+
+def test_no_header_uses_default_order():
+    assert list(iter_table_lines(["51\t1\t7.0\t0.15\t0.15"])) == ["51, 1, 7.0, 0.15, 0.15"]
+
+
+def test_mapping_by_name_and_number():
+    rows = ["Dim;Size;Hi;Lo;Pos", "7.0;51;0.15;0.15;1"]
+    mapping = parse_mapping("item=Pos, base=1, upper=Hi; lower=Lo")
+    assert mapping == {'item': 'Pos', 'base': 1, 'upper': 'Hi', 'lower': 'Lo'}
+    # 지정하지 않은 필드는 머리글 이름으로 찾고, 없으면 비워 둠 (행 개수는 1)
+    assert list(iter_table_lines(rows, mapping)) == ["1, 1, 7.0, 0.15, 0.15"]
+
+
+def test_mapping_errors():
+    with pytest.raises(ValueError):
+        parse_mapping("weight=3")
+    with pytest.raises(ValueError):
+        parse_mapping("item")
+    with pytest.raises(ValueError):
+        iter_table_lines(["Balloon,Size", "51,7.0"], {'base': 'Nominal'})
+    with pytest.raises(ValueError):
+        iter_table_lines(["Note,Remark", "a,b"])
+    with pytest.raises(ValueError):
+        iter_table_lines(["51,1,7.0"], {'item': 'Balloon'})
+
+
+def test_type_column():
+    rows = ["항목번호,개수,기준값,상한,하한,유형,MAX",
+            "51,1,7.0,0.15,0.15,,",
+            "60,1,1.2,,,참고,",
+            "70,2,0.2,,,mmc,0.5",
+            "55,4,Ø4.25,0.15,0.15,위치도,"]
+    lines = list(iter_table_lines(rows))
+    assert lines == ["51, 1, 7.0, 0.15, 0.15",
+                     ("60, 1, (1.2)", 'reference'),
+                     ("70, 2, 0.2, 0.5", 'mmc'),
+                     ("55, 4, Ø4.25, 0.15, 0.15", 'position')]
+    # 유형 열로 내보낸 줄은 그 유형으로 분석됨
+    assert [parse_line(line, kind).kind for line, kind in lines[1:]] == ['reference', 'mmc', 'position']
+
+
+def test_layout_without_type_column():
+    rows = ["item,base,max,ref", "60,(1.2),,", "70,0.2m,0.5,", "71,0.3m,,비고"]
+    assert list(iter_table_lines(rows)) == ["60, 1, (1.2)", "70, 1, 0.2m, 0.5", "71, 1, 0.3m, , 비고"]
+
+
+def test_read_table_lines(tmp_path):
+    # 엑셀에서 저장한 CSV (BOM, CRLF)
+    path = tmp_path / 'balloons.csv'
+    path.write_text("\ufeffBalloon,Qty,Nominal,+Tol,-Tol\r\n51,1,7.0,0.15,0.15\r\n", encoding='utf-8')
+    assert list(read_table_lines(str(path))) == ["51, 1, 7.0, 0.15, 0.15"]
@@ -0,0 +1,139 @@
+import re
+import zipfile
+
+import pytest
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import IllegalCharacterError
+
+import xlsx_patch
+from excel_automation import EasyExcelInput
+from xlsx_patch import XlsxPatchError, _value_xml
+
+
+def run_batch(path, lines, output, **options):
+    app = EasyExcelInput()
+    for key, value in options.items():
+        setattr(app, key, value)
+    return app.run_batch(path, lines, start_row=5, output_path=output)
+
+
+def test_value_xml_rejects_control_characters():
+    with pytest.raises(XlsxPatchError):
+        _value_xml('8\x010')
+
+
+def test_value_xml_leaves_formulas_to_full_save():
+    with pytest.raises(XlsxPatchError):
+        _value_xml('=A1')
+    assert _value_xml('=') == ('inlineStr', '<is><t xml:space="preserve">=</t></is>')
+
+
+def test_value_xml_error_code():
+    assert _value_xml('#N/A') == ('e', '<v>#N/A</v>')
+
+
+def test_control_character_line_is_not_saved(template, tmp_path):
+    # 빠른 저장이 거부하면 전체 저장도 openpyxl에서 실패해야 하고, 깨진 파일은 남지 않음
+    output = tmp_path / 'out.xlsx'
+    with pytest.raises(IllegalCharacterError):
+        run_batch(template, ["8\x010, 1, 5.0, 0.1, 0.1"], str(output))
+    assert not output.exists()
+
+
+def test_formula_item_matches_full_save(template, tmp_path):
+    summary = run_batch(template, ["=A1, 1, 5.0, 0.1, 0.1"], str(tmp_path / 'out.xlsx'))
+    assert summary['save_mode'] == 'full'
+    cell = load_workbook(tmp_path / 'out.xlsx')['검사성적서']['F5']
+    assert (cell.value, cell.data_type) == ('=A1', 'f')
+
+
+def test_copy_without_zip_internals_matches_raw_copy(template, tmp_path, monkeypatch):
+    def parts(path):
+        with zipfile.ZipFile(path) as z:
+            return {info.filename: (z.read(info), info.compress_type) for info in z.infolist()}
+
+    lines = ["1, 2, 5.0, 0.1, 0.1"]
+    run_batch(template, lines, str(tmp_path / 'raw.xlsx'))
+    monkeypatch.setattr(xlsx_patch, '_can_copy_raw', lambda src, dst: False)
+    run_batch(template, lines, str(tmp_path / 'public.xlsx'))
+    assert parts(tmp_path / 'raw.xlsx') == parts(tmp_path / 'public.xlsx')
+
+
+def snapshot(path, sheet='검사성적서'):
+    """입력 영역(F~L열)의 값/형식/정렬과 병합 범위"""
+    ws = load_workbook(path)[sheet]
+    cells = {}
+    for row in ws.iter_rows(min_row=5, min_col=6, max_col=12):
+        for cell in row:
+            if cell.value is not None or cell.alignment.horizontal:
+                cells[cell.coordinate] = (cell.value, cell.data_type,
+                                          cell.alignment.horizontal, cell.alignment.vertical)
+    return cells, sorted(str(merged) for merged in ws.merged_cells.ranges)
+
+
+@pytest.mark.parametrize('lines', [
+    ["51, 1, 7.0, 0.15, 0.15", "52, 3, 10.5, 0.2, 0.1"],
+    ["55, 4, Ø4.25, 0.15, 0.15"],
+    ["60, 1, (1.2)", "61, 3, (7.0), 0.15, 0.15, 참고"],
+    ["70, 2, 0.2m", "71, 1, 0.2m, 0.5"],
+], ids=['simple', 'position', 'reference', 'mmc'])
+def test_patch_save_matches_full_save(template, tmp_path, monkeypatch, lines):
+    patched = run_batch(template, lines, str(tmp_path / 'patch.xlsx'))
+    assert patched['save_mode'] == 'patch'
+
+    def refuse(*args, **kwargs):
+        raise XlsxPatchError("전체 저장 비교용")
+
+    monkeypatch.setattr('excel_automation.patch_sheets', refuse)
+    full = run_batch(template, lines, str(tmp_path / 'full.xlsx'))
+    assert full['save_mode'] == 'full'
+    cells, merges = snapshot(tmp_path / 'patch.xlsx')
+    assert cells
+    assert (cells, merges) == snapshot(tmp_path / 'full.xlsx')
+
+
+def test_patch_save_several_sheets(template, tmp_path):
+    lines = ["1, 1, 5.0, 0.1, 0.1", "[추가!H10]", "2, 2, 6.0, 0.1, 0.1"]
+    summary = run_batch(template, lines, str(tmp_path / 'out.xlsx'))
+    assert summary['save_mode'] == 'patch'
+    wb = load_workbook(tmp_path / 'out.xlsx')
+    assert wb['검사성적서']['F5'].value == '1'
+    assert wb['추가']['H10'].value == '2'
+    assert 'H10:H11' in [str(merged) for merged in wb['추가'].merged_cells.ranges]
+    assert wb['추가']['A1'].value == '메모'
+
+
+def prefix_sheet(path, dest, part='xl/worksheets/sheet1.xml'):
+    """시트 XML 요소에 네임스페이스 접두사(x:)를 붙인 사본 - openpyxl은 읽지만 xlsx_patch는 못 읽음"""
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(dest, 'w') as dst:
+        for info in src.infolist():
+            data = src.read(info)
+            if info.filename == part:
+                xml = re.sub(r'<(/?)(\w+)(?=[\s/>])', r'<\1x:\2', data.decode('utf-8'))
+                data = xml.replace(' xmlns=', ' xmlns:x=', 1).encode('utf-8')
+            dst.writestr(info, data)
+
+
+@pytest.mark.parametrize('start_row', [5, None])
+def test_prefixed_sheet_falls_back_to_workbook(template, tmp_path, start_row):
+    wb = load_workbook(template)
+    wb['검사성적서']['F6'] = 'old'
+    wb.save(tmp_path / 'plain.xlsx')
+    source = tmp_path / 'prefixed.xlsx'
+    prefix_sheet(tmp_path / 'plain.xlsx', source)
+    with pytest.raises(XlsxPatchError):
+        xlsx_patch.scan_occupied(source, '검사성적서', [(5, 6)], 6, 12)
+
+    app = EasyExcelInput()
+    app.on_conflict = 'skip'
+    summary = app.run_batch(str(source), ["1, 1, 5.0, 0.1, 0.1", "2, 1, 6.0, 0.1, 0.1"],
+                            start_row=start_row, output_path=str(tmp_path / 'out.xlsx'))
+    ws = load_workbook(tmp_path / 'out.xlsx')['검사성적서']
+    if start_row is None:
+        # 첫 빈 행(7행)부터 입력
+        assert (summary['start'], summary['skipped']) == ('F7', [])
+        assert [ws['G7'].value, ws['G8'].value] == [5.0, 6.0]
+    else:
+        # 6행의 기존 값과 겹치는 두 번째 줄만 건너뜀
+        assert summary['skipped'] == [{'line': 2, 'rows': '6-6'}]
+        assert (ws['G5'].value, ws['F6'].value) == (5.0, 'old')
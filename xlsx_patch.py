@@ -0,0 +1,708 @@
+import copy
+import io
+import posixpath
+import re
+import shutil
+import struct
+import zipfile
+from collections import deque
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+from merge_index import RangeIndex
+from save_pipeline import DEFAULT_COMPRESSION, zip_options
+from style_registry import ALIGNMENTS, alignment_xml
+
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+ROW_RE = re.compile(r'<row\b[^>]*?/>|<row\b[^>]*>.*?</row>', re.S)
+CELL_RE = re.compile(r'<c\b[^>]*?/>|<c\b[^>]*>.*?</c>', re.S)
+ATTR_RE = re.compile(r'([\w:]+)="([^"]*)"')
+REF_RE = re.compile(r'([A-Z]+)(\d+)')
+ROW_NUM_RE = re.compile(r'<row\b[^>]*?\br="(\d+)"')
+
+# mergeCells 요소가 없을 때 이 요소들보다 앞에 넣어야 함 (스키마 순서)
+AFTER_MERGE_CELLS = (
+    'phoneticPr', 'conditionalFormatting', 'dataValidations', 'hyperlinks',
+    'printOptions', 'pageMargins', 'pageSetup', 'headerFooter', 'rowBreaks',
+    'colBreaks', 'customProperties', 'cellWatches', 'ignoredErrors', 'smartTags',
+    'drawing', 'legacyDrawing', 'legacyDrawingHF', 'drawingHF', 'picture',
+    'oleObjects', 'controls', 'webPublishItems', 'tableParts', 'extLst',
+)
+
+_DATA_DESCRIPTOR_FLAG = 0x08
+# _copy_raw()가 쓰는 ZipFile 내부 속성 (하나라도 없으면 공개 API로 복사)
+_RAW_COPY_ATTRS = ('fp', 'start_dir', '_seekable', '_writing', '_writecheck', '_didModify',
+                   'filelist', 'NameToInfo')
+
+# 시트 XML을 한 번에 읽을 글자 수 - 시트가 커도 이만큼씩만 메모리에 올림
+SHEET_CHUNK = 1 << 20
+# 파트를 그대로 복사할 때 한 번에 읽을 바이트 수
+COPY_CHUNK = 1 << 20
+
+
+class XlsxPatchError(Exception):
+    """XML 직접 수정으로 처리할 수 없는 경우 (openpyxl 저장으로 대체해야 함)"""
+
+
+def patch_xlsx(source, dest, sheet_name, plans, compression=DEFAULT_COMPRESSION):
+    """원본 xlsx에서 대상 시트 XML만 다시 만들어 저장
+
+    source, dest: 파일 경로 또는 파일 객체 (dest는 쓰기/탐색 가능해야 함)
+    plans: 순서대로 적용할 BatchPlan 목록
+    compression: 다시 만든 파트의 압축 수준 (save_pipeline.COMPRESSION_LEVELS)
+
+    수정하지 않는 파트(다른 시트, 공유 문자열, 이미지, 매크로 등)는
+    압축된 바이트 그대로 복사한다. 문자열은 인라인 문자열로 쓰기 때문에
+    공유 문자열 테이블은 건드리지 않고, 정렬 스타일이 필요할 때만
+    styles.xml에 셀 서식(xf)을 추가한다.
+    """
+    patch_sheets(source, dest, [(sheet_name, plans)], compression)
+
+
+def patch_sheets(source, dest, sheet_plans, compression=DEFAULT_COMPRESSION):
+    """patch_xlsx()의 여러 시트 버전 - sheet_plans: [(시트 이름, [BatchPlan...])]
+
+    시트마다 XML을 따로 고치고, 추가한 셀 서식은 styles.xml 하나에 이어서 쌓는다.
+    같은 시트가 여러 번 나오면 계획을 순서대로 합친다.
+
+    대상 시트 XML은 조각(SHEET_CHUNK)씩 읽어서 바로 dest에 쓰므로, 시트가 아무리 커도
+    메모리에는 한 조각과 계획(입력할 행)만 올라간다. styles.xml과 계산 체인 관련 파트는
+    시트를 다 쓴 뒤에야 바뀌었는지 알 수 있으므로 zip의 마지막에 기록한다.
+    """
+    compress_type, level = zip_options(compression)
+    merged = {}
+    for sheet_name, plans in sheet_plans:
+        merged.setdefault(sheet_name, []).extend(plans)
+
+    with zipfile.ZipFile(source) as src:
+        wb_part = _find_workbook_part(src)
+        styles_part = _find_rel_target(src, wb_part, '/styles')
+        styles_xml = src.read(styles_part).decode('utf-8') if styles_part else None
+        calc_chain = _find_rel_target(src, wb_part, '/calcChain')
+        rels_part = _rels_part(wb_part)
+
+        # 계획 확인(행 이동 등)은 파일을 쓰기 전에
+        patchers = {}
+        for sheet_name, plans in merged.items():
+            patcher = _SheetPatcher()
+            for plan in plans:
+                patcher.add_plan(plan)
+            patchers[_find_sheet_part(src, wb_part, sheet_name)] = patcher
+
+        deferred = {part for part in (styles_part, calc_chain, rels_part, '[Content_Types].xml') if part}
+        styles_changed = False
+        with zipfile.ZipFile(dest, 'w', compress_type, compresslevel=level) as dst:
+            for info in src.infolist():
+                if info.filename in deferred:
+                    continue
+                patcher = patchers.get(info.filename)
+                if patcher is None:
+                    _copy_raw(src, dst, info)
+                    continue
+                patcher.styles_xml = styles_xml
+                with io.TextIOWrapper(dst.open(info.filename, 'w'), encoding='utf-8') as out:
+                    patcher.write(_read_sheet(src, info.filename), out.write)
+                new_styles_xml = patcher.patched_styles()
+                if new_styles_xml is not None:
+                    styles_xml = new_styles_xml
+                    styles_changed = True
+
+            # 수식을 덮어쓴 경우 계산 체인은 더 이상 맞지 않으므로 제거 (Excel이 다시 만듦)
+            removed_formula = calc_chain is not None and any(patcher.removed_formula for patcher in patchers.values())
+            for info in src.infolist():
+                if info.filename not in deferred:
+                    continue
+                data = None
+                if info.filename == styles_part and styles_changed:
+                    data = styles_xml
+                elif removed_formula:
+                    if info.filename == calc_chain:
+                        continue
+                    if info.filename == rels_part:
+                        data = _remove_calc_chain_rel(src.read(rels_part).decode('utf-8'))
+                    elif info.filename == '[Content_Types].xml':
+                        data = _remove_calc_chain_type(src.read(info.filename).decode('utf-8'), calc_chain)
+                if data is None:
+                    _copy_raw(src, dst, info)
+                    continue
+                zinfo = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                zinfo.external_attr = info.external_attr
+                dst.writestr(zinfo, data.encode('utf-8'), compress_type, level)
+
+
+def list_sheets(source):
+    """워크북을 불러오지 않고 workbook.xml에서 (시트 이름 목록, 활성 시트 이름) 읽기"""
+    with zipfile.ZipFile(source) as src:
+        root = ElementTree.fromstring(src.read(_find_workbook_part(src)))
+    names = [sheet.get('name') for sheet in root.iter(f'{{{NS_MAIN}}}sheet')]
+    if not names:
+        raise XlsxPatchError("통합 문서에 시트가 없습니다.")
+    view = root.find(f'{{{NS_MAIN}}}bookViews/{{{NS_MAIN}}}workbookView')
+    active = int(view.get('activeTab', 0)) if view is not None else 0
+    return names, names[active] if 0 <= active < len(names) else names[0]
+
+
+def scan_free_row(source, sheet_name, col, first_row=5):
+    """워크북을 불러오지 않고 시트 XML에서 입력 영역(col부터 7개 열)의 첫 빈 행 찾기
+
+    item_index.next_free_row()와 같은 기준이다. 시트 XML을 조각씩 읽으면서 조각마다
+    맨 아래 행부터 위로 올라가며 셀을 확인하므로, 큰 시트도 조각의 끝부분만 분석한다.
+    """
+    last_value_row = 0
+    tail = ''
+    with zipfile.ZipFile(source) as src:
+        wb_part = _find_workbook_part(src)
+        for event in _read_sheet(src, _find_sheet_part(src, wb_part, sheet_name)):
+            if event[0] == 'rows':
+                for row_num, row_match in reversed(event[2]):
+                    if row_num <= last_value_row:
+                        break
+                    if _has_value(row_match.group(0), col, col + 6):
+                        last_value_row = row_num
+                        break
+            elif event[0] == 'tail':
+                tail = event[1]
+
+    last = first_row - 1
+    for merged in _merge_ranges(tail):
+        if merged.min_col <= col + 6 and merged.max_col >= col and merged.max_row > last:
+            last = merged.max_row
+    return max(last_value_row, last) + 1
+
+
+def scan_occupied(source, sheet_name, intervals, min_col, max_col):
+    """워크북을 불러오지 않고 시트 XML에서 batch_plan.occupied_cells()와 같은 결과 찾기
+
+    intervals는 batch_plan.target_rows()의 행 구간이고, 구간에 든 행의 셀만 분석한다.
+    """
+    cells = []
+    tail = ''
+    with zipfile.ZipFile(source) as src:
+        wb_part = _find_workbook_part(src)
+        for event in _read_sheet(src, _find_sheet_part(src, wb_part, sheet_name)):
+            if event[0] == 'rows':
+                for row_num, row_match in event[2]:
+                    if not any(start_row <= row_num <= end_row for start_row, end_row in intervals):
+                        continue
+                    for col_num, cell_xml in _iter_cells(row_match.group(0)):
+                        if min_col <= col_num <= max_col and re.search(r'<(?:v|is|f)\b', cell_xml):
+                            cells.append((row_num, col_num))
+            elif event[0] == 'tail':
+                tail = event[1]
+
+    merges = []
+    for merged in _merge_ranges(tail):
+        if (merged.min_col <= max_col and merged.max_col >= min_col
+                and any(merged.min_row <= end_row and merged.max_row >= start_row
+                        for start_row, end_row in intervals)):
+            merges.append(merged)
+    return cells, merges
+
+
+def _read_sheet(src, part, chunk_size=None):
+    """시트 XML을 조각씩 읽으면서 다음 순서로 내보내는 제너레이터
+
+      ('head', 텍스트)                      - <sheetData> 시작 태그까지
+      ('rows', 텍스트, [(행 번호, match)])  - sheetData 본문 조각과 그 안의 완성된 행들
+      ('tail', 텍스트)                      - </sheetData>부터 끝까지 (병합 목록 등)
+
+    텍스트를 순서대로 이으면 원래 XML이 되고 (빈 <sheetData/>는 시작/끝 태그로 나눔),
+    match 위치는 그 조각 텍스트 기준이다. 조각 끝에서 잘린 행은 다음 조각과 이어서 내보낸다.
+    """
+    chunk_size = chunk_size or SHEET_CHUNK
+    with src.open(part) as raw:
+        stream = io.TextIOWrapper(raw, encoding='utf-8')
+        buffer = ''
+        while True:
+            match = re.search(r'<sheetData\b[^>]*?(/?)>', buffer)
+            if match:
+                break
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                raise XlsxPatchError("sheetData 요소를 찾을 수 없습니다.")
+            buffer += chunk
+
+        if match.group(1):
+            yield 'head', buffer[:match.start()] + '<sheetData>'
+            yield 'rows', '', []
+            yield 'tail', '</sheetData>' + buffer[match.end():] + stream.read()
+            return
+
+        yield 'head', buffer[:match.end()]
+        buffer = buffer[match.end():]
+        row_num = 0
+        while True:
+            end = buffer.find('</sheetData>')
+            body = buffer if end < 0 else buffer[:end]
+            rows = []
+            pos = 0
+            for row_match in ROW_RE.finditer(body):
+                num = ROW_NUM_RE.match(body, row_match.start())
+                row_num = int(num.group(1)) if num else row_num + 1
+                rows.append((row_num, row_match))
+                pos = row_match.end()
+            if end >= 0:
+                yield 'rows', body, rows
+                yield 'tail', buffer[end:] + stream.read()
+                return
+
+            yield 'rows', body[:pos], rows
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                raise XlsxPatchError("sheetData가 닫히지 않았습니다.")
+            buffer = body[pos:] + chunk
+
+
+def _iter_cells(row_xml):
+    """행 XML의 셀 → (열 번호, 셀 XML)"""
+    col_num = 0
+    for cell_match in CELL_RE.finditer(row_xml):
+        cell_xml = cell_match.group(0)
+        ref = _attrs(re.match(r'<c\b[^>]*?/?>', cell_xml).group(0)).get('r')
+        col_num = column_index_from_string(REF_RE.match(ref).group(1)) if ref else col_num + 1
+        yield col_num, cell_xml
+
+
+def _has_value(row_xml, min_col, max_col):
+    """행의 min_col~max_col 열에 값(또는 수식)이 있는 셀이 있는지"""
+    return any(min_col <= col_num <= max_col and re.search(r'<(?:v|is|f)\b', cell_xml)
+               for col_num, cell_xml in _iter_cells(row_xml))
+
+
+def _merge_ranges(xml):
+    """XML의 mergeCells 요소 → 병합 범위(CellRange) 목록"""
+    match = re.search(r'<mergeCells\b[^>]*?(?:/>|>.*?</mergeCells>)', xml, re.S)
+    if not match:
+        return []
+    return [CellRange(ref) for ref in re.findall(r'<mergeCell\b[^>]*\bref="([^"]+)"', match.group(0))]
+
+
+def _copy_raw(src, dst, info):
+    """압축을 풀지 않고 파트를 그대로 복사 (COPY_CHUNK씩 읽어서 씀)
+
+    zipfile에는 압축된 바이트를 그대로 쓰는 공개 API가 없어서 ZipFile.mkdir()과 같은 내부
+    속성으로 항목을 등록한다. 그 속성이 없는 버전이거나 dst를 탐색할 수 없으면
+    _copy_part()로 풀었다가 같은 압축 방식으로 다시 압축한다 (느리지만 결과는 같음).
+    """
+    if not _can_copy_raw(src, dst):
+        _copy_part(src, dst, info)
+        return
+
+    src.fp.seek(info.header_offset)
+    header = src.fp.read(30)
+    if header[:4] != b'PK\x03\x04':
+        raise XlsxPatchError(f"잘못된 zip 항목: {info.filename}")
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    src.fp.seek(info.header_offset + 30 + name_len + extra_len)
+
+    zinfo = copy.copy(info)
+    # 크기/CRC를 로컬 헤더에 바로 기록하므로 데이터 디스크립터는 쓰지 않음
+    zinfo.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    zinfo.extra = b''
+
+    # ZipFile.mkdir()과 같은 방식으로 항목 등록
+    dst.fp.seek(dst.start_dir)
+    zinfo.header_offset = dst.fp.tell()
+    dst._writecheck(zinfo)
+    dst._didModify = True
+    dst.filelist.append(zinfo)
+    dst.NameToInfo[zinfo.filename] = zinfo
+    dst.fp.write(zinfo.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        raw = src.fp.read(min(remaining, COPY_CHUNK))
+        if not raw:
+            raise XlsxPatchError(f"zip 항목이 잘렸습니다: {info.filename}")
+        dst.fp.write(raw)
+        remaining -= len(raw)
+    dst.start_dir = dst.fp.tell()
+
+
+def _can_copy_raw(src, dst):
+    """_copy_raw()가 쓰는 ZipFile 내부 속성이 있고 dst가 탐색 가능한지"""
+    if not all(hasattr(dst, name) for name in _RAW_COPY_ATTRS) or getattr(src, 'fp', None) is None:
+        return False
+    return dst._seekable and not dst._writing and hasattr(zipfile.ZipInfo, 'FileHeader')
+
+
+def _copy_part(src, dst, info):
+    """공개 API로 파트 복사 - 풀어서 원래 압축 방식으로 다시 압축"""
+    zinfo = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    zinfo.external_attr = info.external_attr
+    zinfo.compress_type = info.compress_type
+    # 크기를 미리 알려 주어야 큰 파트에 ZIP64 헤더를 씀
+    zinfo.file_size = info.file_size
+    with src.open(info) as part, dst.open(zinfo, 'w') as out:
+        shutil.copyfileobj(part, out, COPY_CHUNK)
+
+
+def _rels_part(part):
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, '_rels', name + '.rels')
+
+
+def _resolve_target(base_part, target):
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _find_workbook_part(src):
+    root = ElementTree.fromstring(src.read('_rels/.rels'))
+    for rel in root.iter(f'{{{NS_PKG_REL}}}Relationship'):
+        if rel.get('Type', '').endswith('/officeDocument'):
+            return _resolve_target('', rel.get('Target'))
+    raise XlsxPatchError("통합 문서 파트를 찾을 수 없습니다.")
+
+
+def _read_rels(src, part):
+    try:
+        root = ElementTree.fromstring(src.read(_rels_part(part)))
+    except KeyError:
+        return []
+    return list(root.iter(f'{{{NS_PKG_REL}}}Relationship'))
+
+
+def _find_rel_target(src, part, type_suffix):
+    for rel in _read_rels(src, part):
+        if rel.get('Type', '').endswith(type_suffix):
+            return _resolve_target(part, rel.get('Target'))
+    return None
+
+
+def _find_sheet_part(src, wb_part, sheet_name):
+    root = ElementTree.fromstring(src.read(wb_part))
+    rel_id = None
+    for sheet in root.iter(f'{{{NS_MAIN}}}sheet'):
+        if sheet.get('name') == sheet_name:
+            rel_id = sheet.get(f'{{{NS_REL}}}id')
+            break
+    if rel_id is None:
+        raise XlsxPatchError(f"'{sheet_name}' 시트를 찾을 수 없습니다.")
+
+    for rel in _read_rels(src, wb_part):
+        if rel.get('Id') == rel_id:
+            return _resolve_target(wb_part, rel.get('Target'))
+    raise XlsxPatchError(f"'{sheet_name}' 시트 파트를 찾을 수 없습니다.")
+
+
+def _remove_calc_chain_rel(rels_xml):
+    return re.sub(r'<Relationship\b[^>]*calcChain[^>]*/>', '', rels_xml)
+
+
+def _remove_calc_chain_type(types_xml, calc_chain):
+    return re.sub(r'<Override\b[^>]*PartName="/%s"[^>]*/>' % re.escape(calc_chain), '', types_xml)
+
+
+def _attrs(tag):
+    return dict(ATTR_RE.findall(tag))
+
+
+def _value_xml(value):
+    """(t 속성, 자식 XML) - openpyxl과 같은 값 표현"""
+    if isinstance(value, bool):
+        return 'b', f'<v>{int(value)}</v>'
+    if isinstance(value, int):
+        return None, f'<v>{value}</v>'
+    if isinstance(value, float):
+        if value != value or value in (float('inf'), float('-inf')):
+            raise XlsxPatchError(f"숫자로 저장할 수 없는 값: {value}")
+        return None, f'<v>{repr(value)}</v>'
+    if isinstance(value, str):
+        # openpyxl과 같이 32767자로 자르고, XML에 쓸 수 없는 제어 문자는 거부
+        value = value[:32767]
+        if ILLEGAL_CHARACTERS_RE.search(value):
+            raise XlsxPatchError(f"셀에 쓸 수 없는 제어 문자가 있는 값: {value!r}")
+        if len(value) > 1 and value.startswith('='):
+            # openpyxl은 수식으로 저장하므로 전체 저장에 맡김
+            raise XlsxPatchError(f"수식으로 저장되는 값: {value}")
+        if value in ERROR_CODES:
+            return 'e', f'<v>{escape(value)}</v>'
+        return 'inlineStr', f'<is><t xml:space="preserve">{escape(value)}</t></is>'
+    raise XlsxPatchError(f"지원하지 않는 값 형식: {type(value).__name__}")
+
+
+class _SheetPatcher:
+    """시트 XML 한 개에 쓰기 계획을 적용
+
+    add_plan()으로 계획을 모은 뒤 write()로 _read_sheet() 조각을 받아 고친 XML을 바로 쓴다.
+    기존 병합 목록은 시트 끝(</sheetData> 뒤)에 있으므로, 계획의 병합 해제/추가는
+    순서대로 기록해 두었다가 그 부분을 읽을 때 적용한다.
+    """
+
+    def __init__(self, styles_xml=None):
+        self.styles_xml = styles_xml
+        self.values = {}       # (행, 열) -> 값
+        self.aligned = {}      # 정렬을 바꿀 (행, 열) -> 스타일 이름
+        self.removed_formula = False
+        # (시작 행, 끝 행, 시작 열, 끝 열, 새 병합 또는 None) - 겹치는 병합을 해제하고 새 병합 추가
+        self._merge_ops = []
+        self.merges = None     # write() 후의 병합 범위 (RangeIndex)
+        self._new_xfs = []
+
+    def add_plan(self, plan):
+        if plan.shifts:
+            raise XlsxPatchError("행 이동(항목 교체/삽입)이 있는 입력")
+        min_col, max_col = plan.min_col, plan.max_col
+
+        # 1. 대상 행 구간의 기존 병합 해제
+        for start_row, num_rows in plan.spans:
+            self._merge_ops.append((start_row, start_row + num_rows - 1, min_col, max_col, None))
+
+        # 2. 셀 값 (같은 셀은 나중 값이 우선)
+        for row, col, value in plan.cells():
+            self.values[(row, col)] = value
+
+        # 3. 항목번호 셀 병합
+        for start_row, num_rows, col in plan.merges:
+            merged = CellRange(min_col=col, min_row=start_row,
+                               max_col=col, max_row=start_row + num_rows - 1)
+            self._merge_ops.append((merged.min_row, merged.max_row, col, col, merged))
+
+        for row, col, name in plan.styles:
+            if name not in ALIGNMENTS:
+                raise XlsxPatchError(f"알 수 없는 스타일: {name}")
+            self.aligned[(row, col)] = name
+
+    def _apply_merges(self, merges):
+        """병합 범위 인덱스에 계획의 병합 해제/추가를 순서대로 적용"""
+        for min_row, max_row, min_col, max_col, merged in self._merge_ops:
+            for overlapped in merges.overlapping(min_row, max_row, min_col, max_col):
+                merges.remove(overlapped)
+            if merged is not None:
+                merges.add(merged)
+        return merges
+
+    def _cleared_cells(self):
+        """새 병합 범위에서 왼쪽 위를 제외한 셀 (값 제거 대상)
+
+        새 병합이 남는지는 뒤 계획의 해제/추가로만 정해지므로 기존 병합 없이 계산한다.
+        """
+        cleared = set()
+        for merged in self._apply_merges(RangeIndex()):
+            for row, col in merged.cells:
+                if (row, col) != (merged.min_row, merged.min_col):
+                    cleared.add((row, col))
+        return cleared
+
+    def write(self, events, write):
+        """_read_sheet()의 조각들에 계획을 적용해서 write(텍스트)로 차례로 씀"""
+        cleared = self._cleared_cells()
+        for key in cleared:
+            self.values.pop(key, None)
+
+        targets = {}
+        for (row, col), value in self.values.items():
+            targets.setdefault(row, {})[col] = ('set', value)
+        for row, col in cleared:
+            targets.setdefault(row, {}).setdefault(col, ('clear', None))
+        for row, col in self.aligned:
+            targets.setdefault(row, {}).setdefault(col, ('keep', None))
+
+        self._xf_cache = {}
+        self._new_xfs = []
+        self._xf_count = None
+
+        pending = deque(sorted(targets))
+        # dimension은 시트에 행이 있는지 알아야 고칠 수 있으므로 첫 행이 나올 때까지 앞부분을 들고 있음
+        head = None
+        for event in events:
+            kind, text = event[0], event[1]
+            if kind == 'head':
+                head = text
+            elif kind == 'rows':
+                rows = event[2]
+                if head is not None:
+                    if not rows:
+                        head += text
+                        continue
+                    write(self._patch_dimension(head, targets, True))
+                    head = None
+                if not rows or not pending or pending[0] > rows[-1][0]:
+                    write(text)
+                    continue
+                write(self._patch_rows(text, rows, targets, pending))
+            else:
+                if head is not None:
+                    write(self._patch_dimension(head, targets, False))
+                # 기존 행보다 아래의 새 행은 </sheetData> 앞에
+                write(''.join(self._render_row(row, None, targets[row]) for row in pending))
+                self.merges = self._apply_merges(RangeIndex(_merge_ranges(text)))
+                write(self._patch_merge_cells(text))
+
+    def patched_styles(self):
+        """write()에서 셀 서식을 추가했으면 고친 styles.xml, 아니면 None"""
+        return self._patch_styles() if self._new_xfs else None
+
+    # ---- sheetData ----
+
+    def _patch_rows(self, text, rows, targets, pending):
+        """sheetData 본문 조각에서 대상 행만 다시 만들고 나머지는 그대로 (pending에서 처리한 행을 뺌)"""
+        out = []
+        pos = 0
+        for row_num, row_match in rows:
+            if not pending or pending[0] > row_num:
+                continue
+            out.append(text[pos:row_match.start()])
+            pos = row_match.start()
+            while pending and pending[0] < row_num:
+                new_row = pending.popleft()
+                out.append(self._render_row(new_row, None, targets[new_row]))
+            if pending and pending[0] == row_num:
+                pending.popleft()
+                out.append(self._render_row(row_num, row_match.group(0), targets[row_num]))
+                pos = row_match.end()
+        out.append(text[pos:])
+        return ''.join(out)
+
+    def _render_row(self, row, row_xml, changes):
+        cells = {}
+        row_attrs = ''
+        if row_xml is not None:
+            start_tag = re.match(r'<row\b[^>]*?/?>', row_xml).group(0)
+            attrs = ATTR_RE.findall(start_tag)
+            # spans는 선택 속성이므로 다시 계산하지 않고 제거
+            row_attrs = ''.join(f' {k}="{v}"' for k, v in attrs if k not in ('r', 'spans'))
+            cells = dict(_iter_cells(row_xml))
+
+        for col, (action, value) in changes.items():
+            old_xml = cells.get(col)
+            style = None
+            if old_xml is not None:
+                old_attrs = _attrs(re.match(r'<c\b[^>]*?/?>', old_xml).group(0))
+                style = old_attrs.get('s')
+                if action != 'keep' and '<f' in old_xml:
+                    if re.search(r'<f\b[^>]*\bt="shared"[^>]*\bref=', old_xml):
+                        raise XlsxPatchError(f"공유 수식 셀을 덮어쓸 수 없습니다: "
+                                             f"{get_column_letter(col)}{row}")
+                    self.removed_formula = True
+            if (row, col) in self.aligned:
+                style = self._aligned_xf(style or '0', self.aligned[(row, col)])
+
+            ref = f"{get_column_letter(col)}{row}"
+            if action == 'set':
+                cells[col] = self._cell_xml(ref, style, value)
+            elif action == 'clear' or old_xml is None:
+                cells[col] = self._cell_xml(ref, style, None)
+            else:
+                # 값은 그대로 두고 스타일만 변경
+                cells[col] = re.sub(r'^<c\b[^>]*?(/?)>',
+                                    lambda m: self._cell_start(old_xml, ref, style, m.group(1)),
+                                    old_xml, count=1)
+
+        cell_xml = ''.join(cells[col] for col in sorted(cells))
+        return f'<row r="{row}"{row_attrs}>{cell_xml}</row>'
+
+    def _cell_start(self, old_xml, ref, style, closing):
+        attrs = ATTR_RE.findall(re.match(r'<c\b[^>]*?/?>', old_xml).group(0))
+        parts = [f'r="{ref}"']
+        for key, value in attrs:
+            if key == 'r' or key == 's':
+                continue
+            parts.append(f'{key}="{value}"')
+        if style:
+            parts.append(f's="{style}"')
+        return f'<c {" ".join(parts)}{closing}>'
+
+    def _cell_xml(self, ref, style, value):
+        s_attr = f' s="{style}"' if style and style != '0' else ''
+        # openpyxl과 마찬가지로 빈 문자열은 값 없는 셀로 저장
+        if value is None or value == '':
+            return f'<c r="{ref}"{s_attr}/>'
+        cell_type, child = _value_xml(value)
+        t_attr = f' t="{cell_type}"' if cell_type else ''
+        return f'<c r="{ref}"{s_attr}{t_attr}>{child}</c>'
+
+    # ---- mergeCells / dimension ----
+
+    def _patch_merge_cells(self, xml):
+        merge_xml = ''
+        if self.merges:
+            cells = ''.join(f'<mergeCell ref="{m.coord}"/>' for m in self.merges)
+            merge_xml = f'<mergeCells count="{len(self.merges)}">{cells}</mergeCells>'
+
+        match = re.search(r'<mergeCells\b[^>]*?(?:/>|>.*?</mergeCells>)', xml, re.S)
+        if match:
+            return xml[:match.start()] + merge_xml + xml[match.end():]
+        if not merge_xml:
+            return xml
+
+        insert_at = None
+        for name in AFTER_MERGE_CELLS:
+            found = re.search(rf'<{name}\b', xml)
+            if found:
+                insert_at = found.start()
+                break
+        if insert_at is None:
+            insert_at = xml.rindex('</worksheet>')
+        return xml[:insert_at] + merge_xml + xml[insert_at:]
+
+    def _patch_dimension(self, xml, targets, had_rows):
+        match = re.search(r'<dimension\b[^>]*\bref="([^"]+)"[^>]*/>', xml)
+        if not match or not targets:
+            return xml
+        ref = match.group(1)
+        bounds = CellRange(ref if ':' in ref else f"{ref}:{ref}")
+        rows = list(targets)
+        cols = [col for changes in targets.values() for col in changes]
+        min_row, max_row = min(bounds.min_row, min(rows)), max(bounds.max_row, max(rows))
+        min_col, max_col = min(bounds.min_col, min(cols)), max(bounds.max_col, max(cols))
+        # 빈 시트의 A1 기본값은 실제 범위가 아님
+        if not had_rows:
+            min_row, min_col = min(rows), min(cols)
+        new_ref = (f"{get_column_letter(min_col)}{min_row}:"
+                   f"{get_column_letter(max_col)}{max_row}")
+        return xml[:match.start(1)] + new_ref + xml[match.end(1):]
+
+    # ---- styles.xml ----
+
+    def _cell_xfs(self):
+        match = re.search(r'<cellXfs\b[^>]*>(.*?)</cellXfs>', self.styles_xml, re.S)
+        if not match:
+            raise XlsxPatchError("styles.xml에 cellXfs가 없습니다.")
+        xfs = re.findall(r'<xf\b[^>]*?/>|<xf\b[^>]*>.*?</xf>', match.group(1), re.S)
+        return match, xfs
+
+    def _aligned_xf(self, style, name):
+        """기존 셀 서식에서 정렬만 name 스타일로 바꾼 서식 번호"""
+        key = (style, name)
+        if key in self._xf_cache:
+            return self._xf_cache[key]
+        if self.styles_xml is None:
+            raise XlsxPatchError("styles.xml이 없어 정렬을 적용할 수 없습니다.")
+
+        match, xfs = self._cell_xfs()
+        if self._xf_count is None:
+            self._xf_count = len(xfs)
+        xf = xfs[int(style)] if int(style) < len(xfs) else '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+
+        alignment = alignment_xml(name)
+        start_tag = re.match(r'<xf\b[^>]*?/?>', xf).group(0)
+        attrs = [(k, v) for k, v in ATTR_RE.findall(start_tag) if k != 'applyAlignment']
+        attrs.append(('applyAlignment', '1'))
+        body = ''
+        if not start_tag.endswith('/>'):
+            body = xf[len(start_tag):-len('</xf>')]
+            body = re.sub(r'<alignment\b[^>]*?(?:/>|>.*?</alignment>)', '', body, flags=re.S)
+        attr_xml = ''.join(f' {k}="{v}"' for k, v in attrs)
+        new_xf = f'<xf{attr_xml}>{alignment}{body}</xf>'
+
+        new_id = str(self._xf_count + len(self._new_xfs))
+        self._new_xfs.append(new_xf)
+        self._xf_cache[key] = new_id
+        return new_id
+
+    def _patch_styles(self):
+        match, xfs = self._cell_xfs()
+        start_tag = re.match(r'<cellXfs\b[^>]*>', match.group(0)).group(0)
+        new_start = re.sub(r'\bcount="\d+"', f'count="{len(xfs) + len(self._new_xfs)}"', start_tag)
+        new_block = new_start + match.group(1) + ''.join(self._new_xfs) + '</cellXfs>'
+        return self.styles_xml[:match.start()] + new_block + self.styles_xml[match.end():]